@@ -2,12 +2,16 @@ from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy.engine import make_url
 
 from alembic import context
 
 # Import your models here
 from app.models.user import User
+from app.models.revoked_token import RevokedToken
+from app.models.refresh_token import RefreshToken
 from app.db.base import Base
+from app.core.config import get_settings
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -18,6 +22,14 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
+# Migrate the database the application uses, through a sync driver
+# (e.g. sqlite+aiosqlite:// becomes sqlite://)
+_url = make_url(get_settings().DATABASE_URL)
+config.set_main_option(
+    "sqlalchemy.url",
+    _url.set(drivername=_url.get_backend_name()).render_as_string(hide_password=False).replace("%", "%%")
+)
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 target_metadata = Base.metadata
@@ -56,9 +68,20 @@ def run_migrations_online() -> None:
     """Run migrations in 'online' mode.
 
     In this scenario we need to create an Engine
-    and associate a connection with the context.
+    and associate a connection with the context. The application
+    passes its own connection in config.attributes["connection"]
+    when it migrates on startup.
 
     """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(
+            connection=connection, target_metadata=target_metadata
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -0,0 +1,99 @@
+"""Optimize user indexes and add the token tables
+
+Drops the index on users.id (the primary key is the rowid and already
+indexed), adds a covering index for the login lookup and a case-folded
+username column. Databases created by create_all before this revision are
+upgraded in place; empty databases get the full schema.
+
+Revision ID: 1dafa1e7bd82
+Revises: 5942e49ab409
+Create Date: 2026-10-18 13:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1dafa1e7bd82'
+down_revision: Union[str, None] = '5942e49ab409'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_users() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(), nullable=False),
+        sa.Column('username_normalized', sa.String(), nullable=False),
+        sa.Column('hashed_password', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_username', 'users', ['username'], unique=True)
+
+
+def _upgrade_users(bind, inspector) -> None:
+    if 'username_normalized' not in {column['name'] for column in inspector.get_columns('users')}:
+        op.add_column('users', sa.Column('username_normalized', sa.String(), nullable=True))
+        rows = bind.execute(sa.text('SELECT id, username FROM users')).fetchall()
+        if rows:
+            bind.execute(
+                sa.text('UPDATE users SET username_normalized = :normalized WHERE id = :id'),
+                [{'id': row.id, 'normalized': row.username.casefold()} for row in rows],
+            )
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.alter_column('username_normalized', existing_type=sa.String(), nullable=False)
+
+    if 'ix_users_id' in {index['name'] for index in sa.inspect(bind).get_indexes('users')}:
+        op.drop_index('ix_users_id', table_name='users')
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+
+    if 'users' in tables:
+        _upgrade_users(bind, inspector)
+    else:
+        _create_users()
+    op.create_index('ix_users_username_password_id', 'users', ['username', 'hashed_password', 'id'])
+    op.create_index('ix_users_username_normalized', 'users', ['username_normalized'])
+
+    if 'revoked_tokens' not in tables:
+        op.create_table(
+            'revoked_tokens',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('jti', sa.String(), nullable=False),
+            sa.Column('expires_at', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('jti'),
+        )
+        op.create_index('ix_revoked_tokens_expires_at', 'revoked_tokens', ['expires_at'])
+
+    if 'refresh_tokens' not in tables:
+        op.create_table(
+            'refresh_tokens',
+            sa.Column('token_hash', sa.String(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('username', sa.String(), nullable=False),
+            sa.Column('expires_at', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('token_hash'),
+        )
+        op.create_index('ix_refresh_tokens_user_id', 'refresh_tokens', ['user_id'])
+        op.create_index('ix_refresh_tokens_expires_at', 'refresh_tokens', ['expires_at'])
+
+
+def downgrade() -> None:
+    # The token tables and users table are kept, as they predate this revision
+    op.drop_index('ix_users_username_normalized', table_name='users')
+    op.drop_index('ix_users_username_password_id', table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('username_normalized')
+    op.create_index('ix_users_id', 'users', ['id'])
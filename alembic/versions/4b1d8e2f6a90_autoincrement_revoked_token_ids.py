@@ -0,0 +1,37 @@
+"""Never reuse revoked token ids
+
+Workers load new revocations by id (revoked_tokens.id greater than the
+last one they saw). Without AUTOINCREMENT SQLite reuses the ids of pruned
+rows, so a revocation could get an id a worker had already passed and
+never be loaded there. The table is rebuilt with AUTOINCREMENT, which
+keeps ids increasing across deletes.
+
+Revision ID: 4b1d8e2f6a90
+Revises: 7c2e4b9d1a36
+Create Date: 2026-10-19 09:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b1d8e2f6a90'
+down_revision: Union[str, None] = '7c2e4b9d1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table(
+        'revoked_tokens', recreate='always', table_kwargs={'sqlite_autoincrement': True}
+    ):
+        pass
+
+
+def downgrade() -> None:
+    with op.batch_alter_table(
+        'revoked_tokens', recreate='always', table_kwargs={'sqlite_autoincrement': False}
+    ):
+        pass
@@ -0,0 +1,34 @@
+"""Add user login activity columns
+
+Adds users.last_login_at and users.login_count, which app.db.login_recorder
+updates in batches after logins.
+
+Revision ID: 7c2e4b9d1a36
+Revises: 1dafa1e7bd82
+Create Date: 2026-10-18 15:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e4b9d1a36'
+down_revision: Union[str, None] = '1dafa1e7bd82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Plain ADD COLUMN: SQLite accepts it for a nullable column and for a
+    # NOT NULL column with a default, without rebuilding the table
+    op.add_column('users', sa.Column('last_login_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('users', sa.Column('login_count', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('login_count')
+        batch_op.drop_column('last_login_at')
@@ -0,0 +1,48 @@
+"""Drop users.username_normalized and slim the login index
+
+users.username_normalized was written on every insert but never read, and
+was not unique, so it could not have backed case-insensitive usernames
+either. The column and its index are dropped. The login covering index no
+longer lists id: the primary key is the rowid, which every SQLite index
+already stores.
+
+Revision ID: 9e3c6a1f5d27
+Revises: 4b1d8e2f6a90
+Create Date: 2026-10-19 11:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e3c6a1f5d27'
+down_revision: Union[str, None] = '4b1d8e2f6a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_users_username_normalized', table_name='users')
+    op.drop_index('ix_users_username_password_id', table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('username_normalized')
+    op.create_index('ix_users_username_password', 'users', ['username', 'hashed_password'])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    op.drop_index('ix_users_username_password', table_name='users')
+    op.add_column('users', sa.Column('username_normalized', sa.String(), nullable=True))
+    rows = bind.execute(sa.text('SELECT id, username FROM users')).fetchall()
+    if rows:
+        bind.execute(
+            sa.text('UPDATE users SET username_normalized = :normalized WHERE id = :id'),
+            [{'id': row.id, 'normalized': row.username.casefold()} for row in rows],
+        )
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column('username_normalized', existing_type=sa.String(), nullable=False)
+    op.create_index('ix_users_username_password_id', 'users', ['username', 'hashed_password', 'id'])
+    op.create_index('ix_users_username_normalized', 'users', ['username_normalized'])
@@ -0,0 +1,32 @@
+"""Index refresh tokens by username
+
+Logout revokes every refresh token of a user. It matched them by user id,
+but rebalance_users.py gives moved users a new id, so tokens issued before
+a move were left usable. Tokens are now revoked by username; its index
+replaces the user id index, which nothing reads any more.
+
+Revision ID: c41f7a2e9b58
+Revises: 9e3c6a1f5d27
+Create Date: 2026-10-19 14:25:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f7a2e9b58'
+down_revision: Union[str, None] = '9e3c6a1f5d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_refresh_tokens_username', 'refresh_tokens', ['username'])
+    op.drop_index('ix_refresh_tokens_user_id', table_name='refresh_tokens')
+
+
+def downgrade() -> None:
+    op.create_index('ix_refresh_tokens_user_id', 'refresh_tokens', ['user_id'])
+    op.drop_index('ix_refresh_tokens_username', table_name='refresh_tokens')
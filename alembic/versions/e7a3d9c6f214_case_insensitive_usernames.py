@@ -0,0 +1,68 @@
+"""Case-insensitive usernames
+
+Adds users.username_normalized, the case-folded username, with a unique
+index, so usernames that differ only in case ("Alice" and "alice") cannot
+both exist, and login finds a user whatever the case typed. The login
+covering index is rebuilt on the normalized username.
+
+Existing rows are backfilled. If some usernames already collide once case
+is folded the upgrade stops before changing anything and lists them; rename
+or remove the duplicates and run it again.
+
+Sharded deployments: users are now placed by their normalized username, so
+run rebalance_users.py with the current shard map after upgrading to move
+users whose username has upper-case letters.
+
+Revision ID: e7a3d9c6f214
+Revises: c41f7a2e9b58
+Create Date: 2026-10-19 16:10:00.000000
+
+"""
+from collections import defaultdict
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a3d9c6f214'
+down_revision: Union[str, None] = 'c41f7a2e9b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    rows = bind.execute(sa.text('SELECT id, username FROM users')).fetchall()
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row.username.casefold()].append(row.username)
+    collisions = [usernames for usernames in groups.values() if len(usernames) > 1]
+    if collisions:
+        raise RuntimeError(
+            "Rename or remove usernames that differ only in case before upgrading "
+            f"({len(collisions)} groups, e.g. "
+            + "; ".join(", ".join(usernames) for usernames in collisions[:10])
+            + ")"
+        )
+
+    op.add_column('users', sa.Column('username_normalized', sa.String(), nullable=True))
+    if rows:
+        bind.execute(
+            sa.text('UPDATE users SET username_normalized = :normalized WHERE id = :id'),
+            [{'id': row.id, 'normalized': row.username.casefold()} for row in rows],
+        )
+    op.drop_index('ix_users_username_password', table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column('username_normalized', existing_type=sa.String(), nullable=False)
+    op.create_index('ix_users_username_normalized', 'users', ['username_normalized'], unique=True)
+    op.create_index('ix_users_login', 'users', ['username_normalized', 'username', 'hashed_password'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_login', table_name='users')
+    op.drop_index('ix_users_username_normalized', table_name='users')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('username_normalized')
+    op.create_index('ix_users_username_password', 'users', ['username', 'hashed_password'])
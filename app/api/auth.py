@@ -1,86 +1,296 @@
 # Standard library imports
+import ipaddress
+import secrets
 from datetime import timedelta
-from typing import Any
+from typing import Any, Awaitable, Callable, Dict, Optional
 
 # FastAPI imports
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordRequestForm
-
-# Database imports
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, status
+from fastapi.security import HTTPBasic, HTTPBasicCredentials, OAuth2PasswordRequestForm
+from jose import JWTError
 
 # Application imports
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.security import create_access_token, decode_access_token
+from app.core.admission import Overloaded, hashing_admission, ip_throttle, username_throttle
+from app.core.cache import token_cache
+from app.core.hashing import verify_password_and_check_async, hash_password_async
 from app.core.config import get_settings
-from app.db.session import get_db
-from app.models.user import User
-from app.schemas.auth import UserCreate, Token, User as UserSchema, LoginResponse
-from app.api.deps import get_current_user
+from app.core.metrics import timed
+from app.core.revocation import revocation_list
+from app.core.username_filter import username_filter
+from app.db.refresh_tokens import (
+    create_refresh_token, revoke_refresh_token, revoke_user_refresh_tokens, rotate_refresh_token
+)
+from app.db.signup_batcher import signup_batcher
+from app.db.login_recorder import login_recorder
+from app.db.users import get_user_credentials, get_users_by_usernames, update_password_hash
+from app.models.user import User, normalize_username
+from app.schemas.auth import (
+    UserCreate, Token, User as UserSchema, LoginResponse, RefreshRequest, RevokeRequest, Message,
+    IntrospectRequest, IntrospectResponse
+)
+from app.api.deps import get_current_user, is_revoked, is_revoked_fresh, oauth2_scheme
+from app.api.responses import login_response, user_response
 
 # Initialize router and settings
 router = APIRouter()
 settings = get_settings()
 
+async def rehash_password(user_id: int, username: str, old_hash: str, password: str) -> None:
+    """
+    Rehash a password under the current hashing policy and store it.
+    Runs as a background task after the login response has been sent.
+    
+    Args:
+        user_id: Id of the user whose hash is outdated
+        username: Username, used to drop cached tokens for the user
+        old_hash: The outdated hash that was just verified
+        password: The verified plain text password
+    """
+    new_hash = await hash_password_async(password)
+    if await update_password_hash(user_id, old_hash, new_hash):
+        token_cache.invalidate_user(username)
+
+# Proxies allowed to name the client in X-Forwarded-For
+trusted_proxies = [ipaddress.ip_network(proxy, strict=False) for proxy in settings.TRUSTED_PROXIES]
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+def client_ip(request: Request) -> str:
+    """
+    Return the address of the client that sent a request.
+    
+    When the request comes from a trusted proxy, X-Forwarded-For is read
+    from the right, skipping trusted proxies, and the first other address
+    is the client; entries left of it could have been set by the client
+    and are ignored. Otherwise the connecting address is the client.
+    
+    Args:
+        request: Incoming request
+    
+    Returns:
+        str: Client address, or "unknown" if there is none
+    """
+    address = request.client.host if request.client else "unknown"
+    if not trusted_proxies or not _is_trusted_proxy(address):
+        return address
+    forwarded = [
+        hop.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for hop in header.split(",")
+        if hop.strip()
+    ]
+    for hop in reversed(forwarded):
+        address = hop
+        if not _is_trusted_proxy(hop):
+            break
+    return address
+
+def throttle(request: Request, username: Optional[str] = None) -> None:
+    """
+    Apply the per-IP and, if given, per-username attempt limits.
+    
+    Args:
+        request: Incoming request, used for the client IP
+        username: Username the request is for, limited whatever its case
+    
+    Raises:
+        HTTPException: 429 with Retry-After if a limit is exceeded
+    """
+    retry_after = ip_throttle.acquire(client_ip(request))
+    if retry_after is None and username is not None:
+        retry_after = username_throttle.acquire(normalize_username(username))
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+# Client credentials of /api/introspect callers, checked by introspection_client
+introspect_basic = HTTPBasic(auto_error=False, realm="introspect")
+
+def introspection_client(
+    request: Request,
+    credentials: Optional[HTTPBasicCredentials] = Depends(introspect_basic)
+) -> str:
+    """
+    Dependency that only lets the clients in INTROSPECT_CLIENTS through.
+    Failed attempts count against the per-IP throttle, so secrets cannot be
+    guessed quickly and the endpoint cannot serve as an open token oracle.
+    
+    Args:
+        request: Incoming request, used for per-IP throttling
+        credentials: HTTP Basic client id and secret
+    
+    Returns:
+        str: The client id
+    
+    Raises:
+        HTTPException: 401 for missing or wrong credentials, 429 if the
+        client IP has failed too often
+    """
+    if credentials is not None:
+        secret = settings.INTROSPECT_CLIENTS.get(credentials.username)
+        if secret is not None and secrets.compare_digest(
+            credentials.password.encode(), secret.encode()
+        ):
+            return credentials.username
+    throttle(request)
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid client credentials",
+        headers={"WWW-Authenticate": 'Basic realm="introspect"'},
+    )
+
+def active_result(claims: dict, user_id: int) -> dict:
+    """
+    Build the introspection result of an active token.
+    
+    Args:
+        claims: Decoded JWT payload
+        user_id: Id of the token's user
+    
+    Returns:
+        dict: "active", "sub", "exp" and "user_id"
+    """
+    return {"active": True, "sub": claims["sub"], "exp": claims["exp"], "user_id": user_id}
+
+async def run_admitted(fn: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+    """
+    Run a password hashing call once admission control lets it start.
+    
+    Args:
+        fn: Async hashing function
+        *args: Arguments for fn
+    
+    Returns:
+        The result of fn
+    
+    Raises:
+        HTTPException: 503 with Retry-After if the hashing queue is full or
+        the call could not start within HASHING_MAX_WAIT_MS
+    """
+    try:
+        async with hashing_admission.slot():
+            return await fn(*args)
+    except Overloaded as error:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, try again later",
+            headers={"Retry-After": str(error.retry_after)},
+        )
+
+def issue_tokens(username: str, refresh_token: str, message: str) -> Response:
+    """
+    Build the token response for a user.
+    
+    Args:
+        username: Subject of the access token
+        refresh_token: Refresh token to return alongside it
+        message: Message for the client
+    
+    Returns:
+        Response: LoginResponse body, encoded without re-validation
+    """
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": username},
+        expires_delta=access_token_expires
+    )
+    return login_response({
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": int(access_token_expires.total_seconds()),
+        "message": message
+    })
+
 @router.post("/signup", response_model=UserSchema, status_code=status.HTTP_201_CREATED)
 async def signup(
     *,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
     user_in: UserCreate,
 ) -> Any:
     """
     Create new user endpoint.
     
     Args:
-        db: Async database session
+        request: Incoming request, used for per-IP throttling
         user_in: User creation data (username and password)
     
     Returns:
         Created user information
     
     Raises:
-        HTTPException: If username is already registered
+        HTTPException: If username is already registered, the client is
+        throttled (429) or hashing is overloaded (503)
     """
-    # Check if user exists in database
-    result = await db.execute(select(User).where(User.username == user_in.username))
-    if result.scalar_one_or_none():
-        raise HTTPException(
-            status_code=400,
-            detail="Username already registered"
-        )
+    throttle(request)
     
-    # Create new user with hashed password
-    user = User(
-        username=user_in.username,
-        hashed_password=get_password_hash(user_in.password)
+    username_taken = HTTPException(
+        status_code=400,
+        detail="Username already registered"
     )
-    db.add(user)
-    await db.commit()
-    await db.refresh(user)
-    return user
+    
+    # Check if user exists in database, unless the username filter
+    # already knows it does not
+    if username_filter.might_exist(user_in.username):
+        if await get_user_credentials(user_in.username):
+            raise username_taken
+    
+    # Create new user with hashed password, committed together with
+    # concurrent signups
+    hashed_password = await run_admitted(hash_password_async, user_in.password)
+    with timed("db_insert"):
+        user = await signup_batcher.insert(user_in.username, hashed_password)
+    if user is None:
+        # Lost a race with a concurrent signup for the same username
+        raise username_taken
+    username_filter.add(user_in.username)
+    return user_response(user, status.HTTP_201_CREATED)
 
 @router.post("/login", response_model=LoginResponse)
 async def login(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    background_tasks: BackgroundTasks,
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
     User login endpoint.
     
+    If the stored hash uses an outdated scheme or cost, it is rewritten
+    under the current policy after the response is sent. The login time
+    and count are buffered and written in batches (app.db.login_recorder).
+    
     Args:
-        db: Async database session
+        request: Incoming request, used for per-IP throttling
+        background_tasks: Tasks run after the response is sent
         form_data: OAuth2 form containing username and password
     
     Returns:
-        JWT token and success message
-        Token is valid for 24 hours from creation
+        JWT access token, refresh token and success message
+        The access token is valid for ACCESS_TOKEN_EXPIRE_MINUTES; use the
+        refresh token with /api/refresh to get a new one without a password
     
     Raises:
-        HTTPException: If credentials are invalid or user doesn't exist
+        HTTPException: If credentials are invalid or user doesn't exist,
+        the client or username is throttled (429) or hashing is
+        overloaded (503)
     """
-    # Check if user exists in database
-    result = await db.execute(select(User).where(User.username == form_data.username))
-    user = result.scalar_one_or_none()
+    throttle(request, form_data.username)
+    
+    # Check if user exists, skipping the query for usernames the
+    # username filter knows are absent (after catching up with signups on
+    # other workers, so a new user is never rejected)
+    user = None
+    if await username_filter.might_exist_fresh(form_data.username):
+        user = await get_user_credentials(form_data.username)
     
     # Handle non-existent user
     if not user:
@@ -90,25 +300,55 @@ async def login(
         )
     
     # Verify password
-    if not verify_password(form_data.password, user.hashed_password):
+    valid, needs_update = await run_admitted(
+        verify_password_and_check_async, form_data.password, user.hashed_password
+    )
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Generate access token with 24-hour expiration
-    access_token_expires = timedelta(hours=24)
-    access_token = create_access_token(
-        data={"sub": user.username},
-        expires_delta=access_token_expires
-    )
+    # Buffered for a batched write; never waits on the database
+    login_recorder.record(user.id)
     
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "message": "Successfully logged in!"
-    }
+    # Upgrade outdated hashes without delaying the response
+    if needs_update and settings.PASSWORD_REHASH_ON_LOGIN:
+        background_tasks.add_task(
+            rehash_password, user.id, user.username, user.hashed_password, form_data.password
+        )
+    
+    # Generate a short-lived access token and a refresh token
+    refresh_token = await create_refresh_token(user.id, user.username)
+    return issue_tokens(user.username, refresh_token, "Successfully logged in!")
+
+@router.post("/refresh", response_model=LoginResponse)
+async def refresh(refresh_in: RefreshRequest) -> Any:
+    """
+    Exchange a refresh token for a new access token and refresh token.
+    
+    The presented refresh token is consumed and replaced (rotation), so each
+    refresh token works once. No password hashing is involved.
+    
+    Args:
+        refresh_in: The refresh token from login or a previous refresh
+    
+    Returns:
+        New JWT access token, new refresh token and success message
+    
+    Raises:
+        HTTPException: If the refresh token is unknown, used or expired
+    """
+    rotated = await rotate_refresh_token(refresh_in.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    refresh_token, username = rotated
+    return issue_tokens(username, refresh_token, "Token refreshed")
 
 @router.get("/protected", response_model=UserSchema, tags=["authentication"])
 async def protected_route(
@@ -126,4 +366,155 @@ async def protected_route(
     Raises:
         HTTPException: If Bearer token is invalid or expired
     """
-    return current_user 
\ No newline at end of file
+    return user_response(current_user)
+
+async def revoke_token(token: str) -> None:
+    """
+    Add a token to the denylist and drop it from the token cache.
+    
+    Args:
+        token: Encoded JWT to revoke
+    
+    Raises:
+        HTTPException: If the token is invalid or carries no "jti" claim
+    """
+    try:
+        payload = decode_access_token(token)
+    except JWTError:
+        raise HTTPException(status_code=400, detail="Invalid token")
+    if payload.get("jti") is None:
+        raise HTTPException(status_code=400, detail="Token cannot be revoked")
+    await revocation_list.revoke(payload["jti"], int(payload["exp"]))
+    token_cache.revoke(token, payload["jti"], int(payload["exp"]))
+
+@router.post("/logout", response_model=Message)
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Revoke the Bearer token used to call this endpoint and every refresh
+    token of the user, so no new access token can be obtained without
+    logging in again.
+    
+    Args:
+        token: JWT token from the Authorization header
+        current_user: User object from the validated Bearer token
+    
+    Returns:
+        Success message
+    
+    Raises:
+        HTTPException: If Bearer token is invalid, expired or already revoked
+    """
+    await revoke_token(token)
+    await revoke_user_refresh_tokens(current_user.username)
+    return {"message": "Successfully logged out!"}
+
+@router.post("/revoke", response_model=Message)
+async def revoke(
+    revoke_in: RevokeRequest,
+    current_user: User = Depends(get_current_user)
+) -> Any:
+    """
+    Revoke any access or refresh token belonging to the caller.
+    Admins listed in ADMIN_USERNAMES may revoke tokens of any user.
+    
+    Args:
+        revoke_in: The access or refresh token to revoke
+        current_user: User object from the validated Bearer token
+    
+    Returns:
+        Success message
+    
+    Raises:
+        HTTPException: If the token is invalid or belongs to another user
+    """
+    is_admin = current_user.username in settings.ADMIN_USERNAMES
+    try:
+        subject = decode_access_token(revoke_in.token).get("sub")
+    except JWTError:
+        # Not an access token, so try it as a refresh token; another
+        # user's refresh token is reported as invalid, not as forbidden
+        if await revoke_refresh_token(revoke_in.token, None if is_admin else current_user.username):
+            return {"message": "Token revoked"}
+        raise HTTPException(status_code=400, detail="Invalid token")
+    if subject != current_user.username and not is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot revoke another user's token"
+        )
+    await revoke_token(revoke_in.token)
+    return {"message": "Token revoked"}
+
+
+@router.post("/introspect", response_model=IntrospectResponse)
+async def introspect(
+    introspect_in: IntrospectRequest,
+    client_id: str = Depends(introspection_client)
+) -> Any:
+    """
+    Validate a batch of access tokens, e.g. for an API gateway.
+    Callers authenticate with HTTP Basic client credentials from
+    INTROSPECT_CLIENTS.
+    
+    Each distinct token is checked once: recently verified tokens come from
+    the token cache, the rest are decoded and checked against the
+    revocation list, and the users of all of them are loaded with a single
+    query.
+    
+    Args:
+        introspect_in: Up to INTROSPECT_MAX_TOKENS access tokens
+        client_id: Authenticated client
+    
+    Returns:
+        One result per token, in request order, with "active" and, for
+        active tokens, the "sub", "exp" and "user_id"
+    
+    Raises:
+        HTTPException: If the client credentials are invalid (401) or more
+        than INTROSPECT_MAX_TOKENS tokens are sent (400)
+    """
+    if len(introspect_in.tokens) > settings.INTROSPECT_MAX_TOKENS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.INTROSPECT_MAX_TOKENS} tokens per request"
+        )
+    
+    inactive = {"active": False}
+    results: Dict[str, dict] = {}
+    pending: Dict[str, dict] = {}
+    for token in dict.fromkeys(introspect_in.tokens):
+        cached = token_cache.get(token)
+        if cached is not None:
+            claims = cached.claims
+            if is_revoked(claims):
+                results[token] = inactive
+            else:
+                results[token] = active_result(claims, cached.user["id"])
+            continue
+        try:
+            claims = decode_access_token(token)
+        except JWTError:
+            results[token] = inactive
+            continue
+        if is_revoked_fresh(claims) or claims.get("sub") is None:
+            results[token] = inactive
+        else:
+            pending[token] = claims
+    
+    # One query for the users of every token that was not cached. Their
+    # versions are read first, so a user that changes while the query runs
+    # is not cached with stale values
+    usernames = list({claims["sub"] for claims in pending.values()})
+    versions = token_cache.user_versions(usernames)
+    users = await get_users_by_usernames(usernames)
+    for token, claims in pending.items():
+        user = users.get(claims["sub"])
+        if user is None:
+            results[token] = inactive
+            continue
+        token_cache.set(token, claims, user, versions[claims["sub"]])
+        results[token] = active_result(claims, user["id"])
+    
+    return {"results": [results[token] for token in introspect_in.tokens]}
@@ -0,0 +1,111 @@
+# Standard library imports
+from typing import Any
+
+# FastAPI imports
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+
+# Application imports
+from app.api.deps import get_current_admin
+from app.core import profiling
+from app.core.config import get_settings
+
+# Get application settings
+settings = get_settings()
+
+# Admin-only diagnostics; only included when PROFILING_ENABLED is set
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+# Response media type per output format
+MEDIA_TYPES = {
+    "collapsed": "text/plain; charset=utf-8",
+    "pstats": "text/plain; charset=utf-8",
+    "prof": "application/octet-stream",
+}
+
+@router.post("/debug/profile")
+async def capture_profile(
+    seconds: float = Query(5, gt=0, le=settings.PROFILE_MAX_SECONDS),
+    format: str = Query("collapsed", pattern="^(collapsed|pstats|prof)$"),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|ncalls)$"),
+) -> Response:
+    """
+    Profile this worker for a number of seconds.
+
+    With several workers, each request profiles only the worker that
+    serves it.
+
+    Args:
+        seconds: Length of the capture
+        format: "collapsed" samples the stacks of every thread and returns
+            collapsed stacks for flamegraphs; "pstats" and "prof" profile
+            the event loop thread with cProfile and return the text report
+            or the binary pstats file
+        sort: Sort key of the pstats text report
+
+    Returns:
+        The profile in the requested format
+
+    Raises:
+        HTTPException: 409 if another capture of the same kind is running
+    """
+    try:
+        if format == "collapsed":
+            body = await profiling.sample_stacks(seconds)
+        else:
+            stats = await profiling.profile_event_loop(seconds)
+            body = profiling.render_stats(stats, format, sort)
+    except profiling.ProfilerBusy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Another profile is being captured"
+        )
+    return Response(body, media_type=MEDIA_TYPES[format])
+
+@router.get("/debug/profile/requests")
+async def sampled_request_profile(
+    format: str = Query("pstats", pattern="^(pstats|prof)$"),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|ncalls)$"),
+    reset: bool = Query(False),
+) -> Response:
+    """
+    Return the cumulative profile of the requests sampled by
+    PROFILE_REQUEST_RATE on this worker.
+
+    Args:
+        format: "pstats" for the text report, "prof" for the binary file
+        sort: Sort key of the text report
+        reset: Start a new cumulative profile after this one is returned
+
+    Returns:
+        The profile, with the number of sampled requests in the
+        X-Sampled-Requests header
+
+    Raises:
+        HTTPException: 404 if no request has been sampled yet
+    """
+    stats, count = profiling.sampled_profile, profiling.sampled_requests
+    if stats is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No requests sampled yet"
+        )
+    if reset:
+        profiling.reset_sampled_profile()
+    return Response(
+        profiling.render_stats(stats, format, sort),
+        media_type=MEDIA_TYPES[format],
+        headers={"X-Sampled-Requests": str(count)}
+    )
+
+@router.get("/debug/slow-requests")
+async def list_slow_requests() -> Any:
+    """
+    Return the most recent requests slower than PROFILE_SLOW_REQUEST_MS on
+    this worker, newest first.
+
+    Returns:
+        Method, path, route, status, duration, where each request was
+        waiting when it crossed the threshold, and its profile if it was
+        sampled
+    """
+    return {"items": list(reversed(profiling.slow_requests))}
@@ -5,13 +5,14 @@ Contains reusable dependencies that can be injected into routes.
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
+from jose import JWTError
 from typing import Optional
 
+from app.core.cache import token_cache
 from app.core.config import get_settings
-from app.db.session import get_db
+from app.core.revocation import revocation_list
+from app.core.security import decode_access_token
+from app.db.users import get_user_snapshot
 from app.models.user import User
 
 # Initialize OAuth2 scheme with token URL matching the login endpoint
@@ -23,19 +24,53 @@ oauth2_scheme = OAuth2PasswordBearer(
 # Get application settings
 settings = get_settings()
 
+def is_revoked(claims: dict) -> bool:
+    """
+    Check the token's "jti" claim against the revocation list.
+    Tokens issued without a jti cannot be revoked and always pass.
+    
+    Args:
+        claims: Decoded JWT payload
+        
+    Returns:
+        bool: True if the token has been revoked
+    """
+    jti = claims.get("jti")
+    return jti is not None and revocation_list.is_revoked(jti)
+
+def is_revoked_fresh(claims: dict) -> bool:
+    """
+    Check the token's "jti" claim against the revocation list and against
+    revocations made by other workers since this one last synced, which the
+    shared token cache records. Costs one read of the cache file, so use it
+    for tokens that did not come from the token cache: revoking a token
+    removes its cache entry and keeps it from being cached again.
+    
+    Args:
+        claims: Decoded JWT payload
+        
+    Returns:
+        bool: True if the token has been revoked
+    """
+    jti = claims.get("jti")
+    return jti is not None and (revocation_list.is_revoked(jti) or token_cache.is_revoked(jti))
+
 async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
+    token: str = Depends(oauth2_scheme)
 ) -> User:
     """
     Dependency that validates a Bearer token and returns the corresponding user.
     
     This dependency can be used to protect routes that require authentication.
     The token is expected to be a JWT containing a "sub" claim with the username.
+    Tokens that were verified recently are answered from the token cache
+    without decoding the JWT or querying the database, users loaded by any
+    worker are answered from the shared cache, and concurrent requests for
+    the same user share one query. Revoked tokens are
+    rejected on both paths.
     
     Args:
         token: JWT token from the Authorization header (automatically extracted by OAuth2PasswordBearer)
-        db: Database session for user lookup
         
     Returns:
         User: The authenticated user object
@@ -49,13 +84,18 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    # Serve repeat tokens from the cache
+    cached = token_cache.get(token)
+    if cached is not None:
+        if is_revoked(cached.claims):
+            raise credentials_exception
+        return User(**cached.user)
+    
     try:
         # Decode and validate the JWT token
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
+        payload = decode_access_token(token)
+        if is_revoked_fresh(payload):
+            raise credentials_exception
         
         # Extract username from token payload
         username: Optional[str] = payload.get("sub")
@@ -65,13 +105,39 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
         
-    # Lookup user in database
-    result = await db.execute(
-        select(User).where(User.username == username)
-    )
-    user = result.scalar_one_or_none()
+    # Use a snapshot cached by any worker, or look the user up in the
+    # database, coalesced with concurrent lookups. The version is read first,
+    # so a snapshot loaded while the user changes is not cached
+    snapshot, version = token_cache.get_user(username)
+    if snapshot is None:
+        snapshot = await get_user_snapshot(username)
+        if snapshot is None:
+            raise credentials_exception
+        token_cache.set_user(snapshot, version)
     
-    if user is None:
-        raise credentials_exception
+    # Remember the result until the token expires or the TTL passes
+    token_cache.set(token, payload, snapshot, version)
+        
+    return User(**snapshot)
+
+async def get_current_admin(
+    current_user: User = Depends(get_current_user)
+) -> User:
+    """
+    Dependency that only lets users listed in ADMIN_USERNAMES through.
+    
+    Args:
+        current_user: User object from the validated Bearer token
+        
+    Returns:
+        User: The authenticated admin user
         
-    return user 
\ No newline at end of file
+    Raises:
+        HTTPException: If the user is not an admin
+    """
+    if current_user.username not in settings.ADMIN_USERNAMES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
+        )
+    return current_user
\ No newline at end of file
@@ -0,0 +1,41 @@
+# Standard library imports
+from typing import Optional
+
+# FastAPI imports
+from fastapi import APIRouter, Header, HTTPException, Response
+
+# Application imports
+from app.core.config import get_settings
+from app.core.keys import key_ring
+
+# Initialize router and settings
+router = APIRouter()
+settings = get_settings()
+
+@router.get("/.well-known/jwks.json")
+async def jwks(if_none_match: Optional[str] = Header(None)) -> Response:
+    """
+    Publish the public signing keys as a JSON Web Key Set.
+    
+    Downstream services use it to verify access tokens locally. The body is
+    built once at startup and served with Cache-Control and an ETag, so
+    clients revalidate cheaply with If-None-Match.
+    
+    Args:
+        if_none_match: ETag the client already holds
+    
+    Returns:
+        The JWKS document, or 304 Not Modified if the client's copy is current
+    
+    Raises:
+        HTTPException: If tokens are signed with a shared secret (HS256)
+    """
+    if key_ring is None:
+        raise HTTPException(status_code=404, detail="Tokens are not signed with public keys")
+    headers = {
+        "Cache-Control": f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}",
+        "ETag": key_ring.jwks_etag,
+    }
+    if if_none_match == key_ring.jwks_etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=key_ring.jwks_body, media_type="application/json", headers=headers)
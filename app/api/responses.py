@@ -0,0 +1,81 @@
+"""
+Fast JSON responses for the hot auth endpoints.
+
+Routes that return plain data have it validated against their
+response_model, converted to JSON-compatible Python objects and encoded
+by the response class on every request. The bodies built here already
+have the schema's shape and types (database rows and freshly minted
+tokens), so they are encoded straight to bytes with orjson and returned
+as a Response, which FastAPI sends as is. The field lists are read from
+the schemas once at import, so the output keeps the schemas' field order
+and names; response_model stays on the routes for the OpenAPI docs.
+"""
+
+# Standard library imports
+from typing import Any, Mapping
+
+# FastAPI imports
+import orjson
+from fastapi import Response, status
+from fastapi.responses import ORJSONResponse
+
+# Application imports
+from app.schemas.auth import LoginResponse, User as UserSchema
+
+# Field names in schema order, read once
+USER_FIELDS = tuple(UserSchema.model_fields)
+LOGIN_FIELDS = tuple(LoginResponse.model_fields)
+
+# Default response class of the application (orjson instead of json.dumps)
+DefaultResponse = ORJSONResponse
+
+def user_fields(user: Any) -> dict:
+    """
+    Pick the public user fields from a row mapping or a User model.
+
+    Args:
+        user: Row mapping (signup, listings) or ORM User (current user)
+
+    Returns:
+        dict: The fields of the User schema, in schema order
+    """
+    if isinstance(user, Mapping):
+        return {field: user[field] for field in USER_FIELDS}
+    return {field: getattr(user, field) for field in USER_FIELDS}
+
+def dumps(body: Any) -> bytes:
+    """
+    Encode a response body to JSON bytes.
+
+    Args:
+        body: JSON-compatible data; datetimes are written in ISO 8601
+
+    Returns:
+        bytes: The encoded body
+    """
+    return orjson.dumps(body)
+
+def user_response(user: Any, status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Build the response for a single user without schema validation.
+
+    Args:
+        user: Row mapping or ORM User
+        status_code: HTTP status of the response
+
+    Returns:
+        Response: The User schema as JSON
+    """
+    return Response(dumps(user_fields(user)), status_code=status_code, media_type="application/json")
+
+def login_response(body: Mapping[str, Any]) -> Response:
+    """
+    Build a token response without schema validation.
+
+    Args:
+        body: Values of every LoginResponse field
+
+    Returns:
+        Response: The LoginResponse schema as JSON
+    """
+    return Response(dumps({field: body[field] for field in LOGIN_FIELDS}), media_type="application/json")
@@ -0,0 +1,56 @@
+# Standard library imports
+from typing import Any, AsyncIterator
+
+# FastAPI imports
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.responses import StreamingResponse
+
+# Application imports
+from app.api.deps import get_current_admin
+from app.api.responses import dumps, user_fields
+from app.db.users import fetch_user_page, stream_users
+from app.schemas.auth import UserPage
+
+# Initialize router
+router = APIRouter(dependencies=[Depends(get_current_admin)])
+
+@router.get("/users", response_model=UserPage)
+async def list_users(
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+) -> Any:
+    """
+    Admin endpoint that lists users one page at a time.
+    
+    Args:
+        after_id: Return users with an id greater than this (0 for the first page)
+        limit: Maximum number of users in the page
+    
+    Returns:
+        The page of users and the after_id to use for the next page,
+        or null when this is the last page
+    """
+    users = await fetch_user_page(after_id, limit)
+    next_after_id = users[-1]["id"] if len(users) == limit else None
+    # Rows already have the schema's types, so skip re-validating them
+    return Response(
+        dumps({"items": [user_fields(user) for user in users], "next_after_id": next_after_id}),
+        media_type="application/json"
+    )
+
+@router.get("/users/export")
+async def export_users(after_id: int = Query(0, ge=0)) -> StreamingResponse:
+    """
+    Admin endpoint that streams every user as newline-delimited JSON.
+    
+    Args:
+        after_id: Start the export after this user id
+    
+    Returns:
+        A streaming application/x-ndjson response, one user per line
+    """
+    async def generate() -> AsyncIterator[bytes]:
+        async for user in stream_users(after_id):
+            yield dumps(user_fields(user)) + b"\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
@@ -0,0 +1,208 @@
+"""
+Admission control and throttling for password hashing.
+
+bcrypt is the only CPU-heavy work in the request path. Without a limit, a
+login flood queues unbounded work in the hashing pool and every request on
+the worker slows down with it. AdmissionController caps the number of
+hashing jobs running at once and the number waiting for a slot, and sheds
+requests that could not start within HASHING_MAX_WAIT_MS, so the excess is
+answered immediately with 503 and Retry-After instead of timing out later.
+TokenBucketLimiter throttles logins per username and per client IP before
+any hashing work is admitted.
+"""
+
+# Standard library imports
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Hashable, Optional, Tuple
+
+# Application imports
+from app.core.config import get_settings
+
+# Get application settings
+settings = get_settings()
+
+class Overloaded(Exception):
+    """
+    Raised when a request cannot be admitted in time.
+
+    Attributes:
+        retry_after: Suggested number of seconds before retrying
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Overloaded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Bounded concurrency with a bounded FIFO wait queue and a wait deadline.
+
+    Attributes:
+        max_concurrency: Jobs allowed to run at once
+        max_queue: Jobs allowed to wait for a slot
+        max_wait: Longest time in seconds a job may wait for a slot
+        active: Jobs currently running
+        service_time: Moving average of the job duration in seconds
+        admitted: Number of jobs admitted
+        rejected: Number of jobs shed
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, max_wait_ms: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait_ms / 1000
+        self.active = 0
+        self.service_time = 0.0
+        self.admitted = 0
+        self.rejected = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def estimated_wait(self) -> float:
+        """
+        Estimate how long a job arriving now would wait for a slot.
+
+        Returns:
+            float: Expected wait in seconds, based on the queue length and
+            the average job duration
+        """
+        if self.active < self.max_concurrency:
+            return 0.0
+        return (len(self._waiters) + 1) * self.service_time / self.max_concurrency
+
+    def _reject(self) -> Overloaded:
+        self.rejected += 1
+        return Overloaded(max(1, math.ceil(self.estimated_wait())))
+
+    async def _acquire(self) -> None:
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return
+        # Shed up front when the queue is full or the job could not start in time
+        if len(self._waiters) >= self.max_queue or self.estimated_wait() > self.max_wait:
+            raise self._reject()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            raise self._reject()
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        self.admitted += 1
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        # A waiter that gave up may still have been handed the slot just
+        # before the timeout or cancellation landed; pass that slot on
+        if waiter.done() and not waiter.cancelled():
+            self._release()
+        elif waiter in self._waiters:
+            self._waiters.remove(waiter)
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next waiter, keeping FIFO order
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold one slot for the duration of the block.
+
+        Raises:
+            Overloaded: If the queue is full or no slot frees up in time
+        """
+        await self._acquire()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.service_time = elapsed if self.service_time == 0 else 0.8 * self.service_time + 0.2 * elapsed
+            self._release()
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets with expiry, e.g. one bucket per username.
+
+    Each bucket holds up to `burst` tokens and refills at `rate` tokens per
+    second. A bucket that has refilled completely carries no information and
+    is dropped, so memory only grows with keys that were active recently;
+    `max_keys` bounds it under a flood of distinct keys.
+
+    Attributes:
+        rate: Tokens added per second (0 disables the limiter)
+        burst: Bucket capacity
+        max_keys: Maximum number of buckets kept
+        throttled: Number of denied requests
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_keys: int):
+        self.rate = rate_per_minute / 60
+        self.burst = burst
+        self.max_keys = max_keys
+        self.throttled = 0
+        # key -> (tokens, monotonic time of the last update), least recently used first
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+
+    def _expire(self, now: float) -> None:
+        full_after = self.burst / self.rate
+        while self._buckets:
+            key, (tokens, updated) = next(iter(self._buckets.items()))
+            if len(self._buckets) <= self.max_keys and now - updated < full_after:
+                break
+            del self._buckets[key]
+
+    def acquire(self, key: Hashable) -> Optional[int]:
+        """
+        Take one token from the key's bucket.
+
+        Args:
+            key: Bucket key
+
+        Returns:
+            Optional[int]: None if allowed, otherwise the number of seconds
+            until a token is available
+        """
+        if self.rate <= 0:
+            return None
+        now = time.monotonic()
+        self._expire(now)
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets[key] = (tokens, now)
+            self.throttled += 1
+            return max(1, math.ceil((1 - tokens) / self.rate))
+        self._buckets[key] = (tokens - 1, now)
+        return None
+
+# Shared controllers for this worker process; concurrency defaults to the
+# hashing pool size
+hashing_admission = AdmissionController(
+    settings.HASHING_MAX_CONCURRENCY or settings.HASHING_POOL_SIZE or os.cpu_count() or 1,
+    settings.HASHING_MAX_QUEUE,
+    settings.HASHING_MAX_WAIT_MS
+)
+username_throttle = TokenBucketLimiter(
+    settings.LOGIN_USERNAME_RATE_PER_MINUTE, settings.LOGIN_USERNAME_BURST, settings.THROTTLE_MAX_KEYS
+)
+ip_throttle = TokenBucketLimiter(
+    settings.LOGIN_IP_RATE_PER_MINUTE, settings.LOGIN_IP_BURST, settings.THROTTLE_MAX_KEYS
+)
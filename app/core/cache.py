@@ -0,0 +1,261 @@
+"""
+Cache for verified bearer tokens.
+Maps a digest of a token to its decoded claims and a snapshot of the user it
+resolved to, so repeat requests with the same token skip the JWT decode and
+the database lookup. TokenCache keeps entries in this process; with
+TOKEN_CACHE_BACKEND=shared every worker on the host shares one cache
+(app.core.shared_cache).
+"""
+
+# Standard library imports
+import hashlib
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+# Application settings
+from app.core.config import get_settings
+
+# Get application settings
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class CachedToken(NamedTuple):
+    """
+    A verified token as stored in the cache.
+
+    Attributes:
+        claims: Decoded JWT payload
+        user: Column values of the user the token resolved to
+    """
+    claims: dict
+    user: dict
+
+class TokenCache:
+    """
+    Bounded LRU cache with per-entry expiry.
+
+    Entries are keyed by the SHA-256 digest of the raw token so the cache never
+    holds usable credentials. An entry lives until the earlier of the token's
+    "exp" claim and the configured TTL, and the least recently used entry is
+    evicted once the cache is full.
+
+    Attributes:
+        maxsize: Maximum number of cached tokens, 0 disables the cache
+        ttl: Maximum lifetime of an entry in seconds
+        hits: Number of lookups answered from the cache
+        misses: Number of lookups that fell through to the database
+        keeps_users: Whether user snapshots are cached on their own
+    """
+    keeps_users = False
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # digest -> (expires_at, username, cached token)
+        self._entries: "OrderedDict[str, Tuple[float, str, CachedToken]]" = OrderedDict()
+        # username -> digests of its cached tokens, used for invalidation
+        self._by_user: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def digest(token: str) -> str:
+        """
+        Compute the cache key for a raw token.
+        
+        Args:
+            token: Encoded JWT from the Authorization header
+        
+        Returns:
+            str: Hex SHA-256 digest of the token
+        """
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[CachedToken]:
+        """
+        Look up a previously verified token.
+        
+        Args:
+            token: Encoded JWT from the Authorization header
+        
+        Returns:
+            Optional[CachedToken]: Cached claims and user, or None on a miss or expiry
+        """
+        if self.maxsize <= 0:
+            return None
+        key = self.digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, username, cached = entry
+        if expires_at <= time.time():
+            self._remove(key, username)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return cached
+
+    def set(self, token: str, claims: dict, snapshot: dict, version: Optional[int] = None) -> None:
+        """
+        Cache the claims and user snapshot for a verified token.
+        
+        Args:
+            token: Encoded JWT that was just verified
+            claims: Decoded payload, whose "exp" bounds the entry's lifetime
+            snapshot: Column values of the resolved user
+            version: Unused; kept for the interface of the shared cache
+        """
+        if self.maxsize <= 0 or claims.get("exp") is None:
+            return
+        expires_at = min(claims["exp"], time.time() + self.ttl)
+        if expires_at <= time.time():
+            return
+        key = self.digest(token)
+        username = snapshot["username"]
+        if key in self._entries:
+            self._remove(key, self._entries[key][1])
+        self._entries[key] = (expires_at, username, CachedToken(claims, snapshot))
+        self._by_user.setdefault(username, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            old_key, (_, old_username, _) = self._entries.popitem(last=False)
+            self._discard_index(old_key, old_username)
+
+    def get_user(self, username: str) -> Tuple[Optional[dict], int]:
+        """
+        Look up a cached user snapshot. This cache only keeps snapshots
+        inside token entries, so this is always a miss.
+        
+        Args:
+            username: Username to look up
+        
+        Returns:
+            Tuple of None and version 0
+        """
+        return None, 0
+
+    def set_user(self, snapshot: dict, version: int) -> None:
+        """
+        Cache a user snapshot; a no-op in the per-process cache.
+        
+        Args:
+            snapshot: Column values of the user
+            version: Version returned by get_user()
+        """
+
+    def user_versions(self, usernames: List[str]) -> Dict[str, int]:
+        """
+        Read the current version of many users; always 0 in the per-process
+        cache, which drops a user's entries on invalidation instead.
+        
+        Args:
+            usernames: Usernames to look up
+        
+        Returns:
+            Dict[str, int]: Username to version 0
+        """
+        return dict.fromkeys(usernames, 0)
+
+    def invalidate_token(self, token: str) -> None:
+        """
+        Drop a single token from the cache, e.g. when it is revoked.
+        
+        Args:
+            token: Encoded JWT to forget
+        """
+        key = self.digest(token)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._remove(key, entry[1])
+
+    def revoke(self, token: str, jti: str, expires_at: float) -> None:
+        """
+        Drop a revoked token from the cache. Other workers keep their own
+        entries until their revocation lists sync.
+        
+        Args:
+            token: Encoded JWT that was revoked
+            jti: Its "jti" claim
+            expires_at: Its "exp" claim
+        """
+        self.invalidate_token(token)
+
+    def is_revoked(self, jti: str) -> bool:
+        """
+        Check for revocations made by other workers; this cache does not
+        see them, so always False.
+        
+        Args:
+            jti: The token's "jti" claim
+        
+        Returns:
+            bool: False
+        """
+        return False
+
+    def invalidate_user(self, username: str) -> None:
+        """
+        Drop every cached token that resolved to the given user.
+        Call this whenever a user's row changes.
+        
+        Args:
+            username: Username whose cached entries should be removed
+        """
+        for key in self._by_user.pop(username, set()):
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        self._entries.clear()
+        self._by_user.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str, username: str) -> None:
+        self._entries.pop(key, None)
+        self._discard_index(key, username)
+
+    def _discard_index(self, key: str, username: str) -> None:
+        keys = self._by_user.get(username)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[username]
+
+def build_token_cache():
+    """
+    Create the token cache selected by TOKEN_CACHE_BACKEND.
+
+    "shared" keeps entries in a file on tmpfs that every worker on the host
+    uses (see app.core.shared_cache); if that file cannot be opened, the
+    per-process cache is used instead.
+
+    Returns:
+        The configured cache
+    """
+    if settings.TOKEN_CACHE_BACKEND == "shared" and settings.TOKEN_CACHE_SIZE > 0:
+        from app.core.shared_cache import SharedTokenCache, default_cache_path
+        cache = SharedTokenCache(
+            settings.TOKEN_CACHE_PATH or default_cache_path(),
+            maxsize=settings.TOKEN_CACHE_SIZE,
+            ttl=settings.TOKEN_CACHE_TTL_SECONDS
+        )
+        try:
+            cache.conn
+            return cache
+        except (OSError, sqlite3.Error):
+            logger.warning("Shared token cache unavailable, using a per-process cache", exc_info=True)
+    return TokenCache(
+        maxsize=settings.TOKEN_CACHE_SIZE,
+        ttl=settings.TOKEN_CACHE_TTL_SECONDS
+    )
+
+# Token cache used by this worker process
+token_cache = build_token_cache()
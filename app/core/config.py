@@ -1,25 +1,204 @@
-import os
-from dotenv import load_dotenv
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
-# Load .env file explicitly
-load_dotenv()
+# Settings never printed by the DEBUG configuration dump
+_SECRET_FIELDS = frozenset({"SECRET_KEY", "INTROSPECT_CLIENTS", "JWT_KEYS_DIR"})
+
+# Database URLs, printed with their password masked
+_URL_FIELDS = frozenset({"DATABASE_URL", "USER_SHARDS"})
+
+_MASK = "********"
+
+def _mask_url(url: str) -> str:
+    # Only needed for the DEBUG dump, so SQLAlchemy is not imported otherwise
+    from sqlalchemy.engine import make_url
+    from sqlalchemy.exc import ArgumentError
+    try:
+        return make_url(url).render_as_string(hide_password=True)
+    except ArgumentError:
+        return _MASK
+
+def masked(field: str, value: Any) -> Any:
+    """
+    Return a setting's value as it may be printed or logged.
+
+    Args:
+        field: Setting name
+        value: Setting value
+
+    Returns:
+        The value, with secrets and database passwords replaced by a mask
+        (the client ids of INTROSPECT_CLIENTS are kept)
+    """
+    if value is None:
+        return value
+    if field == "INTROSPECT_CLIENTS":
+        return {client: _MASK for client in value}
+    if field in _SECRET_FIELDS or "SECRET" in field or "PASSWORD" in field:
+        return _MASK
+    if field in _URL_FIELDS:
+        return [_mask_url(url) for url in value] if isinstance(value, list) else _mask_url(value)
+    return value
 
 class Settings(BaseSettings):
     # JWT Settings
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # How often each worker deletes expired refresh tokens
+    REFRESH_TOKEN_PRUNE_SECONDS: int = 3600
+    # Asymmetric signing (RS256/ES256...): directory of <kid>.pem private keys
+    JWT_KEYS_DIR: Optional[str] = None
+    # Key id that signs new tokens; defaults to the last kid in sort order
+    JWT_ACTIVE_KID: Optional[str] = None
+    JWKS_MAX_AGE_SECONDS: int = 300
 
     # Database Settings
     DATABASE_URL: str = "sqlite+aiosqlite:///./auth.db"
 
+    # Database tuning settings
+    # "production" applies WAL and the SQLite PRAGMAs below on every connect
+    DB_PROFILE: str = "production"
+    # Run `alembic upgrade head` on startup when the schema is behind; turn
+    # off when several workers start at once and migrate separately instead
+    DB_MIGRATE_ON_STARTUP: bool = True
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    # Route reads through a separate read-only engine and pool
+    DB_SPLIT_READ_WRITE: bool = False
+    DB_READ_POOL_SIZE: int = 10
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    # User storage: "database" keeps users in DATABASE_URL, or in the
+    # USER_SHARDS databases when that list is set; "memory" is for tests
+    USER_STORE: str = "database"
+    # Shard map: one database URL per shard (JSON list in the environment);
+    # change it only together with rebalance_users.py
+    USER_SHARDS: List[str] = []
+    # Signups are written in group commits of up to SIGNUP_BATCH_MAX_SIZE rows;
+    # the first signup of a batch waits at most SIGNUP_BATCH_MAX_WAIT_MS
+    SIGNUP_BATCH_MAX_SIZE: int = 100
+    SIGNUP_BATCH_MAX_WAIT_MS: int = 2
+    # last_login_at and login_count are written behind, at least every
+    # LOGIN_RECORD_FLUSH_SECONDS (the most activity a crash can lose) or once
+    # LOGIN_RECORD_MAX_PENDING users are buffered
+    LOGIN_RECORD_FLUSH_SECONDS: float = 5
+    LOGIN_RECORD_MAX_PENDING: int = 1000
+
     # Optional server settings
     HOST: Optional[str] = "0.0.0.0"
     PORT: Optional[int] = 8000
     DEBUG: Optional[bool] = True
 
+    # Production server: `python main.py` with DEBUG off runs gunicorn with
+    # WEB_CONCURRENCY uvicorn workers (None uses one per available CPU)
+    WEB_CONCURRENCY: Optional[int] = None
+    SERVER_LOOP: str = "uvloop"
+    SERVER_HTTP: str = "httptools"
+    # Idle keep-alive connections are closed after this; keep it above the
+    # idle timeout of a load balancer in front of the server
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_BACKLOG: int = 2048
+    # Concurrent connections per worker beyond which requests get 503
+    SERVER_LIMIT_CONCURRENCY: Optional[int] = None
+    # Workers are replaced after this many requests, plus up to the jitter
+    # (0 disables recycling)
+    SERVER_MAX_REQUESTS: int = 10000
+    SERVER_MAX_REQUESTS_JITTER: int = 1000
+    # Silent workers are restarted, and stopping workers are killed, after this
+    SERVER_TIMEOUT_SECONDS: int = 30
+    # Start-up warm-up, run by every worker before it accepts requests:
+    # open the pools, run one password verify and one JWT sign/verify, read
+    # the users indexes into the page cache, and load the
+    # WARMUP_PRELOAD_USERS most recently active users into the shared user
+    # cache (0 disables). /readyz reports ready once it has finished
+    WARMUP_ENABLED: bool = True
+    WARMUP_READ_INDEXES: bool = True
+    WARMUP_PRELOAD_USERS: int = 0
+
+    # Password hashing settings
+    # Number of worker processes for hashing; None uses one per CPU core
+    HASHING_POOL_SIZE: Optional[int] = None
+    # The first scheme hashes new passwords; hashes in other schemes or at
+    # other costs are rewritten on the next successful login
+    PASSWORD_SCHEMES: List[str] = ["bcrypt"]
+    BCRYPT_ROUNDS: int = 12
+    # log2 of the scrypt N parameter
+    SCRYPT_ROUNDS: int = 16
+    PASSWORD_REHASH_ON_LOGIN: bool = True
+
+    # Admission control for password hashing in login and signup
+    # Concurrent hashing jobs; None uses the hashing pool size
+    HASHING_MAX_CONCURRENCY: Optional[int] = None
+    # Requests waiting for a hashing slot beyond this get 503 with Retry-After
+    HASHING_MAX_QUEUE: int = 64
+    # Requests that cannot start hashing within this time get 503
+    HASHING_MAX_WAIT_MS: int = 2000
+    # Login attempts per username and per client IP (rate 0 disables). The
+    # IP limit is off by default: behind a proxy every request shares the
+    # proxy's address unless the proxy is listed in TRUSTED_PROXIES
+    LOGIN_USERNAME_RATE_PER_MINUTE: float = 10
+    LOGIN_USERNAME_BURST: int = 5
+    LOGIN_IP_RATE_PER_MINUTE: float = 0
+    LOGIN_IP_BURST: int = 30
+    # Addresses or networks (JSON list, e.g. ["10.0.0.0/8"]) of the reverse
+    # proxies and gateways whose X-Forwarded-For header names the client
+    TRUSTED_PROXIES: List[str] = []
+    THROTTLE_MAX_KEYS: int = 100000
+
+    # Verified-token cache settings (size 0 disables the cache)
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 60
+    # "shared": one cache for every worker on the host, in a SQLite file on
+    # tmpfs (TOKEN_CACHE_PATH, default under /dev/shm); "local": per process.
+    # The shared cache falls back to per-process if the file cannot be used
+    TOKEN_CACHE_BACKEND: str = "shared"
+    TOKEN_CACHE_PATH: Optional[str] = None
+    # Maximum number of tokens accepted by one /api/introspect call
+    INTROSPECT_MAX_TOKENS: int = 100
+    # Client id -> secret of the callers allowed to use /api/introspect with
+    # HTTP Basic auth (JSON object in the environment); empty allows nobody
+    INTROSPECT_CLIENTS: Dict[str, str] = {}
+
+    # Instrumentation settings
+    # Expose Prometheus metrics on /metrics
+    METRICS_ENABLED: bool = False
+    # Add a Server-Timing header with per-stage durations to every response
+    SERVER_TIMING_ENABLED: bool = False
+    # Profiling middleware and admin /debug endpoints (not installed when off)
+    PROFILING_ENABLED: bool = False
+    # Fraction of requests profiled with cProfile, one at a time per worker
+    PROFILE_REQUEST_RATE: float = 0.0
+    # Requests slower than this are captured (0 disables), newest kept
+    PROFILE_SLOW_REQUEST_MS: int = 1000
+    PROFILE_SLOW_REQUEST_KEEP: int = 50
+    # Longest POST /debug/profile capture, and its stack sampling interval
+    PROFILE_MAX_SECONDS: int = 60
+    PROFILE_STACK_INTERVAL_MS: float = 5
+
+    # Token revocation settings
+    # How often each worker loads new revocations and prunes expired ones.
+    # The shared token cache makes a revocation visible to every worker at
+    # once; with the per-process cache, a token revoked on another worker is
+    # still accepted here for up to this long
+    REVOCATION_SYNC_SECONDS: int = 5
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+
+    # Username existence filter settings
+    # Reject unknown usernames at login without a user query. Login catches
+    # up with users created on other workers before rejecting one; the
+    # periodic sync keeps the signup pre-check within USERNAME_FILTER_SYNC_SECONDS
+    USERNAME_FILTER_ENABLED: bool = True
+    USERNAME_FILTER_SYNC_SECONDS: int = 5
+    USERNAME_FILTER_CAPACITY: int = 1000000
+
+    # Usernames allowed to use the admin endpoints (JSON list in the environment)
+    ADMIN_USERNAMES: List[str] = []
+
     # This allows extra environment variables to be read
     model_config = SettingsConfigDict(
         env_file=".env", 
@@ -29,15 +208,26 @@ class Settings(BaseSettings):
 
     @classmethod
     def validate_settings(cls):
-        # Explicit validation and logging
+        # Explicit validation and logging (secrets are masked)
         settings = cls()
-        print("Configuration Loaded:")
-        for field, value in settings.model_dump().items():
-            print(f"{field}: {value}")
+        if settings.DEBUG:
+            print("Configuration Loaded:")
+            for field, value in settings.model_dump().items():
+                print(f"{field}: {masked(field, value)}")
         return settings
 
+@lru_cache
 def get_settings():
+    """
+    Return the settings for this process.
+    
+    The .env file is read and validated on the first call only; every
+    later call returns the same Settings instance.
+    """
     try:
+        # Load .env file explicitly
+        from dotenv import load_dotenv
+        load_dotenv()
         return Settings.validate_settings()
     except Exception as e:
         print(f"Configuration Error: {e}")
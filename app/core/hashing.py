@@ -0,0 +1,139 @@
+"""
+Async password hashing service.
+Runs password hashing and verification in a bounded process pool so that
+the event loop keeps serving other requests while a password is checked.
+"""
+
+# Standard library imports
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+# Application imports
+from app.core.config import get_settings
+from app.core.metrics import timed
+from app.core.security import get_pwd_context, verify_password, verify_password_and_check, get_password_hash
+
+# Get application settings
+settings = get_settings()
+
+# Process pool shared by every request on this worker, created on first use
+_executor: Optional[ProcessPoolExecutor] = None
+
+def hashing_pool_size() -> int:
+    """
+    Return the number of hashing worker processes.
+
+    Returns:
+        int: HASHING_POOL_SIZE, or the number of CPU cores
+    """
+    return settings.HASHING_POOL_SIZE or os.cpu_count() or 1
+
+def get_hashing_pool() -> ProcessPoolExecutor:
+    """
+    Return the process pool used for password hashing, creating it if needed.
+
+    The pool size comes from HASHING_POOL_SIZE and defaults to the number of
+    CPU cores. Workers are spawned rather than forked so they never inherit
+    locks held by the event loop's helper threads.
+
+    Returns:
+        ProcessPoolExecutor: The shared hashing pool
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=hashing_pool_size(),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+def shutdown_hashing_pool() -> None:
+    """
+    Shut down the hashing pool and wait for running jobs to finish.
+    Safe to call when the pool was never started.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+def _worker_ready(verify: bool) -> int:
+    # Runs in a hashing worker. passlib is imported, and picks and self-tests
+    # its hash backends, on the first verify, so run one against a dummy hash
+    if verify:
+        get_pwd_context().dummy_verify()
+    return os.getpid()
+
+async def warm_hashing_pool(verify: bool = False) -> int:
+    """
+    Start every hashing worker process ahead of the first request.
+
+    Worker processes are otherwise spawned on demand, so the first logins
+    after a start would pay for interpreter start-up and imports. One job
+    per worker is submitted at once, which makes the pool spawn them all.
+
+    Args:
+        verify: Also run one password verification in each job, so the
+            first login does not pay for loading the hashing backends
+
+    Returns:
+        int: Number of worker processes running
+    """
+    pool = get_hashing_pool()
+    loop = asyncio.get_running_loop()
+    pids = await asyncio.gather(*(
+        loop.run_in_executor(pool, _worker_ready, verify) for _ in range(hashing_pool_size())
+    ))
+    return len(set(pids))
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a plain password against a hash without blocking the event loop.
+    
+    Args:
+        plain_password: The password in plain text
+        hashed_password: The hashed password to compare against
+    
+    Returns:
+        bool: True if passwords match, False otherwise
+    """
+    loop = asyncio.get_running_loop()
+    with timed("password_verify"):
+        return await loop.run_in_executor(
+            get_hashing_pool(), verify_password, plain_password, hashed_password
+        )
+
+async def verify_password_and_check_async(plain_password: str, hashed_password: str) -> Tuple[bool, bool]:
+    """
+    Verify a password and check its hash policy without blocking the event loop.
+    
+    Args:
+        plain_password: The password in plain text
+        hashed_password: The hashed password to compare against
+    
+    Returns:
+        Tuple[bool, bool]: Whether the password matches, and whether the
+        hash should be rehashed under the current policy
+    """
+    loop = asyncio.get_running_loop()
+    with timed("password_verify"):
+        return await loop.run_in_executor(
+            get_hashing_pool(), verify_password_and_check, plain_password, hashed_password
+        )
+
+async def hash_password_async(password: str) -> str:
+    """
+    Generate a password hash without blocking the event loop.
+    
+    Args:
+        password: Plain text password to hash
+    
+    Returns:
+        str: Hashed password
+    """
+    loop = asyncio.get_running_loop()
+    with timed("password_hash"):
+        return await loop.run_in_executor(get_hashing_pool(), get_password_hash, password)
@@ -0,0 +1,127 @@
+"""
+Local access token verification for downstream services.
+
+JWKSVerifier fetches this service's /.well-known/jwks.json, caches the keys
+and verifies tokens in-process, so validating a token needs no network call
+to the auth API. The JWKS is only re-fetched when the cache expires, or when
+a token names a key id that is not cached yet (rate limited), which is how
+key rotation is picked up.
+
+The module only depends on python-jose and the standard library so it can
+be copied into other services as-is. It checks signatures and expiry only:
+tokens revoked through /api/revoke stay valid here until they expire.
+
+Usage:
+    verifier = JWKSVerifier("https://auth.example.com/.well-known/jwks.json")
+    claims = verifier.verify(token)
+"""
+
+# Standard library imports
+import http.client
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, Iterable, Optional
+
+# Security related imports
+from jose import JWTError, jwk, jwt
+from jose.backends.base import Key
+
+class JWKSVerifier:
+    """
+    Verifies JWTs against a cached JSON Web Key Set.
+
+    Attributes:
+        jwks_url: URL of the JWKS document
+        algorithms: Accepted signing algorithms
+        cache_seconds: Fallback cache lifetime when the response has no max-age
+        min_refresh_seconds: Minimum interval between refetches for unknown kids
+    """
+
+    def __init__(
+        self,
+        jwks_url: str,
+        algorithms: Iterable[str] = ("RS256", "ES256"),
+        cache_seconds: float = 300,
+        min_refresh_seconds: float = 30,
+        timeout: float = 5
+    ):
+        self.jwks_url = jwks_url
+        self.algorithms = list(algorithms)
+        self.cache_seconds = cache_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.timeout = timeout
+        self._keys: Dict[str, Key] = {}
+        self._etag: Optional[str] = None
+        self._expires_at = 0.0
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fetch(self) -> None:
+        request = urllib.request.Request(self.jwks_url)
+        if self._etag:
+            request.add_header("If-None-Match", self._etag)
+        max_age = self.cache_seconds
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                document = json.loads(response.read())
+                self._etag = response.headers.get("ETag")
+                max_age = self._max_age(response.headers.get("Cache-Control"), max_age)
+                self._keys = {
+                    entry["kid"]: jwk.construct(entry, entry.get("alg"))
+                    for entry in document.get("keys", [])
+                    if entry.get("alg") in self.algorithms
+                }
+        except urllib.error.HTTPError as error:
+            if error.code != 304:
+                raise JWTError(f"Could not fetch the JWKS: HTTP {error.code}") from error
+            max_age = self._max_age(error.headers.get("Cache-Control"), max_age)
+        except (OSError, http.client.HTTPException, ValueError) as error:
+            # URLError, timeouts and dropped connections (all OSError), broken
+            # responses and malformed JSON: the token cannot be verified, which
+            # callers already handle, rather than a crash in the caller
+            raise JWTError(f"Could not fetch the JWKS: {error}") from error
+        now = time.monotonic()
+        self._fetched_at = now
+        self._expires_at = now + max_age
+
+    @staticmethod
+    def _max_age(cache_control: Optional[str], default: float) -> float:
+        for directive in (cache_control or "").split(","):
+            name, _, value = directive.strip().partition("=")
+            if name == "max-age" and value.isdigit():
+                return float(value)
+        return default
+
+    def _key_for(self, kid: Optional[str]) -> Key:
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._expires_at:
+                self._fetch()
+            elif kid not in self._keys and now - self._fetched_at >= self.min_refresh_seconds:
+                # Probably a freshly rotated key
+                self._fetch()
+            key = self._keys.get(kid)
+        if key is None:
+            raise JWTError("Unknown signing key")
+        return key
+
+    def verify(self, token: str, audience: Optional[str] = None) -> dict:
+        """
+        Verify a token's signature and expiry and return its claims.
+
+        Args:
+            token: Encoded JWT
+            audience: Expected "aud" claim, if the token carries one
+
+        Returns:
+            dict: The decoded claims
+
+        Raises:
+            JWTError: If the token is invalid, expired or signed by an unknown
+                key, or if the JWKS cannot be fetched
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        return jwt.decode(token, self._key_for(kid), algorithms=self.algorithms, audience=audience)
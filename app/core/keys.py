@@ -0,0 +1,82 @@
+"""
+Signing keys for asymmetric JWTs.
+
+When ALGORITHM is RS256/RS384/RS512 or ES256/ES384/ES512, access tokens are
+signed with a private key from JWT_KEYS_DIR instead of the shared SECRET_KEY.
+Every "<kid>.pem" file in that directory is a key; JWT_ACTIVE_KID selects
+the one that signs new tokens, and all of them stay valid for verification
+and are published in the JWKS so keys can be rotated without a flag day.
+"""
+
+# Standard library imports
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+# Security related imports
+from jose import jwk
+from jose.backends.base import Key
+
+# Application settings
+from app.core.config import get_settings
+
+# Get application settings
+settings = get_settings()
+
+ASYMMETRIC_ALGORITHMS = {"RS256", "RS384", "RS512", "ES256", "ES384", "ES512"}
+
+class KeyRing:
+    """
+    Private and public keys loaded once per process.
+
+    Attributes:
+        algorithm: JWT signing algorithm
+        active_kid: Key id used for signing new tokens
+        private_keys: kid -> private key
+        public_keys: kid -> public key used for verification
+        jwks_body: Serialized JWKS document
+        jwks_etag: Strong ETag of the JWKS document
+    """
+
+    def __init__(self, algorithm: str, keys_dir: str, active_kid: Optional[str]):
+        self.algorithm = algorithm
+        self.private_keys: Dict[str, Key] = {}
+        self.public_keys: Dict[str, Key] = {}
+        for path in sorted(Path(keys_dir).glob("*.pem")):
+            private_key = jwk.construct(path.read_text(), algorithm)
+            self.private_keys[path.stem] = private_key
+            self.public_keys[path.stem] = private_key.public_key()
+        if not self.private_keys:
+            raise ValueError(f"No *.pem signing keys found in {keys_dir}")
+        self.active_kid = active_kid or sorted(self.private_keys)[-1]
+        if self.active_kid not in self.private_keys:
+            raise ValueError(f"JWT_ACTIVE_KID {self.active_kid!r} has no key in {keys_dir}")
+
+        keys = []
+        for kid, public_key in sorted(self.public_keys.items()):
+            entry = public_key.to_dict()
+            entry.update({"kid": kid, "use": "sig", "alg": algorithm})
+            keys.append(entry)
+        self.jwks_body = json.dumps({"keys": keys}, separators=(",", ":")).encode()
+        self.jwks_etag = '"' + hashlib.sha256(self.jwks_body).hexdigest()[:32] + '"'
+
+    @property
+    def signing_key(self) -> Key:
+        return self.private_keys[self.active_kid]
+
+def load_key_ring() -> Optional[KeyRing]:
+    """
+    Load the key ring if an asymmetric algorithm is configured.
+
+    Returns:
+        Optional[KeyRing]: The key ring, or None when tokens use HS256
+    """
+    if settings.ALGORITHM not in ASYMMETRIC_ALGORITHMS:
+        return None
+    if not settings.JWT_KEYS_DIR:
+        raise ValueError(f"JWT_KEYS_DIR is required for {settings.ALGORITHM}")
+    return KeyRing(settings.ALGORITHM, settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID)
+
+# Keys for this process, None when signing with SECRET_KEY
+key_ring = load_key_ring()
@@ -0,0 +1,247 @@
+"""
+Request and hot-path instrumentation.
+
+Records per-endpoint request latency, per-stage latency (bcrypt, JWT, pool
+checkout and database queries) and the in-flight request count, and renders
+them in the Prometheus text format. When METRICS_ENABLED and
+SERVER_TIMING_ENABLED are both off, timed() returns a shared no-op context
+manager and the middleware is never installed.
+"""
+
+# Standard library imports
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+# Application settings
+from app.core.config import get_settings
+
+# Get application settings
+settings = get_settings()
+
+# Stage timing is recorded when either output is turned on
+ENABLED = bool(settings.METRICS_ENABLED or settings.SERVER_TIMING_ENABLED)
+
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets, in the Prometheus style.
+
+    Attributes:
+        counts: Observations per bucket, the last slot counts +Inf
+        total: Sum of all observed values
+        count: Number of observations
+    """
+
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+# Per-endpoint and per-stage histograms
+request_latency: Dict[str, Histogram] = {}
+stage_latency: Dict[str, Histogram] = {}
+
+# Number of HTTP requests currently being processed by this worker
+in_flight = 0
+
+# Stage durations of the current request, used for the Server-Timing header
+_request_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_stages", default=None)
+
+def observe_stage(stage: str, seconds: float) -> None:
+    """
+    Record the duration of one stage of the current request.
+
+    Args:
+        stage: Stage name, e.g. "password_verify" or "db_user_lookup"
+        seconds: Elapsed time in seconds
+    """
+    histogram = stage_latency.get(stage)
+    if histogram is None:
+        histogram = stage_latency[stage] = Histogram()
+    histogram.observe(seconds)
+    stages = _request_stages.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+class _StageTimer:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe_stage(self.stage, time.perf_counter() - self.started)
+        return False
+
+_NOOP = nullcontext()
+
+def timed(stage: str):
+    """
+    Context manager that times a block as the given stage.
+
+    Args:
+        stage: Stage name recorded in the stage histogram and Server-Timing
+
+    Returns:
+        A timing context manager, or a shared no-op when metrics are off
+    """
+    return _StageTimer(stage) if ENABLED else _NOOP
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that times every HTTP request.
+
+    Latency is labelled by the matched route template so that arbitrary
+    paths cannot blow up the number of series. With SERVER_TIMING_ENABLED
+    the collected stage durations are returned in a Server-Timing header.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+        self.server_timing = bool(settings.SERVER_TIMING_ENABLED)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        global in_flight
+        stages: Dict[str, float] = {}
+        token = _request_stages.set(stages)
+        started = time.perf_counter()
+        in_flight += 1
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                total = (time.perf_counter() - started) * 1000
+                parts = [f"{name};dur={value * 1000:.2f}" for name, value in stages.items()]
+                parts.append(f"total;dur={total:.2f}")
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", ", ".join(parts).encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight -= 1
+            # The matched route is only known once routing has run
+            route = scope.get("route")
+            endpoint = route.path if route is not None else "unmatched"
+            histogram = request_latency.get(endpoint)
+            if histogram is None:
+                histogram = request_latency[endpoint] = Histogram()
+            histogram.observe(time.perf_counter() - started)
+            _request_stages.reset(token)
+
+def _render_histogram(lines: List[str], name: str, label: str, series: Dict[str, Histogram]) -> None:
+    for key, histogram in sorted(series.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{label}="{key}",le="+Inf"}} {histogram.count}')
+        lines.append(f'{name}_sum{{{label}="{key}"}} {histogram.total}')
+        lines.append(f'{name}_count{{{label}="{key}"}} {histogram.count}')
+
+def render_prometheus() -> str:
+    """
+    Render every metric in the Prometheus text exposition format.
+
+    Returns:
+        str: Metrics text ending with a newline
+    """
+    from app.core.admission import hashing_admission, ip_throttle, username_throttle
+    from app.core.cache import token_cache
+    from app.core.username_filter import username_filter
+    from app.db.login_recorder import login_recorder
+    from app.db.signup_batcher import signup_batcher
+    from app.db.users import user_lookups
+
+    lines = [
+        "# HELP auth_request_duration_seconds HTTP request latency by route.",
+        "# TYPE auth_request_duration_seconds histogram",
+    ]
+    _render_histogram(lines, "auth_request_duration_seconds", "endpoint", request_latency)
+    lines += [
+        "# HELP auth_stage_duration_seconds Latency of hot-path stages (bcrypt, JWT, pool checkout, queries).",
+        "# TYPE auth_stage_duration_seconds histogram",
+    ]
+    _render_histogram(lines, "auth_stage_duration_seconds", "stage", stage_latency)
+    lines += [
+        "# HELP auth_requests_in_flight Requests currently being processed.",
+        "# TYPE auth_requests_in_flight gauge",
+        f"auth_requests_in_flight {in_flight}",
+        "# HELP auth_hashing_active Password hashing jobs running.",
+        "# TYPE auth_hashing_active gauge",
+        f"auth_hashing_active {hashing_admission.active}",
+        "# HELP auth_hashing_waiting Password hashing jobs waiting for a slot.",
+        "# TYPE auth_hashing_waiting gauge",
+        f"auth_hashing_waiting {hashing_admission.waiting}",
+        "# HELP auth_hashing_admitted_total Password hashing jobs admitted.",
+        "# TYPE auth_hashing_admitted_total counter",
+        f"auth_hashing_admitted_total {hashing_admission.admitted}",
+        "# HELP auth_hashing_rejected_total Requests shed with 503 by hashing admission control.",
+        "# TYPE auth_hashing_rejected_total counter",
+        f"auth_hashing_rejected_total {hashing_admission.rejected}",
+        "# HELP auth_throttled_total Requests rejected with 429 by the login throttles.",
+        "# TYPE auth_throttled_total counter",
+        f'auth_throttled_total{{key="ip"}} {ip_throttle.throttled}',
+        f'auth_throttled_total{{key="username"}} {username_throttle.throttled}',
+        "# HELP auth_token_cache_hits_total Bearer tokens answered from the token cache.",
+        "# TYPE auth_token_cache_hits_total counter",
+        f"auth_token_cache_hits_total {token_cache.hits}",
+        "# HELP auth_token_cache_misses_total Bearer tokens that missed the token cache.",
+        "# TYPE auth_token_cache_misses_total counter",
+        f"auth_token_cache_misses_total {token_cache.misses}",
+        "# HELP auth_user_cache_hits_total Users answered from the shared cache.",
+        "# TYPE auth_user_cache_hits_total counter",
+        f"auth_user_cache_hits_total {getattr(token_cache, 'user_hits', 0)}",
+        "# HELP auth_user_cache_misses_total Users that missed the shared cache.",
+        "# TYPE auth_user_cache_misses_total counter",
+        f"auth_user_cache_misses_total {getattr(token_cache, 'user_misses', 0)}",
+        "# HELP auth_username_filter_short_circuits_total Lookups of unknown usernames answered without a query.",
+        "# TYPE auth_username_filter_short_circuits_total counter",
+        f"auth_username_filter_short_circuits_total {username_filter.short_circuits}",
+        "# HELP auth_signup_batches_total Group commits of signups.",
+        "# TYPE auth_signup_batches_total counter",
+        f"auth_signup_batches_total {signup_batcher.batches}",
+        "# HELP auth_signup_batch_rows_total Signups written through group commits.",
+        "# TYPE auth_signup_batch_rows_total counter",
+        f"auth_signup_batch_rows_total {signup_batcher.rows}",
+        "# HELP auth_login_activity_recorded_total Logins buffered for last_login_at and login_count.",
+        "# TYPE auth_login_activity_recorded_total counter",
+        f"auth_login_activity_recorded_total {login_recorder.recorded}",
+        "# HELP auth_login_activity_flushes_total Batched login activity writes.",
+        "# TYPE auth_login_activity_flushes_total counter",
+        f"auth_login_activity_flushes_total {login_recorder.flushes}",
+        "# HELP auth_login_activity_flush_failures_total Login activity writes that failed and were retried.",
+        "# TYPE auth_login_activity_flush_failures_total counter",
+        f"auth_login_activity_flush_failures_total {login_recorder.failures}",
+        "# HELP auth_login_activity_pending Users with login activity not yet written.",
+        "# TYPE auth_login_activity_pending gauge",
+        f"auth_login_activity_pending {login_recorder.pending}",
+        "# HELP auth_user_lookups_total User lookups by username from bearer tokens.",
+        "# TYPE auth_user_lookups_total counter",
+        f"auth_user_lookups_total {user_lookups.calls}",
+        "# HELP auth_user_lookups_coalesced_total User lookups that shared an in-flight query (coalescing ratio = coalesced / total).",
+        "# TYPE auth_user_lookups_coalesced_total counter",
+        f"auth_user_lookups_coalesced_total {user_lookups.coalesced}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,288 @@
+"""
+Opt-in profiling of a running worker.
+
+Three tools, all off unless PROFILING_ENABLED is set (the middleware and the
+/debug routes are then not installed at all, so the request path is
+unchanged):
+
+- ProfilingMiddleware profiles a PROFILE_REQUEST_RATE fraction of requests
+  with cProfile and adds them to one cumulative profile
+- The same middleware captures requests slower than PROFILE_SLOW_REQUEST_MS,
+  with the await chain the request was suspended in when it crossed the
+  threshold (e.g. waiting on the hashing pool or a pool checkout)
+- profile_event_loop() and sample_stacks() profile the whole worker for a
+  few seconds, deterministically on the event loop thread or by sampling
+  the stacks of every thread (collapsed-stack output for flamegraphs)
+
+Password hashing runs in the hashing pool's processes, so it shows up as
+time waiting on the pool rather than as bcrypt frames.
+"""
+
+# Standard library imports
+import asyncio
+import cProfile
+import io
+import logging
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, List, Optional
+
+# Application imports
+from app.core.config import get_settings
+
+# Get application settings
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running."""
+
+# cProfile hooks the interpreter, so only one profiler may run at a time
+_profiler_lock = threading.Lock()
+
+# Set while a capture waits for a sampled request to finish, so no new
+# requests are sampled in the meantime
+_capture_waiting = False
+
+# Longest time a capture waits for a sampled request to finish
+CAPTURE_WAIT_SECONDS = 1.0
+
+# Cumulative profile of the sampled requests and how many went into it
+sampled_profile: Optional[pstats.Stats] = None
+sampled_requests = 0
+
+# Most recent slow requests, newest last
+slow_requests: Deque[dict] = deque(maxlen=settings.PROFILE_SLOW_REQUEST_KEEP)
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+def await_chain(task: asyncio.Task) -> List[str]:
+    """
+    Return the chain of coroutines a task is suspended in, outermost first.
+
+    Task.get_stack() only reports the outermost frame of a suspended
+    coroutine, so the chain is followed through cr_await instead.
+
+    Args:
+        task: Task to inspect
+
+    Returns:
+        List[str]: One "function (file:line)" entry per awaiting coroutine
+    """
+    chain = []
+    awaitable = task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+        if frame is None:
+            # A future or other awaitable object: the end of the chain
+            chain.append(type(awaitable).__name__)
+            break
+        chain.append(f"{frame.f_code.co_name} ({os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno})")
+        awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+    return chain
+
+def render_stats(stats: pstats.Stats, output: str, sort: str = "cumulative", limit: int = 60) -> bytes:
+    """
+    Render a profile as a text report or in the binary pstats format.
+
+    Args:
+        stats: Profile to render
+        output: "pstats" for the text report, "prof" for the binary format
+            read by pstats.Stats, snakeviz and other viewers
+        sort: Sort key of the text report
+        limit: Number of functions in the text report
+
+    Returns:
+        bytes: The rendered profile
+    """
+    if output == "prof":
+        return marshal.dumps(stats.stats)
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue().encode()
+
+async def profile_event_loop(seconds: float) -> pstats.Stats:
+    """
+    Profile everything the event loop thread runs for a while.
+
+    Args:
+        seconds: Length of the capture
+
+    Returns:
+        pstats.Stats: The profile
+
+    Raises:
+        ProfilerBusy: If another cProfile capture is running
+    """
+    global _capture_waiting
+    _capture_waiting = True
+    try:
+        # Sampled requests are short; captures take priority over them
+        deadline = time.perf_counter() + CAPTURE_WAIT_SECONDS
+        while not _profiler_lock.acquire(blocking=False):
+            if time.perf_counter() >= deadline:
+                raise ProfilerBusy()
+            await asyncio.sleep(0.01)
+    finally:
+        _capture_waiting = False
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+    finally:
+        _profiler_lock.release()
+    return pstats.Stats(profiler)
+
+# Only one stack sampler at a time, so captures cannot pile up threads
+_sampler_lock = threading.Lock()
+
+def _sample_stacks(seconds: float, interval: float) -> Counter:
+    own = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    stacks: Counter = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(names.get(ident, f"thread-{ident}"))
+            stacks[";".join(reversed(labels))] += 1
+        time.sleep(interval)
+    return stacks
+
+async def sample_stacks(seconds: float) -> bytes:
+    """
+    Sample the stacks of every thread of the worker for a while.
+
+    Sampling runs in its own thread every PROFILE_STACK_INTERVAL_MS, so it
+    also sees the database driver threads and a blocked event loop.
+
+    Args:
+        seconds: Length of the capture
+
+    Returns:
+        bytes: Collapsed stacks ("root;...;leaf count" per line), the input
+        of flamegraph.pl, speedscope and similar tools
+
+    Raises:
+        ProfilerBusy: If another stack capture is running
+    """
+    if not _sampler_lock.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        stacks = await asyncio.to_thread(_sample_stacks, seconds, settings.PROFILE_STACK_INTERVAL_MS / 1000)
+    finally:
+        _sampler_lock.release()
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common()).encode()
+
+def reset_sampled_profile() -> None:
+    """Discard the cumulative profile of sampled requests."""
+    global sampled_profile, sampled_requests
+    sampled_profile = None
+    sampled_requests = 0
+
+def _add_sampled(profiler: cProfile.Profile) -> pstats.Stats:
+    global sampled_profile, sampled_requests
+    stats = pstats.Stats(profiler)
+    if sampled_profile is None:
+        sampled_profile = pstats.Stats(profiler)
+    else:
+        sampled_profile.add(profiler)
+    sampled_requests += 1
+    return stats
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware that profiles sampled requests with cProfile and
+    captures slow requests.
+
+    A sampled request is profiled from start to end on the event loop
+    thread, so on a busy worker its profile also contains the work of
+    requests interleaved with it. Requests are not sampled while another
+    profile is running, and /debug requests are never sampled or captured.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+        self.rate = settings.PROFILE_REQUEST_RATE
+        self.slow_after = settings.PROFILE_SLOW_REQUEST_MS / 1000
+
+    async def __call__(self, scope, receive, send):
+        # Captures are long by design and must not wait on their own sample
+        if scope["type"] != "http" or scope["path"].startswith("/debug/"):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = None
+        if (
+            self.rate and random.random() < self.rate
+            and not _capture_waiting and _profiler_lock.acquire(blocking=False)
+        ):
+            profiler = cProfile.Profile()
+
+        status_code = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        # Where the request was waiting when it crossed the slow threshold
+        waiting_in: List[List[str]] = []
+        timer = None
+        if self.slow_after:
+            task = asyncio.current_task()
+            timer = asyncio.get_running_loop().call_later(
+                self.slow_after, lambda: waiting_in.append(await_chain(task))
+            )
+
+        started = time.perf_counter()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            stats = None
+            if profiler is not None:
+                profiler.disable()
+                _profiler_lock.release()
+                stats = _add_sampled(profiler)
+            if timer is not None:
+                timer.cancel()
+                if duration >= self.slow_after:
+                    self._capture_slow(scope, status_code, duration, waiting_in, stats)
+
+    @staticmethod
+    def _capture_slow(scope, status_code: int, duration: float, waiting_in: List[List[str]], stats: Optional[pstats.Stats]) -> None:
+        route = scope.get("route")
+        entry = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route.path if route is not None else None,
+            "status": status_code,
+            "duration_ms": round(duration * 1000, 1),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            # Empty when the event loop was blocked past the threshold
+            "waiting_in": waiting_in[0] if waiting_in else [],
+            "profile": render_stats(stats, "pstats", limit=20).decode() if stats is not None else None,
+        }
+        slow_requests.append(entry)
+        logger.warning("Slow request %s %s: %.1f ms", entry["method"], entry["path"], entry["duration_ms"])
@@ -0,0 +1,144 @@
+"""
+Access token revocation.
+
+Revoked token ids (the JWT "jti" claim) are persisted in the revoked_tokens
+table and mirrored in memory by every worker as a Bloom filter in front of an
+exact set. A token that was never revoked, which is almost every token, is
+answered by the Bloom filter alone: one in-memory probe and no I/O.
+
+Other workers load a revocation on their next sync, within
+REVOCATION_SYNC_SECONDS. Until then the shared token cache closes the gap:
+revoked tokens are also recorded there, and a worker checks that record
+before accepting a token it has just decoded (app.api.deps.is_revoked_fresh).
+"""
+
+# Standard library imports
+import asyncio
+import logging
+import time
+from typing import Dict
+
+# Database imports
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+
+# Application imports
+from app.core.bloom import BloomFilter
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal, ReadSessionLocal
+from app.models.revoked_token import RevokedToken
+
+# Get application settings
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class RevocationList:
+    """
+    In-memory view of the token denylist.
+
+    Attributes:
+        bloom: Bloom filter over revoked jtis, the fast negative path
+        revoked: Exact jti -> expiry mapping used to confirm Bloom hits
+        last_id: Highest revoked_tokens.id loaded, the incremental sync cursor
+    """
+
+    def __init__(self, capacity: int):
+        self.bloom = BloomFilter(capacity)
+        self.revoked: Dict[str, int] = {}
+        self.last_id = 0
+
+    def is_revoked(self, jti: str) -> bool:
+        """
+        Check whether a token id has been revoked.
+        
+        Args:
+            jti: The token's "jti" claim
+        
+        Returns:
+            bool: True if the token is revoked and not yet expired
+        """
+        if jti not in self.bloom:
+            return False
+        return jti in self.revoked
+
+    def _remember(self, jti: str, expires_at: int) -> None:
+        self.revoked[jti] = expires_at
+        if len(self.revoked) > self.bloom.capacity:
+            # Grow before the false-positive rate degrades
+            self._rebuild(self.bloom.capacity * 2)
+        else:
+            self.bloom.add(jti)
+
+    def _rebuild(self, capacity: int) -> None:
+        bloom = BloomFilter(capacity)
+        for jti in self.revoked:
+            bloom.add(jti)
+        self.bloom = bloom
+
+    async def revoke(self, jti: str, expires_at: int) -> None:
+        """
+        Persist a revocation and apply it to this worker immediately.
+        Other workers pick it up on their next sync (or, through the shared
+        token cache, right away).
+        
+        Args:
+            jti: The token's "jti" claim
+            expires_at: The token's "exp" claim as a Unix timestamp
+        """
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                insert(RevokedToken)
+                .values(jti=jti, expires_at=expires_at)
+                .on_conflict_do_nothing(index_elements=["jti"])
+            )
+            await session.commit()
+        self._remember(jti, expires_at)
+
+    async def sync(self) -> None:
+        """
+        Load revocations added since the last sync, in id order.
+        The first call loads the whole (unexpired) denylist.
+        """
+        now = int(time.time())
+        async with ReadSessionLocal() as session:
+            result = await session.stream(
+                select(RevokedToken.id, RevokedToken.jti, RevokedToken.expires_at)
+                .where(RevokedToken.id > self.last_id)
+                .order_by(RevokedToken.id)
+            )
+            async for row_id, jti, expires_at in result:
+                self.last_id = row_id
+                if expires_at > now:
+                    self._remember(jti, expires_at)
+
+    async def prune(self) -> None:
+        """
+        Forget revocations whose tokens have expired, in memory and on disk.
+        Expired tokens fail verification anyway, so they need no entry.
+        """
+        now = int(time.time())
+        expired = [jti for jti, expires_at in self.revoked.items() if expires_at <= now]
+        if expired:
+            for jti in expired:
+                del self.revoked[jti]
+            self._rebuild(self.bloom.capacity)
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+            await session.commit()
+
+    async def run_sync_loop(self) -> None:
+        """
+        Periodically sync new revocations and prune expired ones.
+        Runs until cancelled at shutdown.
+        """
+        while True:
+            await asyncio.sleep(settings.REVOCATION_SYNC_SECONDS)
+            try:
+                await self.sync()
+                await self.prune()
+            except Exception:
+                # Keep serving with the current view and retry next round
+                logger.exception("Revocation list sync failed")
+
+# Shared revocation list for this worker process
+revocation_list = RevocationList(settings.REVOCATION_BLOOM_CAPACITY)
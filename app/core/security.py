@@ -1,20 +1,70 @@
 # Standard library imports for datetime handling
+import uuid
 from datetime import datetime, timezone, timedelta
-from typing import Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 # Security related imports
-from passlib.context import CryptContext  # For password hashing
 from jose import JWTError, jwt            # For JWT handling
 
+if TYPE_CHECKING:
+    from passlib.context import CryptContext  # For password hashing
+
 # Application settings
 from app.core.config import get_settings
+from app.core.keys import key_ring
+from app.core.metrics import timed
 
-# Initialize settings and password context
+# Initialize settings
 settings = get_settings()
-pwd_context = CryptContext(
-    schemes=["bcrypt"],  # Use bcrypt for password hashing
-    deprecated="auto"    # Automatically handle deprecated hash methods
-)
+
+def build_password_context(schemes: List[str], bcrypt_rounds: int, scrypt_rounds: int) -> "CryptContext":
+    """
+    Build the password hashing policy.
+    
+    The first scheme hashes new passwords. Every other scheme, and bcrypt
+    hashes at a different cost, still verifies but is reported by
+    needs_update() so it can be rehashed on the next login.
+    
+    Args:
+        schemes: Scheme names in order of preference, e.g. ["scrypt", "bcrypt"]
+        bcrypt_rounds: bcrypt cost factor (log2 of the iteration count)
+        scrypt_rounds: scrypt cost (log2 of the N parameter)
+    
+    Returns:
+        CryptContext: The configured password context
+    """
+    # passlib is imported on first use: passwords are normally hashed in the
+    # hashing pool workers, so the web process never pays for it
+    from passlib.context import CryptContext
+
+    # Keep bcrypt so hashes created before a scheme change keep verifying
+    schemes = list(dict.fromkeys(list(schemes) + ["bcrypt"]))
+    return CryptContext(
+        schemes=schemes,
+        default=schemes[0],
+        deprecated="auto",  # Every scheme except the default needs an update
+        bcrypt__default_rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        scrypt__default_rounds=scrypt_rounds,
+        scrypt__min_rounds=scrypt_rounds,
+        scrypt__max_rounds=scrypt_rounds,
+    )
+
+@lru_cache
+def get_pwd_context() -> "CryptContext":
+    """
+    Return the password context for this process, building it on first use.
+    
+    Returns:
+        CryptContext: The configured password context
+    """
+    return build_password_context(
+        settings.PASSWORD_SCHEMES,
+        settings.BCRYPT_ROUNDS,
+        settings.SCRYPT_ROUNDS
+    )
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
@@ -27,11 +77,28 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Returns:
         bool: True if passwords match, False otherwise
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+def verify_password_and_check(plain_password: str, hashed_password: str) -> Tuple[bool, bool]:
+    """
+    Verify a password and report whether its hash should be upgraded.
+    
+    Args:
+        plain_password: The password in plain text
+        hashed_password: The hashed password to compare against
+    
+    Returns:
+        Tuple[bool, bool]: Whether the password matches, and whether the
+        hash uses an outdated scheme or cost
+    """
+    context = get_pwd_context()
+    if not context.verify(plain_password, hashed_password):
+        return False, False
+    return True, context.needs_update(hashed_password)
 
 def get_password_hash(password: str) -> str:
     """
-    Generate a password hash using bcrypt.
+    Generate a password hash using the default scheme of the hashing policy.
     
     Args:
         password: Plain text password to hash
@@ -39,7 +106,7 @@ def get_password_hash(password: str) -> str:
     Returns:
         str: Hashed password
     """
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -53,8 +120,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         str: Encoded JWT token
     
     Note:
-        The token includes an expiration time and is signed with
-        the secret key using the HS256 algorithm.
+        The token includes an expiration time and a unique "jti" claim
+        used for revocation. It is signed with the secret key (HS256) or,
+        for asymmetric algorithms, with the active key from the key ring
+        and a "kid" header naming that key.
     """
     # Create a copy of the data to avoid modifying the original
     to_encode = data.copy()
@@ -65,14 +134,50 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     
-    # Add expiration claim to payload
+    # Add expiration and token id claims to payload
     to_encode.update({"exp": expire})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     
     # Create and sign the JWT token
-    encoded_jwt = jwt.encode(
-        to_encode,
-        settings.SECRET_KEY,
-        algorithm=settings.ALGORITHM
-    )
+    with timed("jwt_encode"):
+        if key_ring is None:
+            encoded_jwt = jwt.encode(
+                to_encode,
+                settings.SECRET_KEY,
+                algorithm=settings.ALGORITHM
+            )
+        else:
+            encoded_jwt = jwt.encode(
+                to_encode,
+                key_ring.signing_key,
+                algorithm=settings.ALGORITHM,
+                headers={"kid": key_ring.active_kid}
+            )
     
-    return encoded_jwt 
\ No newline at end of file
+    return encoded_jwt
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify a JWT access token and return its payload.
+    
+    Args:
+        token: Encoded JWT token
+    
+    Returns:
+        dict: The decoded claims
+    
+    Raises:
+        JWTError: If the signature is invalid, the key id is unknown or
+        the token has expired
+    """
+    with timed("jwt_decode"):
+        if key_ring is None:
+            return jwt.decode(
+                token,
+                settings.SECRET_KEY,
+                algorithms=[settings.ALGORITHM]
+            )
+        key = key_ring.public_keys.get(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            raise JWTError("Unknown signing key")
+        return jwt.decode(token, key, algorithms=[settings.ALGORITHM])
@@ -0,0 +1,126 @@
+"""
+Production server launcher.
+
+`python main.py` with DEBUG off replaces itself with a gunicorn master
+that runs one uvicorn worker per available CPU (WEB_CONCURRENCY) on uvloop
+and httptools. Workers are recycled after SERVER_MAX_REQUESTS requests
+(with jitter, so they do not all restart at once), and each worker runs
+the application lifespan, which warms its database and hashing pools,
+before it accepts connections.
+
+Every worker has its own password hashing pool, so unless
+HASHING_POOL_SIZE is set the launcher splits the CPUs between them:
+workers * HASHING_POOL_SIZE stays close to the number of cores instead of
+growing with its square.
+"""
+
+# Standard library imports
+import asyncio
+import os
+import sys
+from typing import List
+
+# Server imports
+from uvicorn.workers import UvicornWorker
+
+# Application imports
+from app.core.config import get_settings
+
+# Get application settings
+settings = get_settings()
+
+def available_cpus() -> int:
+    """
+    Return the number of CPUs this process may run on.
+
+    Uses the scheduler affinity where available, so a container pinned to
+    a subset of the host's cores is not oversubscribed.
+
+    Returns:
+        int: Number of usable CPUs (at least 1)
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def worker_count() -> int:
+    """
+    Return the number of server worker processes to run.
+
+    Returns:
+        int: WEB_CONCURRENCY, or one worker per available CPU
+    """
+    return settings.WEB_CONCURRENCY or available_cpus()
+
+class ServerWorker(UvicornWorker):
+    """
+    Uvicorn worker for gunicorn with the event loop, HTTP parser and
+    connection limit taken from the settings.
+    """
+    CONFIG_KWARGS = {
+        "loop": settings.SERVER_LOOP,
+        "http": settings.SERVER_HTTP,
+        "limit_concurrency": settings.SERVER_LIMIT_CONCURRENCY,
+        "lifespan": "on",
+    }
+
+def gunicorn_args(app: str) -> List[str]:
+    """
+    Build the gunicorn command line for the application.
+
+    Args:
+        app: Application import path, e.g. "main:app"
+
+    Returns:
+        List[str]: Arguments after `python -m gunicorn`
+    """
+    return [
+        app,
+        "--worker-class", f"{ServerWorker.__module__}.{ServerWorker.__name__}",
+        "--workers", str(worker_count()),
+        "--bind", f"{settings.HOST}:{settings.PORT}",
+        "--backlog", str(settings.SERVER_BACKLOG),
+        "--keep-alive", str(settings.SERVER_KEEPALIVE_SECONDS),
+        "--max-requests", str(settings.SERVER_MAX_REQUESTS),
+        "--max-requests-jitter", str(settings.SERVER_MAX_REQUESTS_JITTER),
+        "--timeout", str(settings.SERVER_TIMEOUT_SECONDS),
+        "--graceful-timeout", str(settings.SERVER_TIMEOUT_SECONDS),
+    ]
+
+def migrate() -> None:
+    """
+    Bring the databases to the newest schema revision once, before any
+    worker starts, so that workers booting together do not all try to run
+    the same migration. Does nothing when the schema is current.
+    """
+    from app.db.migrations import ensure_schema
+    from app.db.session import engine
+    from app.db.user_store import user_store
+
+    async def upgrade() -> None:
+        await ensure_schema(engine)
+        await user_store.ensure_schema()
+        await user_store.dispose()
+        await engine.dispose()
+    asyncio.run(upgrade())
+
+def run(app: str) -> None:
+    """
+    Migrate the databases, then replace the current process with the
+    production server.
+
+    The exec leaves nothing of this process behind, so the gunicorn master
+    does not hold the application's imports, engines or pools, and workers
+    read the settings (including the per-worker HASHING_POOL_SIZE chosen
+    here) when they import the application.
+
+    Args:
+        app: Application import path, e.g. "main:app"
+    """
+    migrate()
+    workers = worker_count()
+    if settings.HASHING_POOL_SIZE is None:
+        os.environ["HASHING_POOL_SIZE"] = str(max(1, available_cpus() // workers))
+    args = gunicorn_args(app)
+    print(f"Starting {workers} workers: gunicorn {' '.join(args)}", flush=True)
+    os.execv(sys.executable, [sys.executable, "-m", "gunicorn", *args])
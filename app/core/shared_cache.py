@@ -0,0 +1,443 @@
+"""
+Token and user cache shared by every worker on a host.
+
+Entries live in a SQLite database on tmpfs (/dev/shm where available), so
+a token verified or a user loaded by one worker is a hit on every other
+worker and survives worker restarts, and the hit rate does not fall as
+workers are added. Lookups are single indexed reads in WAL mode, which
+never wait for writers; writes give up after a few milliseconds rather
+than stall the event loop, since the cache is best-effort.
+
+Invalidation is versioned: invalidate_user() bumps a per-user version
+instead of hunting down entries, and an entry only counts while the
+version it was stored under is current. A user snapshot is stored under
+the version read before the database was queried, so a snapshot loaded
+while the user changed is never served. Versions are taken from the clock
+in nanoseconds rather than counted from 1, so they keep increasing after
+an idle user's version row is pruned and an old entry can never match a
+later version.
+
+Revoked tokens are recorded here too (revoke()), so a token revoked on
+one worker is rejected by every other worker straight away rather than
+after their next revocation sync, and is never cached again.
+
+The file lives in a directory only this OS user can open and is named
+after the signing and database settings, so processes with other keys or
+databases never share entries. Entries are JSON (no pickle) and user
+snapshots are stored without the password hash.
+"""
+
+# Standard library imports
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+# JSON encoding imports
+import orjson
+
+# Application imports
+from app.core.cache import CachedToken, TokenCache
+from app.core.config import get_settings
+from app.models.user import User
+
+# Get application settings
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Snapshot columns stored as ISO 8601 strings and parsed back on a hit
+_DATETIME_COLUMNS = frozenset(
+    column.key for column in User.__table__.columns if column.type.python_type is datetime
+)
+
+# Never written to the shared file
+_PRIVATE_COLUMNS = frozenset({"hashed_password"})
+
+# An entry's last-used time is refreshed at most this often, which keeps
+# the LRU order approximate but turns most hits into pure reads
+_TOUCH_SECONDS = 1.0
+
+# Expired and least recently used entries are pruned every this many writes
+_PRUNE_EVERY = 256
+
+# Usernames per versions query (SQLite allows at most 32766 bound parameters)
+_VERSIONS_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    key TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    claims TEXT NOT NULL,
+    user TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_tokens_last_used ON tokens (last_used);
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    user TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_users_last_used ON users (last_used);
+CREATE TABLE IF NOT EXISTS versions (
+    username TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS revoked (
+    jti TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+def default_cache_path() -> str:
+    """
+    Return the cache file for the current settings.
+
+    Returns:
+        str: Path under /dev/shm (or the temp directory) in a per-OS-user
+        directory, named after the signing keys and databases in use
+    """
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    directory = os.path.join(base, f"auth-cache-{os.getuid() if hasattr(os, 'getuid') else 'user'}")
+    fingerprint = hashlib.sha256("\0".join([
+        settings.SECRET_KEY, settings.ALGORITHM, str(settings.JWT_KEYS_DIR), str(settings.JWT_ACTIVE_KID),
+        settings.DATABASE_URL, *settings.USER_SHARDS, settings.USER_STORE,
+    ]).encode()).hexdigest()[:16]
+    return os.path.join(directory, f"{fingerprint}.db")
+
+def _dumps_user(snapshot: dict) -> str:
+    return orjson.dumps({k: v for k, v in snapshot.items() if k not in _PRIVATE_COLUMNS}).decode()
+
+def _loads_user(data: str) -> dict:
+    snapshot = orjson.loads(data)
+    for key in _DATETIME_COLUMNS.intersection(snapshot):
+        if snapshot[key] is not None:
+            snapshot[key] = datetime.fromisoformat(snapshot[key])
+    return snapshot
+
+class SharedTokenCache:
+    """
+    Token and user snapshot cache in a SQLite file shared between processes,
+    with the interface of TokenCache.
+
+    Attributes:
+        path: SQLite file holding the entries
+        maxsize: Maximum number of tokens (and of users) kept
+        ttl: Maximum lifetime of an entry in seconds
+        hits: Token lookups answered from the cache by this process
+        misses: Token lookups that fell through by this process
+        user_hits: User lookups answered from the cache by this process
+        user_misses: User lookups that fell through by this process
+        keeps_users: Whether user snapshots are cached on their own
+    """
+    keeps_users = True
+
+    def __init__(self, path: str, maxsize: int, ttl: float):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.user_hits = 0
+        self.user_misses = 0
+        self._writes = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection of the current process, opened on first use."""
+        if self._conn is None or self._pid != os.getpid():
+            # A connection inherited through fork must not be used
+            self._conn = self.open()
+            self._pid = os.getpid()
+        return self._conn
+
+    def open(self) -> sqlite3.Connection:
+        """
+        Open the cache file, creating its private directory and tables.
+
+        Returns:
+            sqlite3.Connection: Connection in autocommit mode
+
+        Raises:
+            OSError: If the directory is not private to this OS user
+            sqlite3.Error: If the database cannot be opened
+        """
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.stat(directory)
+        if hasattr(os, "getuid") and (info.st_uid != os.getuid() or info.st_mode & 0o077):
+            raise OSError(f"Cache directory {directory} is not private to this user")
+        conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA busy_timeout=5")
+        conn.execute("PRAGMA journal_mode=WAL")
+        # tmpfs does not survive a reboot, so fsync buys nothing
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return TokenCache.digest(token)
+
+    def get(self, token: str) -> Optional[CachedToken]:
+        """
+        Look up a previously verified token.
+
+        Args:
+            token: Encoded JWT from the Authorization header
+
+        Returns:
+            Optional[CachedToken]: Cached claims and user, or None on a
+            miss, expiry or invalidated user
+        """
+        if self.maxsize <= 0:
+            return None
+        key = self.digest(token)
+        now = time.time()
+        try:
+            row = self.conn.execute(
+                "SELECT t.claims, t.user, t.last_used FROM tokens t "
+                "LEFT JOIN versions v ON v.username = t.username "
+                "WHERE t.key = ? AND t.expires_at > ? AND t.version = COALESCE(v.version, 0)",
+                (key, now),
+            ).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        if now - row[2] > _TOUCH_SECONDS:
+            try:
+                self.conn.execute("UPDATE tokens SET last_used = ? WHERE key = ?", (now, key))
+            except sqlite3.Error:
+                pass
+        self.hits += 1
+        return CachedToken(orjson.loads(row[0]), _loads_user(row[1]))
+
+    def set(self, token: str, claims: dict, snapshot: dict, version: Optional[int] = None) -> None:
+        """
+        Cache the claims and user snapshot for a verified token.
+
+        Args:
+            token: Encoded JWT that was just verified
+            claims: Decoded payload, whose "exp" bounds the entry's lifetime
+            snapshot: Column values of the resolved user
+            version: User version read before the snapshot was loaded; the
+                entry is not stored if the user changed since. When omitted
+                the current version is used. Revoked tokens are never stored
+        """
+        if self.maxsize <= 0 or claims.get("exp") is None:
+            return
+        now = time.time()
+        expires_at = min(claims["exp"], now + self.ttl)
+        if expires_at <= now:
+            return
+        username = snapshot["username"]
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO tokens (key, username, version, expires_at, last_used, claims, user) "
+                "SELECT ?, ?, current, ?, ?, ?, ? "
+                "FROM (SELECT COALESCE((SELECT version FROM versions WHERE username = ?), 0) AS current) "
+                "WHERE (? IS NULL OR ? = current) AND NOT EXISTS (SELECT 1 FROM revoked WHERE jti = ?)",
+                (self.digest(token), username, expires_at, now, orjson.dumps(claims).decode(),
+                 _dumps_user(snapshot), username, version, version, claims.get("jti")),
+            )
+            self._wrote()
+        except sqlite3.Error:
+            pass
+
+    def get_user(self, username: str) -> Tuple[Optional[dict], int]:
+        """
+        Look up a user snapshot loaded by any worker.
+
+        Args:
+            username: Username to look up
+
+        Returns:
+            Tuple of the snapshot (None on a miss) and the user's current
+            version, to be passed to set_user() after loading the user
+        """
+        now = time.time()
+        try:
+            row = self.conn.execute(
+                "SELECT u.user, u.expires_at, u.version, COALESCE(v.version, 0), u.last_used "
+                "FROM (SELECT ? AS username) q "
+                "LEFT JOIN users u ON u.username = q.username "
+                "LEFT JOIN versions v ON v.username = q.username",
+                (username,),
+            ).fetchone()
+        except sqlite3.Error:
+            self.user_misses += 1
+            return None, 0
+        data, expires_at, stored_version, version, last_used = row
+        if data is None or expires_at <= now or stored_version != version:
+            self.user_misses += 1
+            return None, version
+        if now - last_used > _TOUCH_SECONDS:
+            try:
+                self.conn.execute("UPDATE users SET last_used = ? WHERE username = ?", (now, username))
+            except sqlite3.Error:
+                pass
+        self.user_hits += 1
+        return _loads_user(data), version
+
+    def set_user(self, snapshot: dict, version: int) -> None:
+        """
+        Cache a user snapshot unless the user changed since `version` was read.
+
+        Args:
+            snapshot: Column values of the user
+            version: Version returned by get_user() before the user was loaded
+        """
+        if self.maxsize <= 0:
+            return
+        now = time.time()
+        username = snapshot["username"]
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO users (username, version, expires_at, last_used, user) "
+                "SELECT ?, ?, ?, ?, ? WHERE ? = COALESCE((SELECT version FROM versions WHERE username = ?), 0)",
+                (username, version, now + self.ttl, now, _dumps_user(snapshot), version, username),
+            )
+            self._wrote()
+        except sqlite3.Error:
+            pass
+
+    def user_versions(self, usernames: List[str]) -> Dict[str, int]:
+        """
+        Read the current version of many users, e.g. before loading them
+        in bulk to be passed to set_user().
+
+        Args:
+            usernames: Usernames to look up
+
+        Returns:
+            Dict[str, int]: Username to current version (0 if never invalidated)
+        """
+        versions = dict.fromkeys(usernames, 0)
+        try:
+            for start in range(0, len(usernames), _VERSIONS_CHUNK):
+                chunk = usernames[start:start + _VERSIONS_CHUNK]
+                versions.update(self.conn.execute(
+                    f"SELECT username, version FROM versions WHERE username IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall())
+        except sqlite3.Error:
+            logger.warning("Could not read user versions from the shared cache", exc_info=True)
+        return versions
+
+    def invalidate_token(self, token: str) -> None:
+        """
+        Drop a single token from the cache of every worker.
+
+        Args:
+            token: Encoded JWT to forget
+        """
+        try:
+            self.conn.execute("DELETE FROM tokens WHERE key = ?", (self.digest(token),))
+        except sqlite3.Error:
+            logger.warning("Could not drop a token from the shared cache", exc_info=True)
+
+    def revoke(self, token: str, jti: str, expires_at: float) -> None:
+        """
+        Record a revoked token for every worker and drop its cached entry.
+        The record is written first, so a worker caching the token at the
+        same time either has its entry deleted or is refused by set().
+
+        Args:
+            token: Encoded JWT that was revoked
+            jti: Its "jti" claim
+            expires_at: Its "exp" claim; the record is pruned after that
+        """
+        try:
+            self.conn.execute("INSERT OR IGNORE INTO revoked (jti, expires_at) VALUES (?, ?)", (jti, expires_at))
+        except sqlite3.Error:
+            logger.warning("Could not record a revoked token in the shared cache", exc_info=True)
+        self.invalidate_token(token)
+
+    def is_revoked(self, jti: str) -> bool:
+        """
+        Check whether any worker has revoked a token, including revocations
+        this worker's revocation list has not synced yet.
+
+        Args:
+            jti: The token's "jti" claim
+
+        Returns:
+            bool: True if the token was revoked and has not expired
+        """
+        try:
+            row = self.conn.execute(
+                "SELECT 1 FROM revoked WHERE jti = ? AND expires_at > ?", (jti, time.time())
+            ).fetchone()
+        except sqlite3.Error:
+            return False
+        return row is not None
+
+    def invalidate_user(self, username: str) -> None:
+        """
+        Invalidate every cached token and snapshot of a user on every worker.
+        Call this whenever a user's row changes.
+
+        Args:
+            username: Username whose cached entries should stop counting
+        """
+        try:
+            self.conn.execute(
+                "INSERT INTO versions (username, version, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (username) DO UPDATE SET "
+                "version = MAX(version + 1, excluded.version), updated_at = excluded.updated_at",
+                (username, time.time_ns(), time.time()),
+            )
+        except sqlite3.Error:
+            logger.warning("Could not invalidate %s in the shared cache", username, exc_info=True)
+
+    def clear(self) -> None:
+        """Remove all entries and reset this process's counters."""
+        self.conn.execute("DELETE FROM tokens")
+        self.conn.execute("DELETE FROM users")
+        self.hits = self.misses = self.user_hits = self.user_misses = 0
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT count(*) FROM tokens").fetchone()[0]
+
+    def _wrote(self) -> None:
+        self._writes += 1
+        if self._writes % _PRUNE_EVERY == 0:
+            self.prune()
+
+    def prune(self) -> None:
+        """
+        Delete expired entries and revocation records, and the least
+        recently used entries beyond maxsize.
+        """
+        now = time.time()
+        try:
+            self.conn.execute("DELETE FROM tokens WHERE expires_at <= ?", (now,))
+            self.conn.execute("DELETE FROM users WHERE expires_at <= ?", (now,))
+            self.conn.execute("DELETE FROM revoked WHERE expires_at <= ?", (now,))
+            # Once every entry stored before the last invalidation has
+            # expired, the version row is no longer needed to reject it;
+            # entries stored under the pruned version stop matching, and the
+            # next invalidation picks a larger version from the clock
+            self.conn.execute("DELETE FROM versions WHERE updated_at < ?", (now - self.ttl,))
+            for table, key in (("tokens", "key"), ("users", "username")):
+                excess = self.conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0] - self.maxsize
+                if excess > 0:
+                    self.conn.execute(
+                        f"DELETE FROM {table} WHERE {key} IN "
+                        f"(SELECT {key} FROM {table} ORDER BY last_used LIMIT ?)",
+                        (excess,),
+                    )
+        except sqlite3.Error:
+            logger.warning("Pruning the shared cache failed", exc_info=True)
@@ -0,0 +1,59 @@
+"""
+Single-flight call coalescing.
+
+Concurrent calls for the same key share one in-flight execution and its
+result instead of each doing the same work, e.g. a burst of requests with
+the same bearer token runs one user query rather than one per request.
+Nothing is cached: once the shared call finishes the next caller starts a
+new one.
+"""
+
+# Standard library imports
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class SingleFlight:
+    """
+    Coalesces concurrent async calls by key.
+
+    Attributes:
+        calls: Number of calls made through do()
+        coalesced: Number of calls that joined an in-flight call
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """
+        Run fn(*args), or wait for the call already running for key.
+
+        The shared call runs as its own task, so a caller that is cancelled
+        does not cancel the call for the others.
+
+        Args:
+            key: Calls with equal keys are coalesced
+            fn: Coroutine function to run
+            *args: Arguments for fn
+
+        Returns:
+            The result of the shared call
+
+        Raises:
+            Exception: Whatever the shared call raised
+        """
+        self.calls += 1
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
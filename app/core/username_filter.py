@@ -0,0 +1,173 @@
+"""
+In-memory username existence filter.
+
+Every worker keeps a Bloom filter over all usernames, case-folded like
+the unique username_normalized column. It is built from a streaming scan
+at startup, updated on signup and extended every
+USERNAME_FILTER_SYNC_SECONDS with users created by other workers. When the
+filter says a username is definitely absent, login rejects it and signup
+skips the existence query, so requests for random usernames (credential
+stuffing) never reach the database.
+
+A user created on another worker is unknown here until the next sync, so
+login does not trust an "absent" answer from a filter synced before the
+request arrived: it first waits for an incremental sync started after that,
+shared by every request waiting at the time (might_exist_fresh). A burst of
+unknown usernames then costs one cheap "rows after the cursor" query per
+sync rather than one user lookup per request, and a user who has just
+signed up on another worker is never turned away.
+"""
+
+# Standard library imports
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+# Application imports
+from app.core.bloom import BloomFilter
+from app.core.config import get_settings
+from app.core.singleflight import SingleFlight
+from app.db.user_store import user_store
+from app.models.user import normalize_username
+
+# Get application settings
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class UsernameFilter:
+    """
+    Probabilistic set of existing usernames.
+
+    Attributes:
+        bloom: Bloom filter over usernames, None until the first sync finishes
+        count: Number of usernames loaded by syncs
+        cursor: Highest rowid loaded per shard, the incremental sync cursor
+        synced_at: Monotonic time at which the last completed sync started
+        short_circuits: Requests answered "absent" without a query
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.bloom: Optional[BloomFilter] = None
+        self.count = 0
+        self.cursor: Dict[int, int] = {}
+        self.synced_at = 0.0
+        self.short_circuits = 0
+        self._syncs = SingleFlight()
+
+    def _absent(self, username: str) -> bool:
+        return (
+            settings.USERNAME_FILTER_ENABLED
+            and self.bloom is not None
+            and normalize_username(username) not in self.bloom
+        )
+
+    def might_exist(self, username: str) -> bool:
+        """
+        Check whether a username may exist, as of the last sync.
+
+        Users created on other workers since then are reported absent, so
+        only use this where a false "absent" is harmless (signup, whose
+        insert still rejects a taken username).
+        
+        Args:
+            username: Username to check
+        
+        Returns:
+            bool: False only if the username did not exist at the last sync
+        """
+        if not self._absent(username):
+            return True
+        self.short_circuits += 1
+        return False
+
+    async def might_exist_fresh(self, username: str) -> bool:
+        """
+        Check whether a username may exist, including users created on any
+        worker before this call.
+
+        An "absent" answer is confirmed by a sync started after the call,
+        shared with concurrent callers. If that sync fails the username is
+        reported as possibly existing, so callers fall back to the database.
+        
+        Args:
+            username: Username to check
+        
+        Returns:
+            bool: False only if the username definitely does not exist
+        """
+        if not self._absent(username):
+            return True
+        try:
+            await self.catch_up(time.monotonic())
+        except Exception:
+            logger.exception("Username filter sync failed")
+            return True
+        return self.might_exist(username)
+
+    async def catch_up(self, since: float) -> None:
+        """
+        Wait until a sync that started at or after `since` has completed,
+        joining the running sync or starting one as needed.
+        
+        Args:
+            since: Monotonic time the sync must not start before
+        """
+        while self.synced_at < since:
+            await self.sync()
+
+    def add(self, username: str) -> None:
+        """
+        Record a newly created username.
+        
+        Args:
+            username: Username that was just inserted
+        """
+        # The next sync loads the row again and counts it
+        if self.bloom is not None:
+            self.bloom.add(normalize_username(username))
+
+    async def sync(self) -> None:
+        """
+        Load users created since the last sync, or wait for the sync that
+        is already running.
+
+        The first sync, and any sync after the filter has outgrown its
+        capacity, scans the whole table into a fresh filter and swaps it in,
+        so lookups keep answering "maybe" rather than "absent" meanwhile.
+        """
+        await self._syncs.do(None, self._load)
+
+    async def _load(self) -> None:
+        started = time.monotonic()
+        if self.bloom is None or self.count > self.bloom.capacity:
+            capacity = max(self.capacity, self.count * 2)
+            bloom, cursor = BloomFilter(capacity), {}
+        else:
+            bloom, cursor = self.bloom, dict(self.cursor)
+        count = 0 if bloom is not self.bloom else self.count
+
+        async for shard, rowid, username in user_store.stream_usernames(cursor):
+            bloom.add(normalize_username(username))
+            count += 1
+            cursor[shard] = rowid
+
+        self.bloom, self.count, self.cursor = bloom, count, cursor
+        self.synced_at = started
+
+    async def run_sync_loop(self) -> None:
+        """
+        Periodically pick up users created by other workers.
+        Runs until cancelled at shutdown.
+        """
+        while True:
+            await asyncio.sleep(settings.USERNAME_FILTER_SYNC_SECONDS)
+            try:
+                await self.sync()
+            except Exception:
+                # Keep serving with the current filter and retry next round
+                logger.exception("Username filter sync failed")
+
+# Shared username filter for this worker process
+username_filter = UsernameFilter(settings.USERNAME_FILTER_CAPACITY)
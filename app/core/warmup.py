@@ -0,0 +1,139 @@
+"""
+Start-up warm-up and readiness.
+
+After a start the first requests would otherwise pay for spawning the
+hashing processes, opening pooled connections, reading cold SQLite pages
+and the first-call costs of passlib and python-jose. warm_up() pays for
+them in the lifespan, before the worker accepts connections:
+
+- the hashing processes are started and each runs one password verify
+- every pooled database connection is opened and pinged
+- one JWT is signed and verified
+- the users indexes are read into the page cache (WARMUP_READ_INDEXES)
+- the WARMUP_PRELOAD_USERS most recently active users are loaded into the
+  shared user cache
+
+Steps are best-effort: a failing step is logged and the worker starts
+anyway, only colder. `readiness` tells /readyz whether the worker should
+get traffic; it turns ready once start-up (warm-up included) has finished
+and back to not ready when shutdown begins.
+"""
+
+# Standard library imports
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Awaitable, Dict
+
+# Application imports
+from app.core.cache import token_cache
+from app.core.config import get_settings
+from app.core.hashing import warm_hashing_pool
+from app.core.security import create_access_token, decode_access_token
+from app.db.session import engine, read_engine, warm_pool
+from app.db.user_store import user_store
+from app.db.users import get_users_by_usernames
+
+# Get application settings
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class Readiness:
+    """
+    Whether this worker should receive traffic.
+
+    Attributes:
+        state: "starting", "ready" or "stopping"
+    """
+
+    def __init__(self):
+        self.state = "starting"
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def set_ready(self) -> None:
+        self.state = "ready"
+
+    def set_stopping(self) -> None:
+        self.state = "stopping"
+
+# Readiness of this worker process
+readiness = Readiness()
+
+async def warm_database() -> None:
+    """
+    Open every pooled connection, then read the users indexes and preload
+    recently active users as configured.
+    """
+    await warm_pool(engine)
+    if read_engine is not engine:
+        await warm_pool(read_engine)
+    await user_store.warm()
+    if settings.WARMUP_READ_INDEXES:
+        await user_store.read_indexes()
+    if settings.WARMUP_PRELOAD_USERS > 0:
+        await preload_users(settings.WARMUP_PRELOAD_USERS)
+
+async def preload_users(limit: int) -> int:
+    """
+    Load the most recently active users into the shared user cache.
+
+    Their versions are read before the users are loaded, so a user that
+    changes in the meantime is not cached with stale values. Does nothing
+    with the per-process cache, which does not keep users on their own.
+
+    Args:
+        limit: Maximum number of users to load
+
+    Returns:
+        int: Number of users cached
+    """
+    if not token_cache.keeps_users:
+        return 0
+    usernames = [username for _, username in await user_store.recently_active(limit)]
+    versions = token_cache.user_versions(usernames)
+    users = await get_users_by_usernames(usernames)
+    for username, snapshot in users.items():
+        token_cache.set_user(snapshot, versions[username])
+    return len(users)
+
+async def warm_jwt() -> None:
+    """Sign and verify one token, loading the signing backends."""
+    decode_access_token(create_access_token({"sub": "warm-up"}, timedelta(minutes=1)))
+
+async def _step(name: str, step: Awaitable, durations: Dict[str, float]) -> None:
+    started = time.perf_counter()
+    try:
+        await step
+    except Exception:
+        logger.exception("Warm-up step %s failed", name)
+    durations[name] = round((time.perf_counter() - started) * 1000, 1)
+
+async def warm_up() -> Dict[str, float]:
+    """
+    Run the start-up warm-up, unless WARMUP_ENABLED is off.
+
+    The database steps run one after the other (warming the pool holds
+    every connection), concurrently with the hashing processes starting.
+
+    Returns:
+        Dict[str, float]: Duration of each step in milliseconds
+    """
+    durations: Dict[str, float] = {}
+    if not settings.WARMUP_ENABLED:
+        return durations
+    started = time.perf_counter()
+    await asyncio.gather(
+        _step("hashing", warm_hashing_pool(verify=True), durations),
+        _step("database", warm_database(), durations),
+        _step("jwt", warm_jwt(), durations),
+    )
+    logger.info(
+        "Warm-up finished in %.0f ms (%s)",
+        (time.perf_counter() - started) * 1000,
+        ", ".join(f"{name} {ms} ms" for name, ms in durations.items()),
+    )
+    return durations
@@ -0,0 +1,115 @@
+"""
+Write-behind login activity.
+
+A successful login only notes the user id and time in an in-process buffer
+(no I/O, no await), so the login response never waits on a write. The
+buffer is written as one batched UPDATE (an executemany in a single
+transaction per database, see app.db.user_store) every
+LOGIN_RECORD_FLUSH_SECONDS, or as soon as LOGIN_RECORD_MAX_PENDING users
+are waiting, and is drained when the application shuts down. Repeated
+logins of the same user between flushes collapse into one row update, so
+a crash loses at most one flush interval of activity.
+"""
+
+# Standard library imports
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+# Application imports
+from app.core.config import get_settings
+from app.db.user_store import LoginActivity, user_store
+
+# Get application settings
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+class LoginRecorder:
+    """
+    Buffers last_login_at and login_count updates and flushes them in batches.
+
+    Attributes:
+        flush_interval: Longest time in seconds a login stays buffered
+        max_pending: Number of buffered users that triggers an early flush
+        recorded: Number of logins recorded
+        flushes: Number of batches written
+        failures: Number of batches that failed and were kept for a retry
+    """
+
+    def __init__(self, flush_interval_seconds: float, max_pending: int):
+        self.flush_interval = flush_interval_seconds
+        self.max_pending = max_pending
+        self.recorded = 0
+        self.flushes = 0
+        self.failures = 0
+        self._pending: LoginActivity = {}
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of users with buffered logins."""
+        return len(self._pending)
+
+    def start(self) -> None:
+        """Start the background flusher on the running event loop."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flusher and write everything still buffered."""
+        if self._task is not None:
+            # Let a flush in progress finish rather than cancelling it
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def record(self, user_id: int) -> None:
+        """
+        Note a successful login of a user.
+
+        Args:
+            user_id: Id of the user that logged in
+        """
+        at = datetime.now(timezone.utc)
+        previous = self._pending.get(user_id)
+        self._pending[user_id] = (at, previous[1] + 1 if previous else 1)
+        self.recorded += 1
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Write the buffered logins now."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        try:
+            await user_store.record_logins(batch)
+        except Exception:
+            logger.exception("Writing login activity of %d users failed", len(batch))
+            self.failures += 1
+            # Merge back, so the next flush retries; logins recorded since
+            # the swap are newer and keep their time
+            for user_id, (at, count) in batch.items():
+                newer = self._pending.get(user_id)
+                self._pending[user_id] = (newer[0], newer[1] + count) if newer else (at, count)
+            return
+        self.flushes += 1
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+# Shared login recorder for this worker process
+login_recorder = LoginRecorder(settings.LOGIN_RECORD_FLUSH_SECONDS, settings.LOGIN_RECORD_MAX_PENDING)
@@ -0,0 +1,81 @@
+"""
+Schema version check for application startup.
+
+The schema is owned by the Alembic revisions in alembic/versions. On boot
+the application only compares the database's revision with the newest one
+(a single-row read), and upgrades it when DB_MIGRATE_ON_STARTUP is set;
+otherwise an out-of-date database stops the start-up with a clear error.
+"""
+
+# Standard library imports
+from pathlib import Path
+from typing import Optional
+
+# Database imports
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Application imports
+from app.core.config import get_settings
+
+# Get application settings
+settings = get_settings()
+
+# Project root, where alembic.ini and the alembic directory live
+_ROOT = Path(__file__).resolve().parents[2]
+
+def alembic_config() -> Config:
+    """
+    Build the Alembic configuration without reading logging settings,
+    so that running migrations does not reset the server's loggers.
+
+    Returns:
+        Config: Configuration pointing at the alembic directory
+    """
+    config = Config()
+    config.set_main_option("script_location", str(_ROOT / "alembic"))
+    return config
+
+def head_revision() -> str:
+    """
+    Return the newest Alembic revision.
+
+    Returns:
+        str: Revision id of the migration head
+    """
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+def _current_revision(connection) -> Optional[str]:
+    return MigrationContext.configure(connection).get_current_revision()
+
+def _upgrade(connection) -> None:
+    # Only needed when the database is behind, so not imported on every boot
+    from alembic import command
+    config = alembic_config()
+    config.attributes["connection"] = connection
+    command.upgrade(config, "head")
+
+async def ensure_schema(engine: AsyncEngine) -> None:
+    """
+    Check that the database schema is at the newest revision.
+
+    Args:
+        engine: Engine of the database to check
+
+    Raises:
+        RuntimeError: If the schema is out of date and DB_MIGRATE_ON_STARTUP
+        is off
+    """
+    head = head_revision()
+    async with engine.connect() as conn:
+        current = await conn.run_sync(_current_revision)
+    if current == head:
+        return
+    if not settings.DB_MIGRATE_ON_STARTUP:
+        raise RuntimeError(
+            f"Database schema is at revision {current}, expected {head}; run `alembic upgrade head`"
+        )
+    async with engine.begin() as conn:
+        await conn.run_sync(_upgrade)
@@ -0,0 +1,144 @@
+"""
+Refresh token storage.
+Refresh tokens are opaque random strings stored as SHA-256 digests, so a
+refresh costs one primary-key lookup and never touches the password hash.
+Rotation deletes the consumed token; tokens that expire unused are deleted
+every REFRESH_TOKEN_PRUNE_SECONDS by run_prune_loop().
+"""
+
+# Standard library imports
+import asyncio
+import hashlib
+import logging
+import secrets
+import time
+from typing import Optional, Tuple
+
+# Database imports
+from sqlalchemy import delete, insert
+
+# Application imports
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models.refresh_token import RefreshToken
+
+# Get application settings
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _new_row(user_id: int, username: str) -> Tuple[str, dict]:
+    token = secrets.token_urlsafe(32)
+    row = {
+        "token_hash": _digest(token),
+        "user_id": user_id,
+        "username": username,
+        "expires_at": int(time.time()) + settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400,
+    }
+    return token, row
+
+async def create_refresh_token(user_id: int, username: str) -> str:
+    """
+    Issue a new refresh token for a user.
+    
+    Args:
+        user_id: Id of the user
+        username: Username of the user
+    
+    Returns:
+        str: The opaque refresh token to hand to the client
+    """
+    token, row = _new_row(user_id, username)
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(RefreshToken).values(**row))
+        await session.commit()
+    return token
+
+async def rotate_refresh_token(token: str) -> Optional[Tuple[str, str]]:
+    """
+    Consume a refresh token and issue its replacement in one transaction.
+    
+    The old token is deleted with DELETE ... RETURNING, so it can be used
+    exactly once even when two refreshes race.
+    
+    Args:
+        token: The refresh token presented by the client
+    
+    Returns:
+        Optional[Tuple[str, str]]: The new refresh token and the username,
+        or None if the token is unknown, already used or expired
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.token_hash == _digest(token))
+            .returning(RefreshToken.user_id, RefreshToken.username, RefreshToken.expires_at)
+        )
+        consumed = result.first()
+        if consumed is None or consumed.expires_at <= time.time():
+            await session.commit()
+            return None
+        new_token, row = _new_row(consumed.user_id, consumed.username)
+        await session.execute(insert(RefreshToken).values(**row))
+        await session.commit()
+    return new_token, consumed.username
+
+async def revoke_refresh_token(token: str, username: Optional[str] = None) -> bool:
+    """
+    Delete a single refresh token.
+    
+    Args:
+        token: The refresh token to revoke
+        username: Only revoke the token if it was issued to this user;
+            None revokes it whoever it belongs to
+    
+    Returns:
+        bool: True if a token was deleted
+    """
+    statement = delete(RefreshToken).where(RefreshToken.token_hash == _digest(token))
+    if username is not None:
+        statement = statement.where(RefreshToken.username == username)
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(statement)
+        await session.commit()
+    return result.rowcount > 0
+
+async def revoke_user_refresh_tokens(username: str) -> int:
+    """
+    Delete every refresh token of a user, ending all of their sessions.
+    
+    Tokens are matched by username rather than user id, as a user moved
+    to another shard by rebalance_users.py gets a new id while the tokens
+    issued before the move keep the old one.
+    
+    Args:
+        username: Username of the user
+    
+    Returns:
+        int: Number of tokens deleted
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(delete(RefreshToken).where(RefreshToken.username == username))
+        await session.commit()
+    return result.rowcount
+
+async def prune_refresh_tokens() -> None:
+    """Delete refresh tokens that have expired."""
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(RefreshToken).where(RefreshToken.expires_at <= int(time.time())))
+        await session.commit()
+
+async def run_prune_loop() -> None:
+    """
+    Prune expired refresh tokens now and every REFRESH_TOKEN_PRUNE_SECONDS.
+    Runs until cancelled at shutdown.
+    """
+    while True:
+        try:
+            await prune_refresh_tokens()
+        except Exception:
+            # Expired tokens are rejected anyway; retry next round
+            logger.exception("Pruning refresh tokens failed")
+        await asyncio.sleep(settings.REFRESH_TOKEN_PRUNE_SECONDS)
@@ -1,26 +1,120 @@
+import asyncio
+from contextlib import AsyncExitStack
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import get_settings
 
 settings = get_settings()
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=False,
-    future=True
-)
+def _is_sqlite_file(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database not in (None, "", ":memory:")
+
+def _apply_sqlite_pragmas(dbapi_connection, read_only: bool) -> None:
+    """
+    Apply the production SQLite PRAGMAs to a freshly opened connection.
+
+    WAL lets readers run while a writer commits, synchronous=NORMAL only
+    fsyncs at checkpoints, and busy_timeout makes writers wait for the lock
+    instead of failing with "database is locked".
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE}")
+    # A negative cache_size is measured in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KB}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    if read_only:
+        cursor.execute("PRAGMA query_only=ON")
+    cursor.close()
+
+def make_engine(url: str, pool_size: int, read_only: bool = False):
+    """
+    Create an async engine with the pool and SQLite tuning from the settings.
 
-AsyncSessionLocal = sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
+    Args:
+        url: Database URL
+        pool_size: Number of pooled connections
+        read_only: Open SQLite connections with query_only=ON
+
+    Returns:
+        AsyncEngine: The new engine
+    """
+    options = {}
+    # File databases get an explicitly sized pool; the aiosqlite default
+    # would open a new connection for every session
+    if not url.startswith("sqlite") or _is_sqlite_file(url):
+        options.update(
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=pool_size,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    new_engine = create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        **options
+    )
+    if settings.DB_PROFILE == "production" and _is_sqlite_file(url):
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            _apply_sqlite_pragmas(dbapi_connection, read_only)
+    return new_engine
+
+# Engine used for writes (and for reads unless DB_SPLIT_READ_WRITE is set)
+engine = make_engine(settings.DATABASE_URL, settings.DB_POOL_SIZE)
+
+# Optional read-only engine, so logins and token checks never queue behind signups
+read_engine = (
+    make_engine(settings.DATABASE_URL, settings.DB_READ_POOL_SIZE, read_only=True)
+    if settings.DB_SPLIT_READ_WRITE else engine
 )
 
-async def get_db():
-    async with AsyncSessionLocal() as session:
-        try:
-            yield session
-        finally:
-            await session.close() 
\ No newline at end of file
+async def warm_pool(engine) -> int:
+    """
+    Open every pooled connection of an engine ahead of the first request.
+
+    The connections are held at the same time, so the pool really opens
+    pool_size of them (running the connect PRAGMAs on each) instead of
+    reusing one, and then returned to the pool.
+
+    Args:
+        engine: Engine whose pool to fill
+
+    Returns:
+        int: Number of connections opened
+    """
+    size_of = getattr(engine.pool, "size", None)
+    size = size_of() if callable(size_of) else 1
+    async with AsyncExitStack() as stack:
+        connections = [await stack.enter_async_context(engine.connect()) for _ in range(size)]
+        await asyncio.gather(*(conn.execute(text("SELECT 1")) for conn in connections))
+    return size
+
+def make_sessionmaker(bind) -> sessionmaker:
+    """
+    Create the session factory used for every engine.
+
+    Args:
+        bind: Engine the sessions use
+
+    Returns:
+        sessionmaker: Factory of AsyncSession objects
+    """
+    return sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+AsyncSessionLocal = make_sessionmaker(engine)
+
+ReadSessionLocal = make_sessionmaker(read_engine) if settings.DB_SPLIT_READ_WRITE else AsyncSessionLocal
@@ -0,0 +1,146 @@
+"""
+Group commit for signups.
+
+Concurrent signups are queued and written in short batches: each batch is
+one multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING statement in one
+transaction (per shard, see app.db.user_store), so a burst of N signups costs one commit (one fsync under
+SQLite) instead of N, and no follow-up SELECT is needed to read back the
+generated id and created_at. Each caller still gets its own row back, or
+None when its username was already taken.
+"""
+
+# Standard library imports
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+# Application imports
+from app.core.config import get_settings
+from app.db.user_store import user_store
+from app.models.user import normalize_username
+
+# Get application settings
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# (username, hashed_password, future resolved with the inserted row or None)
+_Pending = Tuple[str, str, "asyncio.Future[Optional[dict]]"]
+
+# Queued by stop() behind the pending signups; the writer exits when it gets it
+_STOP = object()
+
+class SignupBatcher:
+    """
+    Collects signup inserts into size- or time-bounded batches.
+
+    Attributes:
+        max_size: Maximum number of signups per batch
+        max_wait: Longest time in seconds the first signup of a batch waits
+        batches: Number of batches committed
+        rows: Number of signups submitted through batches
+    """
+
+    def __init__(self, max_size: int, max_wait_ms: int):
+        self.max_size = max_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.rows = 0
+        self._queue: "asyncio.Queue[_Pending]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the background writer on the running event loop."""
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stop the background writer once it has written every signup queued
+        so far, including a batch in progress. Signups queued while it stops
+        fail with RuntimeError rather than wait forever.
+        """
+        if self._task is None:
+            return
+        self._queue.put_nowait(_STOP)
+        try:
+            await self._task
+        finally:
+            self._task = None
+            error = RuntimeError("Signup batcher stopped")
+            while not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is not _STOP and not item[2].done():
+                    item[2].set_exception(error)
+
+    async def insert(self, username: str, hashed_password: str) -> Optional[dict]:
+        """
+        Insert a user as part of the next batch.
+
+        Args:
+            username: Username of the new user
+            hashed_password: Password hash of the new user
+
+        Returns:
+            Optional[dict]: The inserted row (id, username, created_at,
+            updated_at), or None if the username is already taken
+        """
+        future = asyncio.get_running_loop().create_future()
+        item = (username, hashed_password, future)
+        if self._task is None:
+            # Not running (e.g. outside the app lifespan): write directly
+            await self._flush([item])
+        else:
+            self._queue.put_nowait(item)
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch: List[_Pending] = [item]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_size:
+                if not self._queue.empty():
+                    item = self._queue.get_nowait()
+                else:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    # Write what was collected, then exit
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[_Pending]) -> None:
+        # Within a batch the first request for a username, in any case, wins
+        first: Dict[str, _Pending] = {}
+        for item in batch:
+            first.setdefault(normalize_username(item[0]), item)
+        try:
+            inserted = await user_store.insert_users([(u, h) for u, h, _ in first.values()])
+        except Exception as error:
+            logger.exception("Signup batch of %d failed", len(batch))
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        self.batches += 1
+        self.rows += len(batch)
+        for item in batch:
+            username, _, future = item
+            if not future.done():
+                future.set_result(inserted.get(username) if first[normalize_username(username)] is item else None)
+
+# Shared signup batcher for this worker process
+signup_batcher = SignupBatcher(settings.SIGNUP_BATCH_MAX_SIZE, settings.SIGNUP_BATCH_MAX_WAIT_MS)
@@ -0,0 +1,561 @@
+"""
+User storage backends.
+
+Every user query in the application goes through `user_store`, which is one
+of:
+
+- SqlUserStore: the users table in DATABASE_URL (the default)
+- ShardedUserStore: users spread over the SQLite files listed in
+  USER_SHARDS by a jump consistent hash of the normalized username, one engine and
+  pool per shard, so signups and password updates on different shards do
+  not wait for the same writer lock
+- MemoryUserStore: a dict, for tests and experiments (USER_STORE=memory)
+
+User ids stay unique across shards: a user with rowid `n` in shard `i` has
+the id `n * SHARD_ID_STRIDE + i`, so the shard of an id is `id %
+SHARD_ID_STRIDE`. Ids only change when rebalance_users.py moves a user to
+another shard. Point lookups touch one shard; listings merge the shards'
+id-ordered streams.
+
+Usernames are unique regardless of case: each store keeps the case-folded
+username (User.username_normalized) under a unique index, and login looks
+users up by it, while tokens carry the username as entered at signup.
+"""
+
+# Standard library imports
+import asyncio
+import hashlib
+import heapq
+import itertools
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+# Database imports
+from sqlalchemy import bindparam, delete, select, text, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql.selectable import TextualSelect
+
+# Application imports
+from app.core.config import get_settings
+from app.core.metrics import timed
+from app.db.migrations import ensure_schema
+from app.db.session import engine, make_engine, make_sessionmaker, read_engine, warm_pool
+from app.models.user import User, normalize_username
+
+# Get application settings
+settings = get_settings()
+
+# Multiplier that makes room for the shard number in user ids (max shards)
+SHARD_ID_STRIDE = 1024
+
+# Rows per multi-row INSERT (SQLite allows at most 32766 bound parameters)
+INSERT_CHUNK_SIZE = 2000
+
+# Columns returned by listings and signups (no password hash)
+PUBLIC_COLUMNS = (User.id, User.username, User.created_at, User.updated_at)
+
+# Buffered login activity: user id -> (time of the last login, number of logins)
+LoginActivity = Dict[int, Tuple[datetime, int]]
+
+# One statement executed for every user of a flush (executemany), in one
+# transaction; updated_at is kept as is, a login does not change the account
+_users = User.__table__
+_RECORD_LOGINS = (
+    update(_users)
+    .where(_users.c.id == bindparam("user_id"))
+    .values(
+        last_login_at=bindparam("last_login_at", type_=_users.c.last_login_at.type),
+        login_count=_users.c.login_count + bindparam("logins"),
+        updated_at=_users.c.updated_at,
+    )
+)
+
+class Credentials(NamedTuple):
+    """Fields needed to check a login."""
+    id: int
+    username: str
+    hashed_password: str
+
+# SQLite prefers the unique normalized username index for an equality match
+# and would then read the table row, so the covering index is named explicitly
+_CREDENTIALS_QUERY = text(
+    "SELECT id, username, hashed_password FROM users "
+    "INDEXED BY ix_users_login WHERE username_normalized = :username_normalized"
+).columns(User.id, User.username, User.hashed_password)
+
+def select_credentials(username: str) -> TextualSelect:
+    """
+    Build the login query for a username, in any case.
+
+    Only id, username and hashed_password are selected, so the query is
+    answered from the ix_users_login covering index without reading the
+    table row.
+
+    Args:
+        username: Username to look up
+
+    Returns:
+        TextualSelect: The query
+    """
+    return _CREDENTIALS_QUERY.bindparams(username_normalized=normalize_username(username))
+
+def jump_hash(key: int, buckets: int) -> int:
+    """
+    Jump consistent hash (Lamping and Veach).
+
+    Growing the number of buckets from n to n + 1 only moves about 1/(n + 1)
+    of the keys, all of them into the new bucket.
+
+    Args:
+        key: 64-bit key
+        buckets: Number of buckets
+
+    Returns:
+        int: Bucket in range(buckets)
+    """
+    bucket, candidate = -1, 0
+    while candidate < buckets:
+        bucket = candidate
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        candidate = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+def shard_index(username: str, shards: int) -> int:
+    """
+    Return the shard a username belongs to.
+
+    The normalized username is hashed, so usernames that differ only in
+    case land on the same shard, where its unique index keeps them apart.
+
+    Args:
+        username: Username
+        shards: Number of shards
+
+    Returns:
+        int: Shard index in range(shards)
+    """
+    key = int.from_bytes(hashlib.blake2b(normalize_username(username).encode(), digest_size=8).digest(), "big")
+    return jump_hash(key, shards)
+
+class SqlUserStore:
+    """
+    Users in one SQL database.
+
+    Attributes:
+        engine: Engine used for writes
+        read_engine: Engine used for reads
+        shard: Shard number encoded in user ids (0 when not sharded)
+        stride: Id multiplier (1 when not sharded)
+    """
+
+    def __init__(self, engine: AsyncEngine, read_engine: Optional[AsyncEngine] = None, shard: int = 0, stride: int = 1):
+        self.engine = engine
+        self.read_engine = read_engine or engine
+        self.shard = shard
+        self.stride = stride
+        self._sessions = make_sessionmaker(self.engine)
+        self._read_sessions = make_sessionmaker(self.read_engine)
+
+    def _global_id(self, local_id: int) -> int:
+        return local_id * self.stride + self.shard
+
+    def _local_id(self, user_id: int) -> int:
+        # Floor division keeps "after_id" bounds correct for ids of other shards
+        return (user_id - self.shard) // self.stride
+
+    def _row(self, mapping) -> dict:
+        row = dict(mapping)
+        row["id"] = self._global_id(row["id"])
+        return row
+
+    async def ensure_schema(self) -> None:
+        await ensure_schema(self.engine)
+
+    async def dispose(self) -> None:
+        await self.engine.dispose()
+        if self.read_engine is not self.engine:
+            await self.read_engine.dispose()
+
+    async def warm(self) -> None:
+        await warm_pool(self.engine)
+        if self.read_engine is not self.engine:
+            await warm_pool(self.read_engine)
+
+    async def read_indexes(self) -> int:
+        # Counting through an index visits every page of it, which pulls
+        # the index into the OS page cache (and SQLite's, via mmap)
+        async with self.read_engine.connect() as conn:
+            names = (await conn.execute(text(
+                "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'users'"
+            ))).scalars().all()
+            for name in names:
+                await conn.execute(text(f'SELECT count(*) FROM users INDEXED BY "{name}"'))
+        return len(names)
+
+    async def recently_active(self, limit: int) -> List[Tuple[datetime, str]]:
+        async with self._read_sessions() as session:
+            result = await session.execute(
+                select(User.last_login_at, User.username)
+                .where(User.last_login_at.is_not(None))
+                .order_by(User.last_login_at.desc())
+                .limit(limit)
+            )
+            return [tuple(row) for row in result]
+
+    async def get_credentials(self, username: str) -> Optional[Credentials]:
+        async with self._read_sessions() as session:
+            with timed("db_pool_wait"):
+                await session.connection()
+            with timed("db_user_lookup"):
+                row = (await session.execute(select_credentials(username))).one_or_none()
+        return None if row is None else Credentials(self._global_id(row.id), row.username, row.hashed_password)
+
+    async def get_user(self, username: str) -> Optional[dict]:
+        async with self._read_sessions() as session:
+            with timed("db_pool_wait"):
+                await session.connection()
+            with timed("db_user_lookup"):
+                row = (await session.execute(
+                    select(User.__table__).where(User.username == username)
+                )).mappings().one_or_none()
+        return None if row is None else self._row(row)
+
+    async def get_users(self, usernames: Iterable[str]) -> Dict[str, dict]:
+        usernames = set(usernames)
+        if not usernames:
+            return {}
+        async with self._read_sessions() as session:
+            with timed("db_pool_wait"):
+                await session.connection()
+            with timed("db_user_lookup"):
+                result = await session.execute(
+                    select(User.__table__).where(User.username.in_(usernames))
+                )
+                return {row["username"]: self._row(row) for row in result.mappings()}
+
+    async def existing_usernames(self, usernames: Iterable[str]) -> Set[str]:
+        usernames = set(usernames)
+        if not usernames:
+            return set()
+        async with self._read_sessions() as session:
+            result = await session.execute(
+                select(User.username_normalized)
+                .where(User.username_normalized.in_({normalize_username(u) for u in usernames}))
+            )
+            taken = set(result.scalars())
+        return {username for username in usernames if normalize_username(username) in taken}
+
+    async def insert_users(self, users: List[Tuple[str, str]]) -> Dict[str, dict]:
+        if not users:
+            return {}
+        inserted = {}
+        async with self._sessions() as session:
+            # Chunked to stay under SQLite's limit on bound parameters
+            for start in range(0, len(users), INSERT_CHUNK_SIZE):
+                result = await session.execute(
+                    insert(User)
+                    .values([
+                        {"username": u, "username_normalized": normalize_username(u), "hashed_password": h}
+                        for u, h in users[start:start + INSERT_CHUNK_SIZE]
+                    ])
+                    .on_conflict_do_nothing()
+                    .returning(*PUBLIC_COLUMNS)
+                )
+                inserted.update((row["username"], self._row(row)) for row in result.mappings())
+            await session.commit()
+        return inserted
+
+    async def copy_users(self, rows: List[dict]) -> int:
+        """Insert complete user rows (ids are reassigned), skipping taken usernames."""
+        copied = 0
+        async with self._sessions() as session:
+            for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+                result = await session.execute(
+                    insert(User)
+                    .values([
+                        {
+                            **{key: value for key, value in row.items() if key != "id"},
+                            "username_normalized": normalize_username(row["username"]),
+                        }
+                        for row in rows[start:start + INSERT_CHUNK_SIZE]
+                    ])
+                    .on_conflict_do_nothing()
+                )
+                copied += result.rowcount
+            await session.commit()
+        return copied
+
+    async def delete_users(self, usernames: Iterable[str]) -> int:
+        async with self._sessions() as session:
+            result = await session.execute(delete(User).where(User.username.in_(list(usernames))))
+            await session.commit()
+            return result.rowcount
+
+    async def update_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        async with self._sessions() as session:
+            result = await session.execute(
+                update(User)
+                .where(User.id == self._local_id(user_id), User.hashed_password == old_hash)
+                .values(hashed_password=new_hash)
+            )
+            await session.commit()
+            return result.rowcount == 1
+
+    async def record_logins(self, logins: LoginActivity) -> None:
+        if not logins:
+            return
+        async with self.engine.begin() as conn:
+            await conn.execute(_RECORD_LOGINS, [
+                {"user_id": self._local_id(user_id), "last_login_at": at, "logins": count}
+                for user_id, (at, count) in logins.items()
+            ])
+
+    async def fetch_page(self, after_id: int = 0, limit: int = 100, full: bool = False) -> List[dict]:
+        columns = User.__table__.columns if full else PUBLIC_COLUMNS
+        async with self._read_sessions() as session:
+            result = await session.stream(
+                select(*columns)
+                .where(User.id > self._local_id(after_id))
+                .order_by(User.id)
+                .limit(limit)
+            )
+            return [self._row(row) async for row in result.mappings()]
+
+    async def stream_users(self, after_id: int = 0, page_size: int = 1000, full: bool = False) -> AsyncIterator[dict]:
+        # One short session per page, so no read transaction spans the scan
+        while True:
+            page = await self.fetch_page(after_id, page_size, full)
+            for row in page:
+                yield row
+            if len(page) < page_size:
+                return
+            after_id = page[-1]["id"]
+
+    async def stream_usernames(self, cursor: Dict[int, int]) -> AsyncIterator[Tuple[int, int, str]]:
+        async with self._read_sessions() as session:
+            result = await session.stream(
+                select(User.id, User.username)
+                .where(User.id > cursor.get(self.shard, 0))
+                .order_by(User.id)
+                .execution_options(yield_per=10000)
+            )
+            async for local_id, username in result:
+                yield self.shard, local_id, username
+
+class ShardedUserStore:
+    """
+    Users spread over several SqlUserStore shards by username.
+
+    Attributes:
+        shards: Shard stores, indexed by shard number
+    """
+
+    def __init__(self, shards: List[SqlUserStore]):
+        self.shards = shards
+
+    def shard_for(self, username: str) -> SqlUserStore:
+        return self.shards[shard_index(username, len(self.shards))]
+
+    def shard_for_id(self, user_id: int) -> SqlUserStore:
+        return self.shards[user_id % SHARD_ID_STRIDE]
+
+    def _group(self, usernames: Iterable[str]) -> Dict[int, List[str]]:
+        groups: Dict[int, List[str]] = defaultdict(list)
+        for username in usernames:
+            groups[shard_index(username, len(self.shards))].append(username)
+        return groups
+
+    async def ensure_schema(self) -> None:
+        for shard in self.shards:
+            await shard.ensure_schema()
+
+    async def dispose(self) -> None:
+        for shard in self.shards:
+            await shard.dispose()
+
+    async def warm(self) -> None:
+        await asyncio.gather(*(shard.warm() for shard in self.shards))
+
+    async def read_indexes(self) -> int:
+        return sum(await asyncio.gather(*(shard.read_indexes() for shard in self.shards)))
+
+    async def recently_active(self, limit: int) -> List[Tuple[datetime, str]]:
+        results = await asyncio.gather(*(shard.recently_active(limit) for shard in self.shards))
+        return heapq.nlargest(limit, itertools.chain(*results))
+
+    async def get_credentials(self, username: str) -> Optional[Credentials]:
+        return await self.shard_for(username).get_credentials(username)
+
+    async def get_user(self, username: str) -> Optional[dict]:
+        return await self.shard_for(username).get_user(username)
+
+    async def get_users(self, usernames: Iterable[str]) -> Dict[str, dict]:
+        groups = self._group(set(usernames))
+        results = await asyncio.gather(*(self.shards[i].get_users(names) for i, names in groups.items()))
+        return {username: row for result in results for username, row in result.items()}
+
+    async def existing_usernames(self, usernames: Iterable[str]) -> Set[str]:
+        groups = self._group(set(usernames))
+        results = await asyncio.gather(*(self.shards[i].existing_usernames(names) for i, names in groups.items()))
+        return set().union(*results)
+
+    async def insert_users(self, users: List[Tuple[str, str]]) -> Dict[str, dict]:
+        groups: Dict[int, List[Tuple[str, str]]] = defaultdict(list)
+        for username, hashed_password in users:
+            groups[shard_index(username, len(self.shards))].append((username, hashed_password))
+        results = await asyncio.gather(*(self.shards[i].insert_users(rows) for i, rows in groups.items()))
+        return {username: row for result in results for username, row in result.items()}
+
+    async def update_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        return await self.shard_for_id(user_id).update_password_hash(user_id, old_hash, new_hash)
+
+    async def record_logins(self, logins: LoginActivity) -> None:
+        groups: Dict[int, LoginActivity] = defaultdict(dict)
+        for user_id, activity in logins.items():
+            groups[user_id % SHARD_ID_STRIDE][user_id] = activity
+        await asyncio.gather(*(self.shards[i].record_logins(group) for i, group in groups.items()))
+
+    async def fetch_page(self, after_id: int = 0, limit: int = 100, full: bool = False) -> List[dict]:
+        pages = await asyncio.gather(*(shard.fetch_page(after_id, limit, full) for shard in self.shards))
+        return heapq.nsmallest(limit, itertools.chain(*pages), key=lambda row: row["id"])
+
+    async def stream_users(self, after_id: int = 0, page_size: int = 1000, full: bool = False) -> AsyncIterator[dict]:
+        # k-way merge of the shards' id-ordered streams
+        streams = [shard.stream_users(after_id, page_size, full) for shard in self.shards]
+        heap = []
+        for number, stream in enumerate(streams):
+            row = await anext(stream, None)
+            if row is not None:
+                heap.append((row["id"], number, row))
+        heapq.heapify(heap)
+        while heap:
+            _, number, row = heapq.heappop(heap)
+            yield row
+            following = await anext(streams[number], None)
+            if following is not None:
+                heapq.heappush(heap, (following["id"], number, following))
+
+    async def stream_usernames(self, cursor: Dict[int, int]) -> AsyncIterator[Tuple[int, int, str]]:
+        for shard in self.shards:
+            async for entry in shard.stream_usernames(cursor):
+                yield entry
+
+class MemoryUserStore:
+    """
+    Users in a dict, with the same interface as the database stores.
+    Data lives only as long as the process.
+    """
+
+    def __init__(self):
+        self._users: Dict[str, dict] = {}
+        # Normalized username -> username
+        self._normalized: Dict[str, str] = {}
+        self._ids = itertools.count(1)
+
+    async def ensure_schema(self) -> None:
+        pass
+
+    async def dispose(self) -> None:
+        pass
+
+    async def warm(self) -> None:
+        pass
+
+    async def read_indexes(self) -> int:
+        return 0
+
+    async def recently_active(self, limit: int) -> List[Tuple[datetime, str]]:
+        active = [(row["last_login_at"], row["username"]) for row in self._users.values() if row["last_login_at"]]
+        return heapq.nlargest(limit, active)
+
+    @staticmethod
+    def _public(row: dict) -> dict:
+        return {column.key: row[column.key] for column in PUBLIC_COLUMNS}
+
+    async def get_credentials(self, username: str) -> Optional[Credentials]:
+        row = self._users.get(self._normalized.get(normalize_username(username)))
+        return None if row is None else Credentials(row["id"], row["username"], row["hashed_password"])
+
+    async def get_user(self, username: str) -> Optional[dict]:
+        row = self._users.get(username)
+        return None if row is None else dict(row)
+
+    async def get_users(self, usernames: Iterable[str]) -> Dict[str, dict]:
+        return {username: dict(self._users[username]) for username in set(usernames) if username in self._users}
+
+    async def existing_usernames(self, usernames: Iterable[str]) -> Set[str]:
+        return {username for username in usernames if normalize_username(username) in self._normalized}
+
+    async def insert_users(self, users: List[Tuple[str, str]]) -> Dict[str, dict]:
+        inserted = {}
+        now = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+        for username, hashed_password in users:
+            normalized = normalize_username(username)
+            if normalized in self._normalized:
+                continue
+            row = {
+                "id": next(self._ids),
+                "username": username,
+                "username_normalized": normalized,
+                "hashed_password": hashed_password,
+                "created_at": now,
+                "updated_at": None,
+                "last_login_at": None,
+                "login_count": 0,
+            }
+            self._users[username] = row
+            self._normalized[normalized] = username
+            inserted[username] = self._public(row)
+        return inserted
+
+    async def update_password_hash(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        for row in self._users.values():
+            if row["id"] == user_id and row["hashed_password"] == old_hash:
+                row["hashed_password"] = new_hash
+                row["updated_at"] = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+                return True
+        return False
+
+    async def record_logins(self, logins: LoginActivity) -> None:
+        rows = {row["id"]: row for row in self._users.values() if row["id"] in logins}
+        for user_id, (at, count) in logins.items():
+            if user_id in rows:
+                rows[user_id]["last_login_at"] = at.replace(tzinfo=None)
+                rows[user_id]["login_count"] += count
+
+    async def fetch_page(self, after_id: int = 0, limit: int = 100, full: bool = False) -> List[dict]:
+        rows = sorted((row for row in self._users.values() if row["id"] > after_id), key=lambda row: row["id"])
+        return [dict(row) if full else self._public(row) for row in rows[:limit]]
+
+    async def stream_users(self, after_id: int = 0, page_size: int = 1000, full: bool = False) -> AsyncIterator[dict]:
+        for row in await self.fetch_page(after_id, len(self._users), full):
+            yield row
+
+    async def stream_usernames(self, cursor: Dict[int, int]) -> AsyncIterator[Tuple[int, int, str]]:
+        after_id = cursor.get(0, 0)
+        for row in sorted(self._users.values(), key=lambda row: row["id"]):
+            if row["id"] > after_id:
+                yield 0, row["id"], row["username"]
+
+def build_user_store():
+    """
+    Create the user store selected by USER_STORE and USER_SHARDS.
+
+    Returns:
+        The configured store
+    """
+    if settings.USER_STORE == "memory":
+        return MemoryUserStore()
+    if settings.USER_SHARDS:
+        if len(settings.USER_SHARDS) > SHARD_ID_STRIDE:
+            raise ValueError(f"At most {SHARD_ID_STRIDE} user shards are supported")
+        return ShardedUserStore([
+            SqlUserStore(make_engine(url, settings.DB_POOL_SIZE), shard=number, stride=SHARD_ID_STRIDE)
+            for number, url in enumerate(settings.USER_SHARDS)
+        ])
+    return SqlUserStore(engine, read_engine)
+
+# User store for this process
+user_store = build_user_store()
@@ -0,0 +1,111 @@
+"""
+User queries.
+Point lookups by username, and listings that page through users by id
+(keyset pagination) so every page costs the same no matter how deep into
+the table it starts. Every query goes through the configured user store
+(see app.db.user_store), so callers work the same with one database,
+several shards or the in-memory store.
+"""
+
+# Standard library imports
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+# Application imports
+from app.core.singleflight import SingleFlight
+from app.db.user_store import Credentials, user_store
+
+# Coalesces concurrent lookups of the same username
+user_lookups = SingleFlight()
+
+async def get_user_credentials(username: str) -> Optional[Credentials]:
+    """
+    Look up the id and password hash of a user by username.
+
+    The pool checkout and the query are timed as separate stages so that
+    a slow lookup can be told apart from a starved connection pool.
+
+    Args:
+        username: Username to look up
+
+    Returns:
+        Optional[Credentials]: id, username and hashed_password, or None
+        if no such user exists
+    """
+    return await user_store.get_credentials(username)
+
+async def get_user_snapshot(username: str) -> Optional[dict]:
+    """
+    Look up a user by username, sharing the query with concurrent callers.
+
+    Concurrent lookups of the same username run one query on one pooled
+    connection and all receive its result, which keeps a burst of requests
+    carrying the same token from draining the pool.
+
+    Args:
+        username: Username to look up
+
+    Returns:
+        Optional[dict]: Column values of the user, or None if no such user
+        exists
+    """
+    return await user_lookups.do(username, user_store.get_user, username)
+
+async def get_users_by_usernames(usernames: Iterable[str]) -> Dict[str, dict]:
+    """
+    Look up many users by username with a single IN query per database.
+
+    Args:
+        usernames: Usernames to look up
+
+    Returns:
+        Dict[str, dict]: Username to column values, for the usernames that exist
+    """
+    return await user_store.get_users(usernames)
+
+async def update_password_hash(user_id: int, old_hash: str, new_hash: str) -> bool:
+    """
+    Replace a user's password hash if it has not changed in the meantime.
+
+    Args:
+        user_id: Id of the user to update
+        old_hash: Hash the caller verified against
+        new_hash: Replacement hash
+
+    Returns:
+        bool: True if the row was updated
+    """
+    return await user_store.update_password_hash(user_id, old_hash, new_hash)
+
+async def fetch_user_page(after_id: int = 0, limit: int = 100) -> List[dict]:
+    """
+    Fetch one page of users ordered by id.
+
+    Args:
+        after_id: Only return users with an id greater than this
+        limit: Maximum number of users to return
+
+    Returns:
+        List[dict]: Up to `limit` users (id, username, created_at,
+        updated_at), in ascending id order
+    """
+    return await user_store.fetch_page(after_id, limit)
+
+async def stream_users(after_id: int = 0, page_size: int = 1000, full: bool = False) -> AsyncIterator[dict]:
+    """
+    Yield every user after `after_id` in id order with flat memory use.
+
+    Each page is read with a server-side cursor in its own short session,
+    so no more than one page per database is held in memory and no read
+    transaction stays open across the whole scan.
+
+    Args:
+        after_id: Start after this user id
+        page_size: Number of users fetched per query
+        full: Return every column (including the password hash and login
+            activity) instead of the public ones
+
+    Yields:
+        dict: One user (id, username, created_at, updated_at) at a time
+    """
+    async for user in user_store.stream_users(after_id, page_size, full):
+        yield user
@@ -0,0 +1,33 @@
+# SQLAlchemy imports for database column types
+from sqlalchemy import Column, ForeignKey, Integer, String
+
+# Import base class for SQLAlchemy models
+from app.db.base import Base
+
+class RefreshToken(Base):
+    """
+    SQLAlchemy model for the refresh_tokens table.
+    
+    Only a SHA-256 digest of each opaque refresh token is stored. The
+    username is kept alongside the user id so a refresh needs no join, and
+    a user's tokens are found by username, which unlike the id does not
+    change when the user moves to another shard.
+    
+    Attributes:
+        token_hash: Primary key, hex SHA-256 digest of the refresh token
+        user_id: Id of the user when the token was issued
+        username: Username of that user, used as the access token subject
+            and to revoke all of the user's tokens
+        expires_at: Expiry as a Unix timestamp
+    """
+    __tablename__ = "refresh_tokens"  # Database table name
+
+    # Digest of the token, the only lookup key
+    token_hash = Column(String, primary_key=True)
+    
+    # Owner of the token
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    username = Column(String, index=True, nullable=False)
+    
+    # Expiry of the token, indexed for pruning
+    expires_at = Column(Integer, index=True, nullable=False)
@@ -0,0 +1,28 @@
+# SQLAlchemy imports for database column types
+from sqlalchemy import Column, Integer, String
+
+# Import base class for SQLAlchemy models
+from app.db.base import Base
+
+class RevokedToken(Base):
+    """
+    SQLAlchemy model for the revoked_tokens table (the token denylist).
+    
+    Attributes:
+        id: Primary key, never reused (AUTOINCREMENT), used for incremental syncs
+        jti: Unique token identifier taken from the JWT "jti" claim
+        expires_at: Token expiry as a Unix timestamp; rows are pruned after it
+    """
+    __tablename__ = "revoked_tokens"  # Database table name
+    # Ids of pruned rows must never be handed out again, or workers whose
+    # sync cursor is already past them would miss the new revocations
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    # Primary key, also the sync cursor for workers loading new revocations
+    id = Column(Integer, primary_key=True)
+    
+    # Token identifier with unique constraint
+    jti = Column(String, unique=True, nullable=False)
+    
+    # Expiry of the revoked token, indexed for pruning
+    expires_at = Column(Integer, index=True, nullable=False)
@@ -1,29 +1,62 @@
 # SQLAlchemy imports for database column types and utilities
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Index, Integer, String, DateTime
 from sqlalchemy.sql import func
 
 # Import base class for SQLAlchemy models
 from app.db.base import Base
 
+def normalize_username(username: str) -> str:
+    """
+    Case-insensitive form of a username, stored in username_normalized.
+    
+    Args:
+        username: Username as entered
+    
+    Returns:
+        str: Case-folded username
+    """
+    return username.casefold()
+
+def _default_username_normalized(context) -> str:
+    return normalize_username(context.get_current_parameters()["username"])
+
 class User(Base):
     """
     SQLAlchemy model for the users table.
     
     Attributes:
         id: Primary key, auto-incrementing integer
-        username: Unique username, indexed for faster lookups
+        username: Unique username as entered at signup, indexed for faster lookups
+        username_normalized: Case-folded username; unique, so usernames
+            differing only in case cannot both exist, and used by login
         hashed_password: Bcrypt hashed password
         created_at: Timestamp of user creation
         updated_at: Timestamp of last user update
+        last_login_at: Timestamp of the last successful login, written behind
+        login_count: Number of successful logins, written behind
     """
     __tablename__ = "users"  # Database table name
+    __table_args__ = (
+        # Covers the login query, so it is answered from the index alone
+        # (the id is the rowid, which every index already stores)
+        Index("ix_users_login", "username_normalized", "username", "hashed_password"),
+    )
 
-    # Primary key
-    id = Column(Integer, primary_key=True, index=True)
+    # Primary key (the SQLite rowid, which needs no separate index)
+    id = Column(Integer, primary_key=True)
     
     # Username field with unique constraint and index
     username = Column(String, unique=True, index=True, nullable=False)
     
+    # Case-folded username, filled in from username on insert
+    username_normalized = Column(
+        String,
+        default=_default_username_normalized,
+        unique=True,
+        index=True,
+        nullable=False
+    )
+    
     # Hashed password field
     hashed_password = Column(String, nullable=False)
     
@@ -37,4 +70,8 @@ class User(Base):
         DateTime(timezone=True),
         onupdate=func.now(),  # Automatically updated when record changes
         nullable=True
-    ) 
\ No newline at end of file
+    )
+    
+    # Login activity, flushed in batches by app.db.login_recorder
+    last_login_at = Column(DateTime(timezone=True), nullable=True)
+    login_count = Column(Integer, default=0, server_default="0", nullable=False) 
\ No newline at end of file
@@ -1,6 +1,6 @@
 # Pydantic and typing imports
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class UserBase(BaseModel):
@@ -35,7 +35,55 @@ class Token(BaseModel):
 class LoginResponse(Token):
     """
     Schema for login response.
-    Extends Token to include a success message.
+    Extends Token to include a refresh token, the access token lifetime
+    in seconds and a success message.
+    """
+    refresh_token: str
+    expires_in: int
+    message: str
+
+class RefreshRequest(BaseModel):
+    """
+    Schema for token refresh requests.
+    Contains the refresh token issued by login or a previous refresh.
+    """
+    refresh_token: str
+
+class RevokeRequest(BaseModel):
+    """
+    Schema for token revocation requests.
+    Contains the access or refresh token to revoke.
+    """
+    token: str
+
+class IntrospectRequest(BaseModel):
+    """
+    Schema for batch token introspection requests.
+    Contains up to INTROSPECT_MAX_TOKENS access tokens.
+    """
+    tokens: List[str]
+
+class TokenIntrospection(BaseModel):
+    """
+    Schema for the introspection result of one token.
+    Only "active" is set for tokens that are invalid, expired, revoked or
+    whose user no longer exists.
+    """
+    active: bool
+    sub: Optional[str] = None
+    exp: Optional[int] = None
+    user_id: Optional[int] = None
+
+class IntrospectResponse(BaseModel):
+    """
+    Schema for batch token introspection responses.
+    Results are in the same order as the request's tokens.
+    """
+    results: List[TokenIntrospection]
+
+class Message(BaseModel):
+    """
+    Schema for responses that only carry a message.
     """
     message: str
 
@@ -60,4 +108,12 @@ class User(UserBase):
 
     class Config:
         """Configuration for the User model."""
-        from_attributes = True  # Allows conversion from SQLAlchemy model 
\ No newline at end of file
+        from_attributes = True  # Allows conversion from SQLAlchemy model 
+
+class UserPage(BaseModel):
+    """
+    Schema for one page of the admin user listing.
+    Pass next_after_id back as after_id to fetch the following page.
+    """
+    items: List[User]
+    next_after_id: Optional[int] = None
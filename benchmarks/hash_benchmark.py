@@ -0,0 +1,96 @@
+"""
+Password hashing throughput benchmark.
+
+Measures hashes/sec on this host for each scheme and cost so that
+BCRYPT_ROUNDS, SCRYPT_ROUNDS and PASSWORD_SCHEMES can be chosen from
+measurements. Reports single-core and all-core throughput as JSON.
+
+Usage:
+    python -m benchmarks.hash_benchmark
+    python -m benchmarks.hash_benchmark --bcrypt 10,11,12,13 --scrypt 14,15,16 --seconds 3
+"""
+
+# Standard library imports
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple
+
+# Security imports
+from passlib.hash import bcrypt, scrypt
+
+def _hasher(scheme: str, rounds: int):
+    if scheme == "bcrypt":
+        return bcrypt.using(rounds=rounds)
+    return scrypt.using(rounds=rounds)
+
+def hash_for(scheme: str, rounds: int, seconds: float) -> Tuple[int, float]:
+    """
+    Hash repeatedly for about `seconds` seconds.
+
+    Args:
+        scheme: "bcrypt" or "scrypt"
+        rounds: Cost parameter of the scheme
+        seconds: Time budget
+
+    Returns:
+        Tuple of the number of hashes computed and the elapsed time
+    """
+    hasher = _hasher(scheme, rounds)
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while True:
+        hasher.hash("benchmark-password")
+        count += 1
+        now = time.perf_counter()
+        if now >= deadline:
+            return count, now - started
+
+def measure(scheme: str, rounds: int, seconds: float, workers: int) -> dict:
+    """
+    Measure single-core latency and all-core throughput for one setting.
+
+    Args:
+        scheme: "bcrypt" or "scrypt"
+        rounds: Cost parameter of the scheme
+        seconds: Time budget for each of the two measurements
+        workers: Number of processes for the all-core measurement
+
+    Returns:
+        dict: Latency and throughput figures
+    """
+    count, elapsed = hash_for(scheme, rounds, seconds)
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        # Warm the workers so process start-up is not measured
+        list(pool.map(hash_for, [scheme] * workers, [rounds] * workers, [0.0] * workers))
+        results = list(pool.map(hash_for, [scheme] * workers, [rounds] * workers, [seconds] * workers))
+    parallel = sum(c / e for c, e in results)
+    return {
+        "scheme": scheme,
+        "rounds": rounds,
+        "ms_per_hash": round(elapsed / count * 1000, 2),
+        "hashes_per_sec_single": round(count / elapsed, 2),
+        "hashes_per_sec_all_cores": round(parallel, 2),
+        "workers": workers,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark password hashing schemes and costs")
+    parser.add_argument("--bcrypt", default="10,11,12,13", help="Comma-separated bcrypt rounds")
+    parser.add_argument("--scrypt", default="14,15,16", help="Comma-separated scrypt rounds (log2 N)")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Time budget per measurement")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for the all-core run")
+    args = parser.parse_args()
+
+    results = []
+    for scheme, costs in (("bcrypt", args.bcrypt), ("scrypt", args.scrypt)):
+        for rounds in (int(c) for c in costs.split(",") if c):
+            results.append(measure(scheme, rounds, args.seconds, args.workers))
+            print(json.dumps(results[-1]), flush=True)
+
+if __name__ == "__main__":
+    main()
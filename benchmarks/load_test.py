@@ -0,0 +1,332 @@
+"""
+Load test for the signup, login and protected endpoints.
+
+Drives either the application in-process through httpx's ASGI transport
+(the default) or a running server given with --url, at one or more
+concurrency levels, and reports p50/p95/p99 latency and requests/sec per
+endpoint as JSON. Results can be saved as a baseline and later runs
+compared against it.
+
+Benchmark users are seeded straight into the database configured by
+DATABASE_URL, so when using --url point both at the same database.
+
+Every request comes from the same client address and the login mix reuses
+a small set of usernames, so the per-IP and per-username login throttles
+would answer most logins with 429. In-process runs turn both throttles off
+(LOGIN_IP_RATE_PER_MINUTE=0, LOGIN_USERNAME_RATE_PER_MINUTE=0) unless
+--keep-throttles is given; start a server benchmarked with --url with the
+same settings.
+
+Usage:
+    python -m benchmarks.load_test --seed-users 1000 --concurrency 1,8,32
+    python -m benchmarks.load_test --url http://localhost:8000 --compare benchmarks/baseline.json
+    python -m benchmarks.load_test --save-baseline benchmarks/baseline.json
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+
+# Third-party imports
+import httpx
+
+# Benchmark users share one password so seeding only hashes once
+SEED_PREFIX = "bench_user_"
+SEED_PASSWORD = "bench-password"
+OPERATIONS = ("signup", "login", "protected")
+
+async def seed_users(count: int) -> None:
+    """
+    Insert `count` benchmark users directly into the database.
+    Existing benchmark users are left untouched, so seeding is idempotent.
+
+    Args:
+        count: Number of users named bench_user_0 .. bench_user_{count-1}
+    """
+    from app.core.security import get_password_hash
+    from app.db.migrations import ensure_schema
+    from app.db.session import engine
+    from app.db.user_store import user_store
+
+    await ensure_schema(engine)
+    await user_store.ensure_schema()
+    hashed = get_password_hash(SEED_PASSWORD)
+    batch_size = 5000
+    for start in range(0, count, batch_size):
+        await user_store.insert_users([
+            (f"{SEED_PREFIX}{i}", hashed)
+            for i in range(start, min(start + batch_size, count))
+        ])
+
+@asynccontextmanager
+async def open_client(url: Optional[str]) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Open an HTTP client against a running server or the in-process app.
+
+    Args:
+        url: Base URL of a running server, or None to run main:app in-process
+
+    Yields:
+        httpx.AsyncClient: Client ready to send requests
+    """
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    if url:
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+            yield client
+        return
+    from main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            yield client
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+
+    Args:
+        sorted_values: Latencies in ascending order
+        pct: Percentile between 0 and 100
+
+    Returns:
+        float: The percentile value, or 0.0 for an empty list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+async def run_level(
+    client: httpx.AsyncClient,
+    concurrency: int,
+    total_requests: int,
+    weights: Dict[str, int],
+    seed_users_count: int,
+    tokens: List[str],
+    rng: random.Random,
+    run_id: str,
+) -> dict:
+    """
+    Run one workload at a fixed concurrency and summarise the latencies.
+
+    Args:
+        client: HTTP client
+        concurrency: Number of concurrent virtual clients
+        total_requests: Requests to send across all virtual clients
+        weights: Relative weight of each operation in the mix
+        seed_users_count: Number of seeded users available for login
+        tokens: Bearer tokens used by protected requests
+        rng: Random generator that decides the operation sequence
+        run_id: Unique suffix that keeps signup usernames fresh
+
+    Returns:
+        dict: Per-operation and overall results for this level
+    """
+    ops = [op for op in OPERATIONS if weights.get(op)]
+    plan = rng.choices(ops, weights=[weights[op] for op in ops], k=total_requests)
+    picks = [rng.randrange(max(seed_users_count, 1)) for _ in range(total_requests)]
+    latencies: Dict[str, List[float]] = {op: [] for op in ops}
+    errors: Dict[str, int] = {op: 0 for op in ops}
+    cursor = iter(range(total_requests))
+
+    async def send(i: int) -> None:
+        op = plan[i]
+        if op == "signup":
+            request = client.post(
+                "/api/signup",
+                json={"username": f"bench_signup_{run_id}_{concurrency}_{i}", "password": SEED_PASSWORD},
+            )
+            expected = 201
+        elif op == "login":
+            request = client.post(
+                "/api/login",
+                data={"username": f"{SEED_PREFIX}{picks[i]}", "password": SEED_PASSWORD},
+            )
+            expected = 200
+        else:
+            token = tokens[picks[i] % len(tokens)]
+            request = client.get("/api/protected", headers={"Authorization": f"Bearer {token}"})
+            expected = 200
+        started = time.perf_counter()
+        try:
+            response = await request
+            ok = response.status_code == expected
+        except httpx.HTTPError:
+            ok = False
+        latencies[op].append((time.perf_counter() - started) * 1000)
+        if not ok:
+            errors[op] += 1
+
+    async def worker() -> None:
+        for i in cursor:
+            await send(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    summary = {}
+    for op in ops:
+        values = sorted(latencies[op])
+        summary[op] = {
+            "count": len(values),
+            "errors": errors[op],
+            "rps": round(len(values) / elapsed, 2),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+        }
+    return {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(total_requests / elapsed, 2),
+        "operations": summary,
+    }
+
+async def obtain_tokens(client: httpx.AsyncClient, count: int) -> List[str]:
+    """
+    Log in as the first `count` seeded users to get tokens for protected calls.
+
+    Args:
+        client: HTTP client
+        count: Number of distinct tokens to obtain
+
+    Returns:
+        List[str]: Bearer tokens
+    """
+    tokens = []
+    for i in range(count):
+        response = await client.post(
+            "/api/login",
+            data={"username": f"{SEED_PREFIX}{i}", "password": SEED_PASSWORD},
+        )
+        response.raise_for_status()
+        tokens.append(response.json()["access_token"])
+    return tokens
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Compare a run against a baseline and list the regressions.
+
+    A regression is a p95 latency or requests/sec that is worse than the
+    baseline by more than `tolerance` (a fraction, e.g. 0.1 for 10%).
+
+    Args:
+        results: Output of this run
+        baseline: Output of an earlier run
+        tolerance: Allowed relative slowdown
+
+    Returns:
+        List[str]: One line per regression, empty when nothing got slower
+    """
+    regressions = []
+    previous = {level["concurrency"]: level for level in baseline.get("levels", [])}
+    for level in results["levels"]:
+        base = previous.get(level["concurrency"])
+        if base is None:
+            continue
+        for op, stats in level["operations"].items():
+            base_stats = base["operations"].get(op)
+            if not base_stats:
+                continue
+            rps_change = (stats["rps"] - base_stats["rps"]) / base_stats["rps"] if base_stats["rps"] else 0.0
+            p95_change = (stats["p95_ms"] - base_stats["p95_ms"]) / base_stats["p95_ms"] if base_stats["p95_ms"] else 0.0
+            line = (
+                f"c={level['concurrency']} {op}: rps {base_stats['rps']} -> {stats['rps']} ({rps_change:+.1%}), "
+                f"p95 {base_stats['p95_ms']}ms -> {stats['p95_ms']}ms ({p95_change:+.1%})"
+            )
+            print(line, file=sys.stderr)
+            if rps_change < -tolerance or p95_change > tolerance:
+                regressions.append(line)
+    return regressions
+
+async def main_async(args: argparse.Namespace) -> int:
+    weights = {}
+    for part in args.mix.split(","):
+        op, _, weight = part.partition("=")
+        if op not in OPERATIONS:
+            raise SystemExit(f"Unknown operation in --mix: {op}")
+        weights[op] = int(weight)
+
+    if args.seed_users:
+        started = time.perf_counter()
+        await seed_users(args.seed_users)
+        print(f"Seeded {args.seed_users} users in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+
+    rng = random.Random(args.seed)
+    run_id = f"{int(time.time())}"
+    results = {
+        "meta": {
+            "target": args.url or "in-process",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mix": weights,
+            "seed": args.seed,
+            "seed_users": args.seed_users,
+            "requests_per_level": args.requests,
+        },
+        "levels": [],
+    }
+    async with open_client(args.url) as client:
+        tokens = await obtain_tokens(client, min(args.tokens, max(args.seed_users, 1)))
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            results["levels"].append(await run_level(
+                client, concurrency, args.requests, weights,
+                args.seed_users, tokens, rng, run_id,
+            ))
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle), args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test signup, login and protected endpoints")
+    parser.add_argument("--url", help="Base URL of a running server (default: run main:app in-process)")
+    parser.add_argument("--seed-users", type=int, default=100, help="Benchmark users to seed before the run")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per concurrency level")
+    parser.add_argument("--mix", default="signup=1,login=2,protected=7", help="Operation weights")
+    parser.add_argument("--tokens", type=int, default=16, help="Distinct tokens used by protected requests")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the request sequence")
+    parser.add_argument("--output", help="Also write the JSON results to this file")
+    parser.add_argument("--save-baseline", help="Write the results as a baseline file")
+    parser.add_argument("--compare", help="Compare against a baseline file and fail on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed slowdown before failing")
+    parser.add_argument(
+        "--keep-throttles",
+        action="store_true",
+        help=(
+            "Keep the login throttles on for in-process runs (default: off, since every request "
+            "shares one client IP); with --url, start the server with LOGIN_IP_RATE_PER_MINUTE=0 "
+            "and LOGIN_USERNAME_RATE_PER_MINUTE=0 instead"
+        ),
+    )
+    args = parser.parse_args()
+    if not args.keep_throttles:
+        # Settings are read on import, so this has to happen before the app is imported
+        os.environ["LOGIN_IP_RATE_PER_MINUTE"] = "0"
+        os.environ["LOGIN_USERNAME_RATE_PER_MINUTE"] = "0"
+    sys.exit(asyncio.run(main_async(args)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Response serialization microbenchmark.
+
+Compares, per response, the cost of FastAPI's response_model path
+(validate the return value against the schema, convert it to JSON-
+compatible objects, encode with json.dumps in JSONResponse) with the
+direct path in app.api.responses (pick the schema fields, encode with
+orjson). No server or database is involved; both paths are checked to
+produce the same JSON before they are timed.
+
+Usage:
+    python -m benchmarks.serialization_benchmark
+    python -m benchmarks.serialization_benchmark --iterations 50000 --page-size 1000
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+# FastAPI imports
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+# Application imports
+from app.api.responses import dumps, login_response, user_fields, user_response
+from app.models.user import User
+from app.schemas.auth import LoginResponse, User as UserSchema, UserPage
+
+def sample_row(user_id: int) -> dict:
+    """Row as returned by the user store for signups and listings."""
+    return {
+        "id": user_id,
+        "username": f"user{user_id}",
+        "created_at": datetime(2026, 10, 18, 12, 30, 5),
+        "updated_at": None,
+    }
+
+def sample_login() -> dict:
+    """Token response body as built by issue_tokens."""
+    return {
+        "access_token": "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9." + "x" * 120 + "." + "y" * 43,
+        "token_type": "bearer",
+        "refresh_token": "r" * 43,
+        "expires_in": 1800,
+        "message": "Successfully logged in!",
+    }
+
+def response_model_path(schema) -> Callable[[Any], Awaitable[bytes]]:
+    """
+    Build the FastAPI response_model path for a schema.
+
+    Args:
+        schema: Pydantic model used as response_model
+
+    Returns:
+        Coroutine function turning a return value into the response body
+    """
+    field = create_response_field(name="Response", type_=schema)
+
+    async def render(content: Any) -> bytes:
+        return JSONResponse(await serialize_response(field=field, response_content=content)).body
+    return render
+
+async def time_per_call(render: Callable[[Any], Awaitable[bytes]], content: Any, iterations: int) -> float:
+    """
+    Time a render function.
+
+    Args:
+        render: Coroutine function producing the response body
+        content: Value to render
+        iterations: Number of calls
+
+    Returns:
+        float: Microseconds per call
+    """
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await render(content)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+async def run(iterations: int, page_size: int) -> None:
+    async def direct_user(content):
+        return user_response(content).body
+
+    async def direct_login(content):
+        return login_response(content).body
+
+    async def direct_page(content):
+        return dumps({"items": [user_fields(user) for user in content["items"]], "next_after_id": content["next_after_id"]})
+
+    page = {"items": [sample_row(i) for i in range(1, page_size + 1)], "next_after_id": page_size}
+    cases = [
+        ("signup (row -> User)", UserSchema, direct_user, sample_row(1), iterations),
+        ("protected (ORM User -> User)", UserSchema, direct_user, User(**sample_row(1)), iterations),
+        ("login (dict -> LoginResponse)", LoginResponse, direct_login, sample_login(), iterations),
+        (f"users page ({page_size} rows -> UserPage)", UserPage, direct_page, page, max(1, iterations // page_size)),
+    ]
+    for name, schema, direct, content, count in cases:
+        before = response_model_path(schema)
+        if json.loads(await before(content)) != json.loads(await direct(content)):
+            raise SystemExit(f"{name}: the two paths produce different JSON")
+        before_us = await time_per_call(before, content, count)
+        after_us = await time_per_call(direct, content, count)
+        print(json.dumps({
+            "response": name,
+            "iterations": count,
+            "us_per_call_response_model": round(before_us, 2),
+            "us_per_call_direct": round(after_us, 2),
+            "speedup": round(before_us / after_us, 1),
+        }), flush=True)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare response_model serialization with the direct orjson path")
+    parser.add_argument("--iterations", type=int, default=20000, help="Calls per single-object case")
+    parser.add_argument("--page-size", type=int, default=100, help="Users in the listing case")
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations, args.page_size))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Cold-start benchmark.
+
+Measures, in fresh interpreter processes, how long `import main` takes and
+how long the lifespan startup plus the first request take after that, so
+worker cold start can be tracked as the code changes. Prints JSON with the
+median and worst run.
+
+Usage:
+    python -m benchmarks.startup_benchmark --runs 5
+"""
+
+# Standard library imports
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Runs inside each child process and prints its timings as JSON
+CHILD = r"""
+import asyncio, json, time
+import httpx
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+async def first_request():
+    async with main.app.router.lifespan_context(main.app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/")
+            response.raise_for_status()
+        return ready, time.perf_counter()
+
+ready, served = asyncio.run(first_request())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "lifespan_ms": (ready - imported) * 1000,
+    "first_request_ms": (served - ready) * 1000,
+    "total_ms": (served - started) * 1000,
+}))
+"""
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure import and startup time of main:app")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh processes to start")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    # Use a throwaway database unless one is configured explicitly
+    if "DATABASE_URL" not in env:
+        env["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/startup.db"
+    env.setdefault("DEBUG", "False")
+
+    runs = []
+    for _ in range(args.runs):
+        child = subprocess.run(
+            [sys.executable, "-c", CHILD],
+            env=env, capture_output=True, text=True,
+        )
+        if child.returncode != 0:
+            raise SystemExit(child.stderr)
+        runs.append(json.loads(child.stdout.strip().splitlines()[-1]))
+
+    summary = {}
+    for metric in ("import_ms", "lifespan_ms", "first_request_ms", "total_ms"):
+        values = [run[metric] for run in runs]
+        summary[metric] = {
+            "median": round(statistics.median(values), 1),
+            "max": round(max(values), 1),
+        }
+    print(json.dumps({"runs": args.runs, "python": sys.version.split()[0], "results": summary}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Bulk user import command.
+
+Streams users from a CSV or JSONL file into the users table. Plain text
+passwords are hashed in parallel across CPU cores, rows that already carry a
+password hash are kept as-is, and rows are written in batches with one
+transaction per batch. Usernames that already exist are skipped and
+reported instead of aborting the batch.
+
+Input rows need a "username" field plus either "password" or
+"hashed_password".
+
+Usage:
+    python import_users.py users.csv
+    python import_users.py users.jsonl --batch-size 5000 --workers 8
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterator, List, Optional, Set, TextIO, Tuple
+
+# Application imports
+from app.core.security import get_password_hash, get_pwd_context
+from app.db.user_store import user_store
+
+def read_rows(path: str, fmt: str) -> Iterator[dict]:
+    """
+    Lazily yield user rows from a CSV or JSONL file.
+
+    Args:
+        path: Input file path, or "-" for stdin
+        fmt: Either "csv" or "jsonl"
+
+    Yields:
+        dict: One input row at a time
+    """
+    handle: TextIO = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+    try:
+        if fmt == "csv":
+            yield from csv.DictReader(handle)
+        else:
+            for line in handle:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+def batched(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    """
+    Group an iterator of rows into lists of at most `size` rows.
+
+    Args:
+        rows: Row iterator
+        size: Maximum batch size
+
+    Yields:
+        List[dict]: The next batch of rows
+    """
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+def prepare_batch(
+    pool: ProcessPoolExecutor,
+    batch: List[dict],
+    existing: Set[str],
+    workers: int
+) -> Tuple[List[dict], List[str]]:
+    """
+    Validate a batch and hash its plain text passwords across the pool.
+
+    Args:
+        pool: Process pool used for hashing
+        batch: Raw input rows
+        existing: Usernames already in the database, skipped without hashing
+        workers: Number of pool workers, used to size the map chunks
+
+    Returns:
+        Tuple of the insertable rows and the usernames of skipped rows
+    """
+    rows: List[dict] = []
+    rejected: List[str] = []
+    to_hash: List[int] = []
+    seen = set()
+    for raw in batch:
+        username = (raw.get("username") or "").strip()
+        hashed = raw.get("hashed_password") or ""
+        password = raw.get("password") or ""
+        if not username or username in seen or username in existing:
+            rejected.append(username)
+            continue
+        seen.add(username)
+        if hashed:
+            # Keep existing hashes untouched, but only ones we can verify later
+            if get_pwd_context().identify(hashed, required=False) is None:
+                rejected.append(username)
+                continue
+            rows.append({"username": username, "hashed_password": hashed})
+        elif password:
+            to_hash.append(len(rows))
+            rows.append({"username": username, "hashed_password": password})
+        else:
+            rejected.append(username)
+
+    if to_hash:
+        chunksize = max(1, len(to_hash) // (workers * 4))
+        passwords = [rows[i]["hashed_password"] for i in to_hash]
+        for i, hashed in zip(to_hash, pool.map(get_password_hash, passwords, chunksize=chunksize)):
+            rows[i]["hashed_password"] = hashed
+    return rows, rejected
+
+async def find_existing(batch: List[dict]) -> Set[str]:
+    """
+    Return the usernames of a batch that are already in the database.
+
+    Args:
+        batch: Raw input rows
+
+    Returns:
+        Set[str]: Usernames that must be skipped
+    """
+    usernames = [(raw.get("username") or "").strip() for raw in batch]
+    return await user_store.existing_usernames(u for u in usernames if u)
+
+async def insert_batch(rows: List[dict]) -> Set[str]:
+    """
+    Insert a prepared batch with multi-row INSERTs in one transaction
+    (per shard when users are sharded).
+
+    Args:
+        rows: Rows with username and hashed_password
+
+    Returns:
+        Set[str]: Usernames actually inserted
+    """
+    # ON CONFLICT DO NOTHING covers rows added concurrently since the check
+    inserted = await user_store.insert_users([(row["username"], row["hashed_password"]) for row in rows])
+    return set(inserted)
+
+async def import_users(
+    path: str,
+    fmt: str,
+    batch_size: int,
+    workers: int,
+    report: Optional[TextIO]
+) -> None:
+    """
+    Stream the input file into the database.
+
+    Hashing of the next batch overlaps with the insert of the previous one,
+    so at most two batches are held in memory at a time.
+
+    Args:
+        path: Input file path, or "-" for stdin
+        fmt: Either "csv" or "jsonl"
+        batch_size: Rows per INSERT transaction
+        workers: Number of hashing processes
+        report: Optional file receiving one skipped username per line
+    """
+    loop = asyncio.get_running_loop()
+    imported = skipped = 0
+    started = time.perf_counter()
+
+    async def prepare(pool: ProcessPoolExecutor, batch: List[dict]) -> Tuple[List[dict], List[str]]:
+        existing = await find_existing(batch)
+        return await loop.run_in_executor(None, prepare_batch, pool, batch, existing, workers)
+
+    async def flush(prepared: "asyncio.Task") -> None:
+        nonlocal imported, skipped
+        rows, rejected = await prepared
+        inserted = await insert_batch(rows)
+        # Rows skipped by ON CONFLICT were added since the existence check
+        rejected += [row["username"] for row in rows if row["username"] not in inserted]
+        imported += len(inserted)
+        skipped += len(rejected)
+        if report is not None:
+            for username in rejected:
+                report.write(f"{username}\n")
+        elapsed = time.perf_counter() - started
+        print(f"imported {imported}, skipped {skipped}, {(imported + skipped) / elapsed:.0f} rows/sec")
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        pending = None
+        for batch in batched(read_rows(path, fmt), batch_size):
+            prepared = asyncio.ensure_future(prepare(pool, batch))
+            if pending is not None:
+                await flush(pending)
+            pending = prepared
+        if pending is not None:
+            await flush(pending)
+
+    elapsed = time.perf_counter() - started
+    rate = (imported + skipped) / elapsed if elapsed else 0.0
+    print(f"Done: imported {imported}, skipped {skipped} in {elapsed:.1f}s ({rate:.0f} rows/sec)")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk import users from CSV or JSONL")
+    parser.add_argument("path", help="Input file, or - for stdin")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Input format (default: from file extension)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per INSERT batch")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Hashing processes")
+    parser.add_argument("--report", help="Write skipped usernames to this file")
+    args = parser.parse_args()
+
+    fmt = args.format or ("csv" if args.path.endswith(".csv") else "jsonl")
+    report = open(args.report, "w", encoding="utf-8") if args.report else None
+    try:
+        asyncio.run(import_users(args.path, fmt, args.batch_size, args.workers, report))
+    finally:
+        if report is not None:
+            report.close()
+
+if __name__ == "__main__":
+    main()
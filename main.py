@@ -1,22 +1,65 @@
 # Import required FastAPI components
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+from fastapi.responses import PlainTextResponse
+import asyncio
 from contextlib import asynccontextmanager
 
 # Import application components
 from app.api.auth import router as auth_router
-from app.db.base import Base
-from app.db.session import engine
+from app.api.users import router as users_router
+from app.api.jwks import router as jwks_router
+from app.api.responses import DefaultResponse
+from app.db.session import engine, read_engine
+from app.db.migrations import ensure_schema
+from app.core.config import get_settings
+from app.core.hashing import shutdown_hashing_pool
+from app.core import metrics
+from app.core.revocation import revocation_list
+from app.core.username_filter import username_filter
+from app.core.warmup import readiness, warm_up
+from app.db.refresh_tokens import run_prune_loop
+from app.db.signup_batcher import signup_batcher
+from app.db.login_recorder import login_recorder
+from app.db.user_store import user_store
+
+settings = get_settings()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup event
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Check the schema revision (and migrate if allowed) instead of create_all
+    await ensure_schema(engine)
+    await user_store.ensure_schema()
+    # Start the hashing processes, open the pools and load cold pages and
+    # code paths before accepting traffic, so the first requests do not pay
+    await warm_up()
+    # Load the token denylist and keep it in sync with other workers
+    await revocation_list.sync()
+    revocation_sync = asyncio.create_task(revocation_list.run_sync_loop())
+    # Delete expired refresh tokens now and periodically
+    refresh_prune = asyncio.create_task(run_prune_loop())
+    # Build the username filter and keep it in sync with other workers
+    await username_filter.sync()
+    username_sync = asyncio.create_task(username_filter.run_sync_loop())
+    # Group-commit concurrent signups
+    signup_batcher.start()
+    # Write login activity behind the login responses
+    login_recorder.start()
+    readiness.set_ready()
     yield
-    # Shutdown event (optional)
-    # Add any cleanup logic here
+    # Shutdown event
+    readiness.set_stopping()
+    revocation_sync.cancel()
+    refresh_prune.cancel()
+    username_sync.cancel()
+    await signup_batcher.stop()
+    await login_recorder.stop()
+    shutdown_hashing_pool()
+    await user_store.dispose()
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
 
 # Initialize FastAPI application with metadata
 app = FastAPI(
@@ -25,6 +68,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",  # URL for Swagger UI documentation
     redoc_url="/redoc",  # URL for ReDoc documentation
+    default_response_class=DefaultResponse,  # orjson encoder
     lifespan=lifespan
 )
 
@@ -38,9 +82,23 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all HTTP headers
 )
 
+# Time requests and hot-path stages only when instrumentation is enabled
+if metrics.ENABLED:
+    app.add_middleware(metrics.MetricsMiddleware)
+
+# Profile sampled and slow requests only when profiling is enabled
+if settings.PROFILING_ENABLED:
+    from app.core.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
+
 # Include the authentication router with prefix and tags
 # This will prepend "/api" to all auth routes
 app.include_router(auth_router, prefix="/api", tags=["authentication"])
+app.include_router(users_router, prefix="/api", tags=["users"])
+app.include_router(jwks_router, tags=["keys"])
+if settings.PROFILING_ENABLED:
+    from app.api.debug import router as debug_router
+    app.include_router(debug_router, tags=["debug"])
 
 # Root endpoint for API health check
 @app.get("/")
@@ -51,11 +109,49 @@ async def root():
     """
     return {"message": "Authentication API is running. Visit /docs for API documentation."}
 
-# Run the application using uvicorn if script is run directly
+# Liveness and readiness probes
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """
+    Liveness probe: the process is up and its event loop responds.
+    Checks no dependencies, so a slow database does not get it restarted.
+    """
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """
+    Readiness probe: 200 once start-up and warm-up have finished, 503
+    before that and once shutdown has begun.
+    """
+    return DefaultResponse(
+        {"status": readiness.state},
+        status_code=200 if readiness.ready else 503
+    )
+
+# Prometheus scrape endpoint
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def prometheus_metrics():
+        """
+        Expose request, stage and in-flight metrics in Prometheus text format.
+        """
+        return PlainTextResponse(
+            metrics.render_prometheus(),
+            media_type="text/plain; version=0.0.4"
+        )
+
+# Run the application if script is run directly: a single auto-reloading
+# uvicorn process in development, the multi-worker server otherwise
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",  # Binds to all network interfaces
-        port=8000,       # Port number
-        reload=True      # Enable auto-reload during development
-    ) 
\ No newline at end of file
+    if settings.DEBUG:
+        import uvicorn
+        uvicorn.run(
+            "main:app",
+            host=settings.HOST,  # Binds to all network interfaces by default
+            port=settings.PORT,  # Port number
+            reload=True          # Enable auto-reload during development
+        )
+    else:
+        from app.core.server import run
+        run("main:app")
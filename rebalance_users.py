@@ -0,0 +1,96 @@
+"""
+User shard rebalancing command.
+
+Moves users to the shard their username hashes to under a new shard map,
+e.g. from the single DATABASE_URL database to USER_SHARDS, or from N to
+N + 1 shards (jump consistent hashing only moves about 1/(N + 1) of the
+users in that case). Each batch is copied into its new shard before it is
+deleted from the old one, so an interrupted run is safely resumed by
+running the command again. Users that move get a new id; their refresh
+tokens are tied to the username, so they keep working and logout still
+ends them.
+
+Stop the API (or at least signups and password changes) while it runs.
+
+Usage:
+    python rebalance_users.py --from sqlite+aiosqlite:///./auth.db
+    python rebalance_users.py --from sqlite+aiosqlite:///./users-0.db sqlite+aiosqlite:///./users-1.db \
+        --to sqlite+aiosqlite:///./users-0.db sqlite+aiosqlite:///./users-1.db sqlite+aiosqlite:///./users-2.db
+"""
+
+# Standard library imports
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+# Application imports
+from app.core.config import get_settings
+from app.db.session import make_engine
+from app.db.user_store import SqlUserStore, shard_index
+
+# Get application settings
+settings = get_settings()
+
+async def rebalance(sources: List[str], targets: List[str], batch_size: int, dry_run: bool) -> None:
+    """
+    Move every user whose shard differs under the target map.
+
+    Args:
+        sources: Database URLs of the current shard map
+        targets: Database URLs of the new shard map
+        batch_size: Users read, copied and deleted per step
+        dry_run: Only count the users that would move
+    """
+    stores: Dict[str, SqlUserStore] = {
+        url: SqlUserStore(make_engine(url, 1)) for url in dict.fromkeys(sources + targets)
+    }
+    for url in targets:
+        await stores[url].ensure_schema()
+
+    started = time.perf_counter()
+    scanned = moved = 0
+    for source_url in dict.fromkeys(sources):
+        source = stores[source_url]
+        after_id = 0
+        while True:
+            page = await source.fetch_page(after_id, batch_size, full=True)
+            if not page:
+                break
+            after_id = page[-1]["id"]
+            scanned += len(page)
+
+            moves: Dict[str, List[dict]] = defaultdict(list)
+            for row in page:
+                target_url = targets[shard_index(row["username"], len(targets))]
+                if target_url != source_url:
+                    moves[target_url].append(row)
+            for target_url, rows in moves.items():
+                if not dry_run:
+                    # Copy first: a crash in between leaves a duplicate that
+                    # the next run removes, never a lost user
+                    await stores[target_url].copy_users(rows)
+                    await source.delete_users(row["username"] for row in rows)
+                moved += len(rows)
+            print(f"scanned {scanned}, {'would move' if dry_run else 'moved'} {moved}")
+
+    for store in stores.values():
+        await store.dispose()
+    print(f"done in {time.perf_counter() - started:.1f}s")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Move users between shards after the shard map changes")
+    parser.add_argument("--from", dest="sources", nargs="+", required=True, help="Current shard database URLs, in order")
+    parser.add_argument("--to", dest="targets", nargs="+", help="New shard database URLs, in order (default: USER_SHARDS)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Users per step")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many users would move")
+    args = parser.parse_args()
+
+    targets = args.targets or settings.USER_SHARDS
+    if not targets:
+        parser.error("--to is required when USER_SHARDS is not set")
+    asyncio.run(rebalance(args.sources, targets, args.batch_size, args.dry_run))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Shared test setup.
+
+Settings are read when the application modules are imported, so the
+environment is pointed at a throwaway database and token cache before any
+test module imports the app. Async test functions run in a fresh event
+loop each (no pytest plugin needed), and the database engines are disposed
+after every test so no pooled connection outlives its loop.
+"""
+
+# Standard library imports
+import asyncio
+import inspect
+import os
+import tempfile
+from contextlib import asynccontextmanager
+
+# Test imports
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="auth-tests-")
+os.environ["SECRET_KEY"] = "test-secret-key"
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_TMP}/test.db"
+os.environ["USER_STORE"] = "database"
+os.environ["USER_SHARDS"] = "[]"
+os.environ["TOKEN_CACHE_PATH"] = os.path.join(_TMP, "cache", "tokens.db")
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["HASHING_POOL_SIZE"] = "1"
+os.environ["METRICS_ENABLED"] = "False"
+os.environ["PROFILING_ENABLED"] = "False"
+os.environ["WARMUP_ENABLED"] = "False"
+os.environ["LOGIN_USERNAME_RATE_PER_MINUTE"] = "0"
+os.environ["LOGIN_IP_RATE_PER_MINUTE"] = "0"
+os.environ["INTROSPECT_CLIENTS"] = '{"gateway": "gateway-secret"}'
+
+async def _dispose_engines() -> None:
+    from app.db.session import engine, read_engine
+    from app.db.user_store import user_store
+    await user_store.dispose()
+    await engine.dispose()
+    await read_engine.dispose()
+
+async def _run_test(coroutine) -> None:
+    try:
+        await coroutine
+    finally:
+        await _dispose_engines()
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    arguments = {name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames}
+    asyncio.run(_run_test(pyfuncitem.obj(**arguments)))
+    return True
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    """Bring the test database to the newest schema revision once."""
+    from app.core.hashing import shutdown_hashing_pool
+    from app.db.migrations import ensure_schema
+    from app.db.session import engine
+    from app.db.user_store import user_store
+
+    async def migrate() -> None:
+        await ensure_schema(engine)
+        await user_store.ensure_schema()
+    asyncio.run(_run_test(migrate()))
+    yield
+    shutdown_hashing_pool()
+
+@asynccontextmanager
+async def _app_client():
+    # Imported here so the environment above is in place first
+    import httpx
+    from main import app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+
+@pytest.fixture
+def app_client():
+    """
+    Factory of HTTP clients for the application with its lifespan running,
+    used as `async with app_client() as client:` in an async test.
+    """
+    return _app_client
@@ -0,0 +1,104 @@
+# Standard library imports
+import asyncio
+
+# Test imports
+import pytest
+
+# Application imports
+from app.core import admission
+from app.core.admission import AdmissionController, Overloaded, TokenBucketLimiter
+
+async def test_jobs_beyond_the_limit_wait_for_a_slot():
+    controller = AdmissionController(max_concurrency=1, max_queue=4, max_wait_ms=1000)
+    order = []
+
+    async def job(name: str) -> None:
+        async with controller.slot():
+            order.append(f"{name} start")
+            await asyncio.sleep(0.01)
+            order.append(f"{name} end")
+
+    await asyncio.gather(job("a"), job("b"))
+
+    assert order == ["a start", "a end", "b start", "b end"]
+    assert controller.active == 0
+    assert controller.admitted == 2
+
+async def test_full_queue_is_rejected_up_front():
+    controller = AdmissionController(max_concurrency=1, max_queue=0, max_wait_ms=1000)
+    await controller._acquire()
+
+    with pytest.raises(Overloaded):
+        await controller._acquire()
+    assert controller.rejected == 1
+
+async def test_timed_out_waiter_leaves_the_queue():
+    controller = AdmissionController(max_concurrency=1, max_queue=4, max_wait_ms=20)
+    await controller._acquire()
+
+    with pytest.raises(Overloaded):
+        await controller._acquire()
+    assert controller.waiting == 0
+
+    controller._release()
+    assert controller.active == 0
+
+async def test_slot_granted_as_the_wait_times_out_is_given_back(monkeypatch):
+    controller = AdmissionController(max_concurrency=1, max_queue=4, max_wait_ms=1000)
+    await controller._acquire()
+
+    async def wait_for(waiter, timeout):
+        # The holder finishes and hands its slot over, then the deadline hits
+        controller._release()
+        assert waiter.done()
+        raise asyncio.TimeoutError
+    monkeypatch.setattr(admission.asyncio, "wait_for", wait_for)
+
+    with pytest.raises(Overloaded):
+        await controller._acquire()
+    assert controller.waiting == 0
+    assert controller.active == 0
+
+async def test_cancelled_waiter_leaves_the_queue():
+    controller = AdmissionController(max_concurrency=1, max_queue=4, max_wait_ms=1000)
+    await controller._acquire()
+    task = asyncio.ensure_future(controller._acquire())
+    await asyncio.sleep(0)
+    assert controller.waiting == 1
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert controller.waiting == 0
+
+    controller._release()
+    assert controller.active == 0
+
+async def test_slot_granted_as_the_waiter_is_cancelled_is_not_lost():
+    controller = AdmissionController(max_concurrency=1, max_queue=4, max_wait_ms=1000)
+    await controller._acquire()
+
+    async def job() -> None:
+        async with controller.slot():
+            pass
+
+    task = asyncio.ensure_future(job())
+    await asyncio.sleep(0)
+    controller._release()
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+    assert controller.waiting == 0
+    assert controller.active == 0
+
+def test_token_bucket_throttles_after_the_burst():
+    limiter = TokenBucketLimiter(rate_per_minute=60, burst=2, max_keys=10)
+
+    assert limiter.acquire("alice") is None
+    assert limiter.acquire("alice") is None
+    assert limiter.acquire("alice") == 1
+    assert limiter.acquire("bob") is None
+    assert limiter.throttled == 1
@@ -0,0 +1,38 @@
+# Standard library imports
+import ipaddress
+from typing import Optional
+
+# Test imports
+import pytest
+
+# FastAPI imports
+from fastapi import Request
+
+# Application imports
+from app.api import auth
+from app.api.auth import client_ip
+
+def request_from(address: str, forwarded_for: Optional[str] = None) -> Request:
+    headers = [] if forwarded_for is None else [(b"x-forwarded-for", forwarded_for.encode())]
+    return Request({"type": "http", "client": (address, 50000), "headers": headers})
+
+@pytest.fixture
+def proxies(monkeypatch):
+    networks = [ipaddress.ip_network("10.0.0.0/8")]
+    monkeypatch.setattr(auth, "trusted_proxies", networks)
+    return networks
+
+def test_forwarded_for_is_ignored_without_trusted_proxies():
+    assert client_ip(request_from("10.0.0.5", "203.0.113.7")) == "10.0.0.5"
+
+def test_forwarded_for_is_ignored_from_untrusted_peers(proxies):
+    assert client_ip(request_from("198.51.100.9", "203.0.113.7")) == "198.51.100.9"
+
+def test_client_is_the_first_untrusted_hop_from_the_right(proxies):
+    request = request_from("10.0.0.5", "192.0.2.1, 203.0.113.7, 10.1.2.3")
+
+    assert client_ip(request) == "203.0.113.7"
+
+def test_request_through_trusted_proxies_only_uses_the_leftmost_hop(proxies):
+    assert client_ip(request_from("10.0.0.5", "10.9.9.9, 10.1.2.3")) == "10.9.9.9"
+    assert client_ip(request_from("10.0.0.5")) == "10.0.0.5"
@@ -0,0 +1,55 @@
+# Standard library imports
+import uuid
+
+# Application imports
+from app.api import auth
+from app.core.cache import token_cache
+from app.core.security import decode_access_token
+
+GATEWAY = ("gateway", "gateway-secret")
+
+async def login(client) -> str:
+    username = f"user-{uuid.uuid4().hex[:12]}"
+    await client.post("/api/signup", json={"username": username, "password": "secret"})
+    response = await client.post("/api/login", data={"username": username, "password": "secret"})
+    return response.json()["access_token"]
+
+async def test_introspect_requires_client_credentials(app_client):
+    async with app_client() as client:
+        token = await login(client)
+
+        anonymous = await client.post("/api/introspect", json={"tokens": [token]})
+        wrong = await client.post("/api/introspect", json={"tokens": [token]}, auth=("gateway", "guess"))
+
+        assert anonymous.status_code == 401
+        assert wrong.status_code == 401
+        assert anonymous.headers["WWW-Authenticate"].startswith("Basic")
+
+async def test_introspect_reports_active_and_invalid_tokens(app_client):
+    async with app_client() as client:
+        token = await login(client)
+
+        response = await client.post("/api/introspect", json={"tokens": [token, "junk", token]}, auth=GATEWAY)
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert results[0]["active"] and results[0] == results[2]
+        assert results[1] == {"active": False, "sub": None, "exp": None, "user_id": None}
+
+async def test_user_changed_during_introspection_is_not_cached(app_client, monkeypatch):
+    async with app_client() as client:
+        token = await login(client)
+        token_cache.clear()
+        username = decode_access_token(token)["sub"]
+        get_users_by_usernames = auth.get_users_by_usernames
+
+        async def changed_while_loading(usernames):
+            users = await get_users_by_usernames(usernames)
+            token_cache.invalidate_user(username)
+            return users
+        monkeypatch.setattr(auth, "get_users_by_usernames", changed_while_loading)
+
+        response = await client.post("/api/introspect", json={"tokens": [token]}, auth=GATEWAY)
+
+        assert response.json()["results"][0]["active"]
+        assert token_cache.get(token) is None
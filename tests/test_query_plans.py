@@ -0,0 +1,36 @@
+# Standard library imports
+import re
+
+# Test imports
+import pytest
+
+# Database imports
+from sqlalchemy import select
+from sqlalchemy.dialects import sqlite
+
+# Application imports
+from app.db.session import engine
+from app.db.user_store import select_credentials
+from app.models.user import User
+
+async def explain(statement) -> str:
+    compiled = statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})
+    async with engine.connect() as conn:
+        result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")
+        return "\n".join(row[-1] for row in result)
+
+async def test_login_reads_only_the_covering_index():
+    plan = await explain(select_credentials("alice"))
+
+    assert "USING COVERING INDEX ix_users_login" in plan
+    assert "SCAN" not in plan
+
+@pytest.mark.parametrize("statement", [
+    pytest.param(select(User).where(User.username == "alice"), id="get_current_user"),
+    pytest.param(select(User).where(User.username.in_(["alice", "bob"])), id="introspect"),
+])
+async def test_user_lookups_use_an_index(statement):
+    plan = await explain(statement)
+
+    assert re.search(r"USING (COVERING )?INDEX", plan)
+    assert "SCAN" not in plan
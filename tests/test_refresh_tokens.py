@@ -0,0 +1,118 @@
+# Standard library imports
+import asyncio
+import time
+import uuid
+
+# Database imports
+from sqlalchemy import insert
+
+# Application imports
+from app.db import refresh_tokens
+from app.db.session import AsyncSessionLocal
+from app.db.user_store import user_store
+from app.models.refresh_token import RefreshToken
+
+async def signup_and_login(client, username: str) -> dict:
+    response = await client.post("/api/signup", json={"username": username, "password": "secret"})
+    assert response.status_code == 201
+    response = await client.post("/api/login", data={"username": username, "password": "secret"})
+    assert response.status_code == 200
+    return response.json()
+
+def bearer(tokens: dict) -> dict:
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+def new_username() -> str:
+    return f"user-{uuid.uuid4().hex[:12]}"
+
+async def test_refresh_rotates_and_rejects_reuse(app_client):
+    async with app_client() as client:
+        tokens = await signup_and_login(client, new_username())
+
+        first = await client.post("/api/refresh", json={"refresh_token": tokens["refresh_token"]})
+        reused = await client.post("/api/refresh", json={"refresh_token": tokens["refresh_token"]})
+
+        assert first.status_code == 200
+        assert first.json()["refresh_token"] != tokens["refresh_token"]
+        assert reused.status_code == 401
+        second = await client.post("/api/refresh", json={"refresh_token": first.json()["refresh_token"]})
+        assert second.status_code == 200
+
+async def test_concurrent_refreshes_rotate_once(app_client):
+    async with app_client() as client:
+        tokens = await signup_and_login(client, new_username())
+
+        responses = await asyncio.gather(*(
+            client.post("/api/refresh", json={"refresh_token": tokens["refresh_token"]})
+            for _ in range(5)
+        ))
+
+        assert sorted(response.status_code for response in responses) == [200, 401, 401, 401, 401]
+
+async def test_logout_revokes_refresh_tokens(app_client):
+    async with app_client() as client:
+        username = new_username()
+        tokens = await signup_and_login(client, username)
+        other_session = (await client.post(
+            "/api/login", data={"username": username, "password": "secret"}
+        )).json()
+
+        response = await client.post("/api/logout", headers=bearer(tokens))
+
+        assert response.status_code == 200
+        assert (await client.get("/api/protected", headers=bearer(tokens))).status_code == 401
+        for refresh_token in (tokens["refresh_token"], other_session["refresh_token"]):
+            response = await client.post("/api/refresh", json={"refresh_token": refresh_token})
+            assert response.status_code == 401
+
+async def test_revoke_accepts_own_refresh_token_only(app_client):
+    async with app_client() as client:
+        alice = await signup_and_login(client, new_username())
+        bob = await signup_and_login(client, new_username())
+
+        foreign = await client.post(
+            "/api/revoke", json={"token": bob["refresh_token"]}, headers=bearer(alice)
+        )
+        own = await client.post(
+            "/api/revoke", json={"token": alice["refresh_token"]}, headers=bearer(alice)
+        )
+
+        assert foreign.status_code == 400
+        assert own.status_code == 200
+        assert (await client.post("/api/refresh", json={"refresh_token": alice["refresh_token"]})).status_code == 401
+        assert (await client.post("/api/refresh", json={"refresh_token": bob["refresh_token"]})).status_code == 200
+
+async def test_logout_revokes_refresh_tokens_issued_before_a_rebalance(app_client):
+    async with app_client() as client:
+        username = new_username()
+        before = await signup_and_login(client, username)
+        await signup_and_login(client, new_username())
+        # Move the user the way rebalance_users.py does, which assigns a new id
+        row = await user_store.get_user(username)
+        await user_store.delete_users([username])
+        await user_store.copy_users([row])
+        assert (await user_store.get_user(username))["id"] != row["id"]
+        after = (await client.post("/api/login", data={"username": username, "password": "secret"})).json()
+
+        response = await client.post("/api/logout", headers=bearer(after))
+
+        assert response.status_code == 200
+        response = await client.post("/api/refresh", json={"refresh_token": before["refresh_token"]})
+        assert response.status_code == 401
+
+async def test_expired_refresh_tokens_are_pruned_periodically(monkeypatch):
+    monkeypatch.setattr(refresh_tokens.settings, "REFRESH_TOKEN_PRUNE_SECONDS", 0.01)
+    pruner = asyncio.ensure_future(refresh_tokens.run_prune_loop())
+    await asyncio.sleep(0.05)
+    expired_hash = uuid.uuid4().hex
+    async with AsyncSessionLocal() as session:
+        await session.execute(insert(RefreshToken).values(
+            token_hash=expired_hash, user_id=1, username=new_username(), expires_at=int(time.time()) - 1
+        ))
+        await session.commit()
+
+    await asyncio.sleep(0.1)
+    pruner.cancel()
+
+    async with AsyncSessionLocal() as session:
+        assert await session.get(RefreshToken, expired_hash) is None
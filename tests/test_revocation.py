@@ -0,0 +1,83 @@
+# Standard library imports
+import time
+import uuid
+
+# Application imports
+from app.core.cache import token_cache
+from app.core.config import get_settings
+from app.core.revocation import RevocationList
+from app.core.security import decode_access_token
+from app.core.shared_cache import SharedTokenCache
+
+settings = get_settings()
+
+def new_worker() -> RevocationList:
+    # Each instance stands in for the revocation list of one worker
+    return RevocationList(settings.REVOCATION_BLOOM_CAPACITY)
+
+def new_jti() -> str:
+    return uuid.uuid4().hex
+
+async def test_revocation_is_visible_to_other_workers_after_sync():
+    worker_a, worker_b = new_worker(), new_worker()
+    await worker_a.sync()
+    await worker_b.sync()
+    jti = new_jti()
+
+    await worker_b.revoke(jti, int(time.time()) + 600)
+
+    assert worker_b.is_revoked(jti)
+    assert not worker_a.is_revoked(jti)
+    await worker_a.sync()
+    assert worker_a.is_revoked(jti)
+
+async def test_revocation_after_prune_is_not_missed():
+    worker_a, worker_b = new_worker(), new_worker()
+    past = int(time.time()) - 1
+    for _ in range(3):
+        await worker_b.revoke(new_jti(), past)
+    await worker_a.sync()
+    # Deleting the expired rows must not let their ids be handed out again
+    await worker_b.prune()
+    fresh = new_jti()
+
+    await worker_b.revoke(fresh, int(time.time()) + 600)
+    await worker_a.sync()
+
+    assert worker_a.is_revoked(fresh)
+
+async def test_prune_keeps_unexpired_revocations():
+    worker = new_worker()
+    expired, active = new_jti(), new_jti()
+    await worker.revoke(expired, int(time.time()) - 1)
+    await worker.revoke(active, int(time.time()) + 600)
+
+    await worker.prune()
+
+    assert not worker.is_revoked(expired)
+    assert worker.is_revoked(active)
+    fresh_worker = new_worker()
+    await fresh_worker.sync()
+    assert fresh_worker.is_revoked(active)
+    assert not fresh_worker.is_revoked(expired)
+
+async def test_token_revoked_on_another_worker_is_rejected_before_the_next_sync(app_client):
+    async with app_client() as client:
+        username = f"user-{uuid.uuid4().hex[:12]}"
+        await client.post("/api/signup", json={"username": username, "password": "secret"})
+        token = (await client.post(
+            "/api/login", data={"username": username, "password": "secret"}
+        )).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        assert (await client.get("/api/protected", headers=headers)).status_code == 200
+
+        # Revoked the way /api/logout does it, by a worker with its own
+        # revocation list and its own connection to the shared cache
+        claims = decode_access_token(token)
+        other_worker = new_worker()
+        await other_worker.revoke(claims["jti"], claims["exp"])
+        SharedTokenCache(token_cache.path, token_cache.maxsize, token_cache.ttl).revoke(
+            token, claims["jti"], claims["exp"]
+        )
+
+        assert (await client.get("/api/protected", headers=headers)).status_code == 401
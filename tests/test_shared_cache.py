@@ -0,0 +1,120 @@
+# Standard library imports
+import time
+
+# Test imports
+import pytest
+
+# Application imports
+from app.core.cache import CachedToken
+from app.core.shared_cache import SharedTokenCache
+
+CLAIMS = {"sub": "alice", "exp": 4_000_000_000}
+SNAPSHOT = {"id": 1, "username": "alice", "hashed_password": "secret"}
+
+class Clock:
+    """Stand-in for the time module whose wall clock only moves when told."""
+
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self) -> float:
+        return self.now
+
+    def time_ns(self) -> int:
+        return int(self.now * 1_000_000_000)
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache" / "tokens.db")
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("app.core.shared_cache.time", clock)
+    return clock
+
+def test_cached_entries_leave_out_the_password_hash(cache_path):
+    cache = SharedTokenCache(cache_path, maxsize=100, ttl=60)
+    cache.set("token", CLAIMS, SNAPSHOT)
+    cache.set_user(SNAPSHOT, 0)
+
+    assert cache.get("token") == CachedToken(CLAIMS, {"id": 1, "username": "alice"})
+    assert cache.get_user("alice") == ({"id": 1, "username": "alice"}, 0)
+
+def test_invalidate_user_hides_entries_from_every_process(cache_path):
+    writer = SharedTokenCache(cache_path, maxsize=100, ttl=60)
+    reader = SharedTokenCache(cache_path, maxsize=100, ttl=60)
+    writer.set("token", CLAIMS, SNAPSHOT)
+    writer.set_user(SNAPSHOT, 0)
+    assert reader.get("token") is not None
+
+    reader.invalidate_user("alice")
+
+    assert writer.get("token") is None
+    snapshot, version = writer.get_user("alice")
+    assert snapshot is None
+    assert version > 0
+
+def test_snapshot_loaded_while_the_user_changed_is_not_stored(cache_path):
+    cache = SharedTokenCache(cache_path, maxsize=100, ttl=60)
+    _, version = cache.get_user("alice")
+
+    cache.invalidate_user("alice")
+    cache.set_user(SNAPSHOT, version)
+    cache.set("token", CLAIMS, SNAPSHOT, version)
+
+    assert cache.get_user("alice")[0] is None
+    assert cache.get("token") is None
+
+def test_entries_stay_invalid_after_their_version_is_pruned(cache_path, clock):
+    cache = SharedTokenCache(cache_path, maxsize=100, ttl=60)
+    cache.invalidate_user("alice")
+    clock.now += 50
+    cache.set("token", CLAIMS, SNAPSHOT)
+    cache.set_user(SNAPSHOT, cache.get_user("alice")[1])
+
+    # The version row is older than the TTL, the entries stored under it are not
+    clock.now += 11
+    cache.prune()
+    cache.invalidate_user("alice")
+
+    assert cache.get("token") is None
+    assert cache.get_user("alice")[0] is None
+
+def test_versions_increase_when_the_clock_goes_back(cache_path, clock):
+    cache = SharedTokenCache(cache_path, maxsize=100, ttl=60)
+    cache.invalidate_user("alice")
+    first = cache.get_user("alice")[1]
+
+    clock.now -= 5
+    cache.invalidate_user("alice")
+
+    assert cache.get_user("alice")[1] == first + 1
+
+def test_prune_keeps_the_most_recently_used_entries(cache_path, clock):
+    cache = SharedTokenCache(cache_path, maxsize=2, ttl=60)
+    for name in ("a", "b", "c"):
+        cache.set(name, CLAIMS, SNAPSHOT)
+        clock.now += 2
+    cache.get("a")
+
+    cache.prune()
+
+    assert len(cache) == 2
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+
+def test_revoked_token_is_dropped_and_never_cached_again(cache_path, clock):
+    worker_a = SharedTokenCache(cache_path, maxsize=100, ttl=60)
+    worker_b = SharedTokenCache(cache_path, maxsize=100, ttl=60)
+    claims = {**CLAIMS, "jti": "revoked-jti"}
+    worker_b.set("token", claims, SNAPSHOT)
+
+    worker_a.revoke("token", "revoked-jti", clock.now + 30)
+    worker_b.set("token", claims, SNAPSHOT)
+
+    assert worker_b.get("token") is None
+    assert worker_b.is_revoked("revoked-jti")
+    clock.now += 31
+    worker_b.prune()
+    assert not worker_b.is_revoked("revoked-jti")
@@ -0,0 +1,80 @@
+# Standard library imports
+import asyncio
+import uuid
+
+# Test imports
+import pytest
+
+# Application imports
+from app.db import signup_batcher as batcher_module
+from app.db.signup_batcher import SignupBatcher
+from app.db.user_store import user_store
+
+def new_username() -> str:
+    return f"user-{uuid.uuid4().hex[:12]}"
+
+async def test_concurrent_signups_share_a_batch():
+    batcher = SignupBatcher(max_size=100, max_wait_ms=20)
+    batcher.start()
+    usernames = [new_username() for _ in range(10)]
+
+    rows = await asyncio.gather(*(batcher.insert(username, "hash") for username in usernames))
+    await batcher.stop()
+
+    assert [row["username"] for row in rows] == usernames
+    assert batcher.batches == 1
+
+async def test_duplicate_username_in_a_batch_gets_none():
+    batcher = SignupBatcher(max_size=100, max_wait_ms=20)
+    batcher.start()
+    username = new_username()
+
+    first, second = await asyncio.gather(batcher.insert(username, "hash"), batcher.insert(username, "hash"))
+    await batcher.stop()
+
+    assert first["username"] == username
+    assert second is None
+
+async def test_stop_writes_queued_signups():
+    batcher = SignupBatcher(max_size=3, max_wait_ms=1000)
+    batcher.start()
+    usernames = [new_username() for _ in range(7)]
+    inserts = [asyncio.ensure_future(batcher.insert(username, "hash")) for username in usernames]
+    await asyncio.sleep(0)
+
+    await batcher.stop()
+
+    rows = await asyncio.wait_for(asyncio.gather(*inserts), 5)
+    assert [row["username"] for row in rows] == usernames
+    assert set(await user_store.existing_usernames(usernames)) == set(usernames)
+
+async def test_stop_waits_for_the_batch_in_flight_and_fails_later_signups(monkeypatch):
+    batcher = SignupBatcher(max_size=100, max_wait_ms=0)
+    insert_users = user_store.insert_users
+    writing = asyncio.Event()
+
+    async def slow_insert_users(users):
+        writing.set()
+        await asyncio.sleep(0.1)
+        return await insert_users(users)
+    monkeypatch.setattr(batcher_module.user_store, "insert_users", slow_insert_users)
+    batcher.start()
+    in_flight = asyncio.ensure_future(batcher.insert(new_username(), "hash"))
+    await writing.wait()
+
+    stopping = asyncio.ensure_future(batcher.stop())
+    await asyncio.sleep(0)
+    late = asyncio.ensure_future(batcher.insert(new_username(), "hash"))
+    await stopping
+
+    assert (await asyncio.wait_for(in_flight, 5))["id"] > 0
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(late, 5)
+
+async def test_insert_without_start_writes_directly():
+    batcher = SignupBatcher(max_size=100, max_wait_ms=20)
+    username = new_username()
+
+    row = await batcher.insert(username, "hash")
+
+    assert row["username"] == username
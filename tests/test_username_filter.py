@@ -0,0 +1,44 @@
+# Standard library imports
+import asyncio
+import uuid
+
+# Application imports
+from app.core.username_filter import UsernameFilter
+from app.db.user_store import user_store
+
+def new_username() -> str:
+    return f"user-{uuid.uuid4().hex[:12]}"
+
+async def test_user_created_elsewhere_is_found_before_the_next_sync():
+    worker_filter = UsernameFilter(1000)
+    await worker_filter.sync()
+    username = new_username()
+
+    # Signed up on another worker after this one synced
+    await user_store.insert_users([(username, "hash")])
+
+    assert not worker_filter.might_exist(username)
+    assert await worker_filter.might_exist_fresh(username)
+
+async def test_unknown_usernames_share_catch_up_syncs():
+    worker_filter = UsernameFilter(1000)
+    await worker_filter.sync()
+    loads_before = worker_filter._syncs.calls - worker_filter._syncs.coalesced
+
+    answers = await asyncio.gather(*(worker_filter.might_exist_fresh(new_username()) for _ in range(50)))
+
+    loads = worker_filter._syncs.calls - worker_filter._syncs.coalesced - loads_before
+    assert answers == [False] * 50
+    # One sync may already be running when a caller arrives; at most one
+    # more is needed for all of them
+    assert 1 <= loads <= 2
+
+async def test_failed_catch_up_falls_back_to_the_database():
+    worker_filter = UsernameFilter(1000)
+    await worker_filter.sync()
+
+    async def broken_load() -> None:
+        raise RuntimeError("database unavailable")
+    worker_filter._load = broken_load
+
+    assert await worker_filter.might_exist_fresh(new_username())
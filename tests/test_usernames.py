@@ -0,0 +1,63 @@
+# Standard library imports
+import asyncio
+import uuid
+
+# Application imports
+from app.core.username_filter import UsernameFilter
+from app.db.user_store import MemoryUserStore, shard_index
+
+def new_username() -> str:
+    return f"User-{uuid.uuid4().hex[:12]}"
+
+async def test_usernames_differing_only_in_case_cannot_both_sign_up(app_client):
+    async with app_client() as client:
+        username = new_username()
+        first = await client.post("/api/signup", json={"username": username, "password": "secret"})
+        second = await client.post("/api/signup", json={"username": username.lower(), "password": "secret"})
+
+        assert first.status_code == 201
+        assert second.status_code == 400
+
+async def test_concurrent_signups_in_different_case_create_one_user(app_client):
+    async with app_client() as client:
+        username = new_username()
+        responses = await asyncio.gather(*(
+            client.post("/api/signup", json={"username": variant, "password": "secret"})
+            for variant in (username, username.lower(), username.upper())
+        ))
+
+        assert sorted(response.status_code for response in responses) == [201, 400, 400]
+
+async def test_login_ignores_case_and_keeps_the_signup_username(app_client):
+    async with app_client() as client:
+        username = new_username()
+        await client.post("/api/signup", json={"username": username, "password": "secret"})
+
+        response = await client.post("/api/login", data={"username": username.upper(), "password": "secret"})
+
+        assert response.status_code == 200
+        token = response.json()["access_token"]
+        me = await client.get("/api/protected", headers={"Authorization": f"Bearer {token}"})
+        assert me.json()["username"] == username
+
+async def test_username_filter_ignores_case(app_client):
+    async with app_client() as client:
+        username = new_username()
+        await client.post("/api/signup", json={"username": username, "password": "secret"})
+        worker_filter = UsernameFilter(1000)
+        await worker_filter.sync()
+
+        assert worker_filter.might_exist(username.lower())
+        assert worker_filter.might_exist(username.upper())
+
+async def test_memory_store_ignores_case():
+    store = MemoryUserStore()
+
+    inserted = await store.insert_users([("Alice", "hash"), ("ALICE", "hash")])
+
+    assert list(inserted) == ["Alice"]
+    assert (await store.get_credentials("alice")).username == "Alice"
+    assert await store.existing_usernames(["aLiCe", "bob"]) == {"aLiCe"}
+
+def test_usernames_differing_only_in_case_share_a_shard():
+    assert all(shard_index("Alice", shards) == shard_index("alice", shards) for shards in range(1, 64))
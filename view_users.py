@@ -1,22 +1,33 @@
+import argparse
 import asyncio
-from sqlalchemy import select
-from app.db.session import AsyncSessionLocal
-from app.models.user import User
+from app.db.users import stream_users
+from app.schemas.auth import User as UserSchema
 
-async def view_users():
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(User))
-        users = result.scalars().all()
-        
+async def view_users(after_id: int = 0, limit: int = 0, ndjson: bool = False):
+    # Users are streamed page by page, so memory stays flat for any table size
+    if not ndjson:
         print("\nUsers in the database:")
-        print("-" * 100)
-        print(f"{'ID':<5} {'Username':<15} {'Created At':<25} {'Updated At':<25}")
-        print("-" * 100)
-        
-        for user in users:
-            created_at = user.created_at.strftime("%Y-%m-%d %H:%M:%S") if user.created_at else ""
-            updated_at = user.updated_at.strftime("%Y-%m-%d %H:%M:%S") if user.updated_at else ""
-            print(f"{user.id:<5} {user.username:<15} {created_at:<25} {updated_at:<25}")
+        print("-" * 130)
+        print(f"{'ID':<5} {'Username':<15} {'Created At':<25} {'Updated At':<25} {'Last Login':<25} {'Logins':<6}")
+        print("-" * 130)
+
+    count = 0
+    async for user in stream_users(after_id, full=not ndjson):
+        if ndjson:
+            print(UserSchema.model_validate(user).model_dump_json())
+        else:
+            created_at = user["created_at"].strftime("%Y-%m-%d %H:%M:%S") if user["created_at"] else ""
+            updated_at = user["updated_at"].strftime("%Y-%m-%d %H:%M:%S") if user["updated_at"] else ""
+            last_login_at = user["last_login_at"].strftime("%Y-%m-%d %H:%M:%S") if user["last_login_at"] else ""
+            print(f"{user['id']:<5} {user['username']:<15} {created_at:<25} {updated_at:<25} {last_login_at:<25} {user['login_count']:<6}")
+        count += 1
+        if limit and count >= limit:
+            break
 
 if __name__ == "__main__":
-    asyncio.run(view_users()) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="List users in the database")
+    parser.add_argument("--after-id", type=int, default=0, help="Start after this user id")
+    parser.add_argument("--limit", type=int, default=0, help="Stop after this many users (0 for all)")
+    parser.add_argument("--ndjson", action="store_true", help="Print one JSON object per line")
+    args = parser.parse_args()
+    asyncio.run(view_users(args.after_id, args.limit, args.ndjson))